@@ -0,0 +1,198 @@
+import asyncio
+import os
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from app.models import ActivityLog
+
+# Buffered events are written at least this often...
+ACTIVITY_FLUSH_INTERVAL_MS = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_MS", "250"))
+# ...or as soon as this many are waiting, one INSERT per batch
+ACTIVITY_FLUSH_BATCH = int(os.getenv("ACTIVITY_FLUSH_BATCH", "1000"))
+# Events held while the database is unreachable; past this the oldest are dropped
+ACTIVITY_BUFFER_LIMIT = int(os.getenv("ACTIVITY_BUFFER_LIMIT", "100000"))
+
+# Event types shown on the public "today" feed
+PUBLIC_FEED_TYPES = ("report_created", "issue_resolved")
+
+
+def report_payload(report, **extra) -> dict:
+    """
+    The report fields the feed and timeline show, copied into the event so
+    neither has to read reports. Works with ORM objects, RETURNING rows and
+    ReportCreate bodies.
+    """
+    return {
+        "title": getattr(report, "title", None),
+        "issue_type": getattr(report, "issue_type", None) or "General",
+        "category": getattr(report, "category", None) or "General",
+        "urgency": getattr(report, "urgency_level", None),
+        "location": getattr(report, "location_address", None),
+        "department": getattr(report, "department", None),
+        **extra,
+    }
+
+
+class ActivityLogWriter:
+    """
+    Append-only activity_logs writer. Routes call emit() after their commit -
+    it only appends to an in-memory buffer - and a background task writes the
+    buffer with batched INSERTs every ACTIVITY_FLUSH_INTERVAL_MS.
+
+    Events carry the time they happened, not the time they were flushed. A crash
+    loses at most one interval of events; a failed flush keeps them buffered and
+    retries on the next tick.
+    """
+
+    def __init__(self, session_factory, interval_ms: float = ACTIVITY_FLUSH_INTERVAL_MS,
+                 batch_size: int = ACTIVITY_FLUSH_BATCH, limit: int = ACTIVITY_BUFFER_LIMIT):
+        self._session_factory = session_factory
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self.limit = limit
+        self._buffer: deque = deque()
+        self._in_flight: List[dict] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def emit(self, activity_type: str, report_id: Optional[int], description: str,
+             payload: Optional[dict] = None, user_id: Optional[int] = None):
+        if len(self._buffer) >= self.limit:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append({
+            "activity_type": activity_type,
+            "report_id": report_id,
+            "user_id": user_id,
+            "description": description,
+            "payload": payload,
+            "created_at": datetime.utcnow(),
+        })
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self, report_id: int) -> List[dict]:
+        """Events for a report not yet in the table, so its timeline shows them immediately"""
+        return [event for event in (*self._in_flight, *self._buffer) if event["report_id"] == report_id]
+
+    def discard(self, report_ids):
+        """Drop buffered events of deleted reports"""
+        report_ids = set(report_ids)
+        self._buffer = deque(event for event in self._buffer if event["report_id"] not in report_ids)
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write whatever is still buffered, then stop the flush loop"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        await self.flush()
+
+    async def flush(self):
+        while self._buffer:
+            self._in_flight = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                async with self._session_factory() as session:
+                    await session.execute(insert(ActivityLog), self._in_flight)
+                    await session.commit()
+            except Exception as e:
+                self.failed_flushes += 1
+                print(f"⚠️ Could not write {len(self._in_flight)} activity events, will retry: {str(e)}")
+                self._buffer.extendleft(reversed(self._in_flight))
+                self._in_flight = []
+                return
+            self.written += len(self._in_flight)
+            self._in_flight = []
+
+    def status(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+def timeline_events(events, current_status: Optional[str]) -> List[dict]:
+    """Timeline entries for a report's events, oldest first"""
+    entries = []
+    for event in events:
+        activity_type, payload = event["activity_type"], event["payload"] or {}
+        if activity_type == "report_created":
+            label, description = "Submitted", "Complaint submitted"
+        elif activity_type == "issue_resolved":
+            label, description = "Resolved", "Issue resolved successfully"
+        elif activity_type == "status_changed":
+            to_status = payload.get("to_status")
+            label = {"In Progress": "In Progress", "Reported": "Reopened"}.get(to_status, to_status)
+            description = "Work in progress" if to_status == "In Progress" else event["description"]
+        else:
+            label, description = activity_type.replace("_", " ").title(), event["description"]
+        entries.append({
+            "event": label,
+            "description": description,
+            "timestamp": event["created_at"].isoformat(),
+            "status": "completed",
+        })
+
+    # Work that is still going on is the one step not yet completed
+    if current_status == "In Progress":
+        for entry in reversed(entries):
+            if entry["event"] == "In Progress":
+                entry["status"] = "in_progress"
+                break
+    return entries
+
+
+def feed_entry(activity_type: str, payload: Optional[dict], created_at: datetime) -> dict:
+    payload = payload or {}
+    if activity_type == "report_created":
+        return {
+            "type": "new_report",
+            "title": f"New {payload.get('issue_type', 'General')} issue reported",
+            "description": payload.get("title"),
+            "urgency": payload.get("urgency"),
+            "category": payload.get("category", "General"),
+            "timestamp": created_at,
+            "location": payload.get("location"),
+        }
+    return {
+        "type": activity_type,
+        "title": f"{payload.get('issue_type', 'General')} issue resolved",
+        "description": f"'{payload.get('title')}' has been fixed",
+        "category": payload.get("category", "General"),
+        "timestamp": created_at,
+        "location": payload.get("location"),
+    }
+
+
+def _session_factory():
+    from app.database import AsyncSessionLocal
+    return AsyncSessionLocal()
+
+
+activity_log = ActivityLogWriter(_session_factory)
@@ -0,0 +1,235 @@
+import asyncio
+import math
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, Request
+
+# Per-client token bucket for the inference routes: sustained rate and burst
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+# Buckets kept in memory; the least recently seen clients are forgotten first
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+# Behind a proxy / load balancer (Render, nginx) the client is the first X-Forwarded-For hop
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+# Inference calls running at once per worker
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", str(os.cpu_count() or 2)))
+# Longest a request may wait for an inference slot before it is shed with 503
+INFERENCE_QUEUE_BUDGET_MS = float(os.getenv("INFERENCE_QUEUE_BUDGET_MS", "500"))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+
+_WAIT_SAMPLES = 2048
+
+
+def client_key(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by client. Buckets refill lazily when a client is
+    seen, so idle clients cost nothing but their entry.
+    """
+
+    def __init__(self, per_minute: float = RATE_LIMIT_PER_MINUTE, burst: float = RATE_LIMIT_BURST,
+                 max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+        self.allowed: Counter = Counter()
+        self.limited: Counter = Counter()
+        self.throttled: Counter = Counter()
+
+    def take(self, key: str, cost: float = 1.0) -> Tuple[bool, float, float]:
+        """(allowed, tokens left, seconds until `cost` tokens are available)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        wait = 0.0 if allowed else (cost - tokens) / self.rate
+        return allowed, tokens, wait
+
+    async def acquire(self, key: str, cost: float, scope: str):
+        """
+        Take `cost` tokens for work already admitted (the items of a streamed batch).
+        Costs above the burst are taken a burst at a time, so once the bucket is
+        empty the caller is paced at the refill rate instead of being refused.
+        """
+        while cost > 0:
+            piece = min(cost, self.burst)
+            allowed, _, wait = self.take(key, piece)
+            if allowed:
+                cost -= piece
+            else:
+                self.throttled[scope] += 1
+                await asyncio.sleep(wait)
+
+    def status(self) -> dict:
+        return {
+            "per_minute": self.rate * 60,
+            "burst": self.burst,
+            "clients_tracked": len(self._buckets),
+            "allowed": dict(self.allowed),
+            "rate_limited": dict(self.limited),
+            "throttled": dict(self.throttled),
+        }
+
+
+def rate_limit(scope: str, cost: float = 1.0, limiter: Optional[RateLimiter] = None):
+    """Route dependency: 429 with Retry-After once the client's bucket is empty"""
+    async def dependency(request: Request):
+        bucket = limiter or rate_limiter
+        allowed, remaining, wait = bucket.take(client_key(request), cost)
+        if not allowed:
+            bucket.limited[scope] += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many prediction requests, slow down",
+                headers={
+                    "Retry-After": str(max(1, math.ceil(wait))),
+                    "X-RateLimit-Limit": f"{bucket.rate * 60:g}/minute",
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+        bucket.allowed[scope] += 1
+
+    return dependency
+
+
+class LoadShed(HTTPException):
+    def __init__(self, reason: str, retry_after: int, service: str = "Prediction service"):
+        super().__init__(
+            status_code=503,
+            detail=f"{service} is busy ({reason}), retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.reason = reason
+
+
+class AdmissionGate:
+    """
+    Caps concurrent inference at `limit` per worker. Requests beyond that wait
+    in FIFO order, but only as long as the latency budget allows: a request is
+    shed with 503 + Retry-After when the queue is full, when the expected wait
+    (queue depth x recent service time) is already over budget, or when it has
+    waited the whole budget. Shedding early keeps the admitted requests fast
+    instead of making everyone slow.
+    """
+
+    def __init__(self, limit: int = INFERENCE_CONCURRENCY, budget_ms: float = INFERENCE_QUEUE_BUDGET_MS,
+                 max_queue: int = INFERENCE_MAX_QUEUE, service: str = "Prediction service"):
+        self.limit = limit
+        self.service = service
+        self.budget = budget_ms / 1000
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.service_seconds: Optional[float] = None  # moving average of time holding a slot
+        self.admitted: Counter = Counter()
+        self.shed: Counter = Counter()
+        self.waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _retry_after(self) -> int:
+        drain = (self.waiting / self.limit + 1) * (self.service_seconds or self.budget)
+        return max(1, math.ceil(drain))
+
+    def _shed(self, scope: str, reason: str):
+        self.shed[f"{scope}:{reason}"] += 1
+        raise LoadShed(reason, self._retry_after(), self.service)
+
+    async def _acquire(self, scope: str):
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+        if self.waiting >= self.max_queue:
+            self._shed(scope, "queue_full")
+        if self.service_seconds is not None:
+            expected = (self.waiting // self.limit + 1) * self.service_seconds
+            if expected > self.budget:
+                self._shed(scope, "predicted_wait")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # The slot is handed over by _release(); wait_for returns normally if
+            # that happens just as the budget runs out
+            await asyncio.wait_for(waiter, self.budget)
+        except asyncio.TimeoutError:
+            self._shed(scope, "wait_budget")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot passes straight to the next in line
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, scope: str = "inference"):
+        queued_at = time.perf_counter()
+        await self._acquire(scope)
+        started = time.perf_counter()
+        self.waits.append(started - queued_at)
+        self.admitted[scope] += 1
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - started
+            self.service_seconds = held if self.service_seconds is None else 0.8 * self.service_seconds + 0.2 * held
+            self._release()
+
+    def status(self) -> dict:
+        waits = np.array(self.waits) * 1000 if self.waits else None
+        return {
+            "concurrency_limit": self.limit,
+            "queue_budget_ms": self.budget * 1000,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "avg_service_ms": round(self.service_seconds * 1000, 2) if self.service_seconds is not None else None,
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+            "queue_wait_ms": {
+                "samples": len(waits),
+                "p50": round(float(np.percentile(waits, 50)), 2),
+                "p95": round(float(np.percentile(waits, 95)), 2),
+                "p99": round(float(np.percentile(waits, 99)), 2),
+                "max": round(float(waits.max()), 2),
+            } if waits is not None else None,
+        }
+
+
+rate_limiter = RateLimiter()
+inference_gate = AdmissionGate()
+
+
+def admission_status() -> Dict[str, dict]:
+    return {"rate_limit": rate_limiter.status(), "inference": inference_gate.status()}
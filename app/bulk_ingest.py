@@ -0,0 +1,358 @@
+import asyncio
+import csv
+import json
+import os
+import time
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from app.dedupe import simhash64_many, to_signed64
+from app.media_store import media_store
+from app.similarity import report_text
+
+BULK_INGEST_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "5000"))
+# Rejected rows listed individually in the response; the rest are only counted
+MAX_REJECTED_REPORTED = 1000
+
+STAGING_COLUMNS = (
+    "line_no", "user_name", "user_mobile", "user_email", "urgency_level", "title",
+    "description", "location_lat", "location_long", "location_address", "department",
+    "auto_assigned", "prediction_confidence", "text_simhash", "created_at",
+    "images", "voice_note", "image_hash",
+)
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE report_staging (
+        line_no INTEGER NOT NULL,
+        user_name VARCHAR(255),
+        user_mobile VARCHAR(15),
+        user_email VARCHAR(255),
+        urgency_level VARCHAR(20),
+        title VARCHAR(255),
+        description TEXT,
+        location_lat DOUBLE PRECISION,
+        location_long DOUBLE PRECISION,
+        location_address TEXT,
+        department VARCHAR,
+        auto_assigned BOOLEAN,
+        prediction_confidence DOUBLE PRECISION,
+        text_simhash BIGINT,
+        created_at TIMESTAMP,
+        images TEXT,
+        voice_note VARCHAR(500),
+        image_hash VARCHAR(64)
+    ) ON COMMIT DROP
+"""
+
+# One set-based insert from staging; line order becomes id order. Ids are drawn
+# up front so a photo (image_hash) can be linked to its report in the same
+# statement - like create_report, only a prediction no report has claimed yet,
+# and the first report of the file when several reuse one photo. Each report
+# gets its report_created event (same payload as app.activity.report_payload)
+# in the same transaction, dated like the report.
+MERGE_SQL = """
+    WITH staged AS (
+        SELECT nextval(pg_get_serial_sequence('reports', 'id')) AS id, ordered.*
+        FROM (SELECT * FROM report_staging ORDER BY line_no) AS ordered
+    ),
+    inserted AS (
+        INSERT INTO reports (
+            id, user_name, user_mobile, user_email, urgency_level, title, description,
+            issue_type, category, status, status_id,
+            location_lat, location_long, location_address,
+            department, auto_assigned, prediction_confidence, text_simhash,
+            images, voice_note, confirmation_count, created_at, updated_at
+        )
+        SELECT
+            id, user_name, user_mobile, user_email, urgency_level, title, description,
+            'General', 'General', 'Reported', $1,
+            location_lat, location_long, location_address,
+            department, auto_assigned, prediction_confidence, text_simhash,
+            images, voice_note, 0, COALESCE(created_at, now()), COALESCE(created_at, now())
+        FROM staged
+    ),
+    linked_images AS (
+        UPDATE image_predictions
+        SET report_id = first_use.id
+        FROM (
+            SELECT DISTINCT ON (image_hash) image_hash, id
+            FROM staged
+            WHERE image_hash IS NOT NULL
+            ORDER BY image_hash, id
+        ) AS first_use
+        WHERE image_predictions.content_hash = first_use.image_hash
+          AND image_predictions.report_id IS NULL
+    ),
+    logged AS (
+        INSERT INTO activity_logs (activity_type, report_id, description, payload, created_at)
+        SELECT
+            'report_created', id, 'Complaint submitted',
+            json_build_object(
+                'title', title, 'issue_type', 'General', 'category', 'General',
+                'urgency', urgency_level, 'location', location_address, 'department', department
+            ),
+            COALESCE(created_at, now())
+        FROM staged
+    )
+    SELECT
+        id, location_lat, location_long, text_simhash, image_hash,
+        title, urgency_level, location_address, department, COALESCE(created_at, now()) AS created_at
+    FROM staged
+    ORDER BY id
+"""
+
+FORMATS = ("csv", "ndjson")
+
+
+class InsertedReport:
+    """One merged row as MERGE_SQL returns it - a ReportCreate-like object for report_payload / map_fields"""
+
+    __slots__ = (
+        "id", "location_lat", "location_long", "text_simhash", "image_hash",
+        "title", "urgency_level", "location_address", "department", "created_at",
+    )
+    status = "Reported"
+
+    def __init__(self, record):
+        for column in self.__slots__:
+            setattr(self, column, record[column])
+
+
+def detect_format(name: Optional[str], content_type: Optional[str] = None) -> str:
+    if content_type and "csv" in content_type:
+        return "csv"
+    if content_type and ("ndjson" in content_type or "jsonl" in content_type):
+        return "ndjson"
+    if name and name.lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into lines without holding more than one chunk in memory"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yields (line_no, record, parse_error) for every row. CSV needs a header row;
+    quoted fields may span lines.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of {FORMATS}")
+
+    line_no = 0
+    if fmt == "ndjson":
+        async for line in iter_lines(chunks):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                yield line_no, record, None
+            except ValueError as e:
+                yield line_no, None, f"Invalid JSON: {str(e)}"
+        return
+
+    header = None
+    buffered, start_line = [], 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not buffered:
+            start_line = line_no
+        buffered.append(line)
+        # An odd number of quotes means a quoted field continues on the next line
+        if sum(part.count('"') for part in buffered) % 2:
+            continue
+        raw = "\n".join(buffered)
+        buffered = []
+        if not raw.strip():
+            continue
+        try:
+            values = next(csv.reader([raw]))
+        except csv.Error as e:
+            yield start_line, None, f"Invalid CSV: {str(e)}"
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        if len(values) != len(header):
+            yield start_line, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty CSV cells are missing values, not empty strings
+        yield start_line, {k: v for k, v in zip(header, values) if v != ""}, None
+
+    if buffered:
+        yield start_line, None, "Unterminated quoted field at end of file"
+
+
+def _validation_errors(e: ValidationError) -> List[dict]:
+    return [
+        {"field": ".".join(str(part) for part in err["loc"]), "message": err["msg"]}
+        for err in e.errors()
+    ]
+
+
+def _missing_media_errors(row: BaseModel) -> List[dict]:
+    """Photos and voice notes must be uploaded before the report that references them"""
+    images = getattr(row, "images", None) or []
+    voice_note = getattr(row, "voice_note", None)
+    return [
+        {"field": "images" if key in images else "voice_note", "message": f"Media not uploaded: {key}"}
+        for key in media_store.missing(images + ([voice_note] if voice_note else []))
+    ]
+
+
+class IngestResult:
+    def __init__(self):
+        self.received = 0
+        self.accepted = 0
+        self.inserted = 0
+        self.predicted = 0
+        self.rejected_count = 0
+        self.rejected: List[dict] = []
+        self.inserted_rows: List[InsertedReport] = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, line_no: int, errors: List[dict]):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REJECTED_REPORTED:
+            self.rejected.append({"line": line_no, "errors": errors})
+
+    def summary(self, dry_run: bool = False) -> dict:
+        ids = [row.id for row in self.inserted_rows]
+        return {
+            "dry_run": dry_run,
+            "received": self.received,
+            "accepted": self.accepted,
+            "inserted": self.inserted,
+            "predicted": self.predicted,
+            "rejected_count": self.rejected_count,
+            "rejected": self.rejected,
+            "rejected_truncated": self.rejected_count > len(self.rejected),
+            "report_id_range": [min(ids), max(ids)] if ids else None,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.received / self.elapsed) if self.elapsed else None,
+        }
+
+
+async def _predict_batch(batch: List[list], predict_fn: Callable, result: IngestResult):
+    """Fill in department for rows that didn't bring one, one model call per batch"""
+    dept_i = STAGING_COLUMNS.index("department")
+    auto_i = STAGING_COLUMNS.index("auto_assigned")
+    conf_i = STAGING_COLUMNS.index("prediction_confidence")
+    desc_i = STAGING_COLUMNS.index("description")
+
+    todo = [row for row in batch if row[dept_i] in (None, "other") and not row[auto_i]]
+    if not todo:
+        return
+    predictions = await asyncio.to_thread(predict_fn, [row[desc_i] for row in todo])
+    for row, (department, confidence, _) in zip(todo, predictions):
+        row[dept_i] = department
+        row[auto_i] = True
+        row[conf_i] = confidence
+    result.predicted += len(todo)
+
+
+async def ingest_reports(
+    connection,
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    row_model: type,
+    predict_fn: Optional[Callable] = None,
+    dry_run: bool = False,
+    batch_size: int = BULK_INGEST_BATCH_SIZE,
+) -> IngestResult:
+    """
+    Stream rows from `chunks`, validate each with `row_model` (the ReportCreate
+    shape), COPY valid rows into a temporary staging table in batches and merge
+    them into reports with one INSERT ... SELECT.
+
+    `connection` is a raw asyncpg connection. Everything happens in one
+    transaction - a failure while merging loads nothing, while invalid rows are
+    only skipped and reported.
+    """
+    result = IngestResult()
+    batch: List[list] = []
+
+    async def flush():
+        simhash_i = STAGING_COLUMNS.index("text_simhash")
+        title_i, desc_i = STAGING_COLUMNS.index("title"), STAGING_COLUMNS.index("description")
+        simhashes = simhash64_many([report_text(row[title_i], row[desc_i]) for row in batch])
+        for row, simhash in zip(batch, simhashes):
+            row[simhash_i] = to_signed64(simhash)
+        if predict_fn is not None:
+            await _predict_batch(batch, predict_fn, result)
+        if not dry_run:
+            await connection.copy_records_to_table("report_staging", records=batch, columns=STAGING_COLUMNS)
+        batch.clear()
+
+    async with connection.transaction():
+        if not dry_run:
+            await connection.execute(CREATE_STAGING_SQL)
+            status_id = await connection.fetchval("SELECT id FROM statuses WHERE name = 'Reported'")
+            if status_id is None:
+                raise RuntimeError("Reported status not found in database")
+
+        async for line_no, record, error in iter_records(chunks, fmt):
+            result.received += 1
+            if error:
+                result.reject(line_no, [{"field": None, "message": error}])
+                continue
+            try:
+                row: BaseModel = row_model(**record)
+            except ValidationError as e:
+                result.reject(line_no, _validation_errors(e))
+                continue
+            except TypeError as e:
+                result.reject(line_no, [{"field": None, "message": str(e)}])
+                continue
+            media_errors = _missing_media_errors(row)
+            if media_errors:
+                result.reject(line_no, media_errors)
+                continue
+
+            result.accepted += 1
+            batch.append([
+                line_no, row.user_name, row.user_mobile, row.user_email, row.urgency_level,
+                row.title, row.description, row.location_lat, row.location_long,
+                row.location_address, row.department or "other", bool(row.auto_assigned),
+                row.prediction_confidence,
+                None,  # text_simhash, filled in per batch
+                getattr(row, "created_at", None),
+                json.dumps(row.images) if getattr(row, "images", None) else None,
+                getattr(row, "voice_note", None),
+                getattr(row, "image_hash", None),
+            ])
+            if len(batch) >= batch_size:
+                await flush()
+
+        if batch:
+            await flush()
+
+        if not dry_run and result.accepted:
+            result.inserted_rows = [InsertedReport(r) for r in await connection.fetch(MERGE_SQL, status_id)]
+            result.inserted = len(result.inserted_rows)
+
+    result.elapsed = time.perf_counter() - result.started
+    return result
+
+
+async def file_chunks(path: str, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,181 @@
+import fcntl
+import os
+import struct
+import time
+from contextlib import contextmanager
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event
+
+from app.database import engine, REPLICA_DATABASE_URLS, REPLICA_MAX_LAG_SECONDS
+
+# Optional file shared by the workers on one host (uvicorn --workers N). Without
+# it each process keeps its own counter, which is only right with a single worker.
+DATA_VERSION_FILE = os.getenv("DATA_VERSION_FILE", "")
+
+# A change is only exposed through validators once this old: replicas may not
+# have it yet, and Last-Modified has one-second resolution
+DATA_VERSION_SETTLE_SECONDS = max(1.0, REPLICA_MAX_LAG_SECONDS if REPLICA_DATABASE_URLS else 0.0)
+
+# Writes that don't change anything the conditional routes return (the
+# department stats refresh bumps itself, only when a count changed)
+_IGNORED_PREFIXES = (
+    "SELECT", "SHOW", "EXPLAIN", "SET", "SAVEPOINT", "RELEASE", "ROLLBACK",
+    "INSERT INTO ACTIVITY_LOGS", "INSERT INTO IMAGE_PREDICTIONS", "INSERT INTO DEPARTMENT_STATS",
+)
+_RECORD = struct.Struct("<qd")
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class DataVersion:
+    """
+    A monotonically increasing number bumped on every committed write.
+
+    The version is a millisecond timestamp that also counts up on bursts, so
+    it keeps increasing across restarts without being persisted. With
+    DATA_VERSION_FILE the number lives in a small file that every worker on the
+    host reads and bumps under a flock; multi-host deployments would need a
+    shared store and are not supported.
+    """
+
+    def __init__(self, path: str = DATA_VERSION_FILE):
+        self.path = path
+        self._version = _now_ms()
+        self._changed_at = time.time()
+        self.bumps = 0
+        if path:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            with self._locked():
+                if len(os.pread(self._fd, _RECORD.size, 0)) < _RECORD.size:
+                    os.pwrite(self._fd, _RECORD.pack(self._version, self._changed_at), 0)
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _read(self):
+        if not self.path:
+            return self._version, self._changed_at
+        return _RECORD.unpack(os.pread(self._fd, _RECORD.size, 0))
+
+    @property
+    def version(self) -> int:
+        return self._read()[0]
+
+    @property
+    def changed_at(self) -> float:
+        return self._read()[1]
+
+    def bump(self) -> int:
+        self.bumps += 1
+        if not self.path:
+            self._version = max(self._version + 1, _now_ms())
+            self._changed_at = time.time()
+            return self._version
+        with self._locked():
+            version, _ = self._read()
+            version = max(version + 1, _now_ms())
+            os.pwrite(self._fd, _RECORD.pack(version, time.time()), 0)
+        return version
+
+    def settled(self) -> Optional[tuple]:
+        """(version, changed_at) once the last change is old enough to validate against, else None"""
+        version, changed_at = self._read()
+        if time.time() - changed_at < DATA_VERSION_SETTLE_SECONDS:
+            return None
+        return version, changed_at
+
+    def status(self) -> dict:
+        version, changed_at = self._read()
+        return {
+            "version": version,
+            "changed_at": formatdate(changed_at, usegmt=True),
+            "shared_file": self.path or None,
+            "bumps_by_this_worker": self.bumps,
+        }
+
+
+data_version = DataVersion()
+
+
+# ---------- bumping ----------
+# Every commit that wrote through the primary engine bumps the version, so
+# mutating routes don't have to remember to. Raw asyncpg work (COPY in the bulk
+# ingest) bypasses these events and calls data_version.bump() itself.
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _mark_data_written(conn, cursor, statement, parameters, context, executemany):
+    if not conn.info.get("data_written"):
+        if not statement.lstrip()[:40].upper().startswith(_IGNORED_PREFIXES):
+            conn.info["data_written"] = True
+
+
+@event.listens_for(engine.sync_engine, "commit")
+def _bump_on_commit(conn):
+    if conn.info.pop("data_written", False):
+        data_version.bump()
+
+
+@event.listens_for(engine.sync_engine, "rollback")
+def _forget_on_rollback(conn):
+    conn.info.pop("data_written", None)
+
+
+# ---------- conditional GET ----------
+
+def _not_modified_since(request: Request, changed_at: float) -> bool:
+    value = request.headers.get("if-modified-since")
+    if not value:
+        return False
+    try:
+        since = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(changed_at) <= since
+
+
+def conditional_get(scope: str, per_day: bool = False):
+    """
+    Dependency for read routes whose response only changes with the data
+    version: sets a weak ETag and Last-Modified and answers a matching
+    If-None-Match (or If-Modified-Since) with 304 before the handler runs, so no
+    query is made. `per_day` adds the date to the ETag for responses that also
+    depend on "now" (week / month windows).
+
+    Returns the validator headers, for handlers that build their own Response
+    (FastAPI doesn't copy the injected response's headers onto those).
+    """
+    async def dependency(request: Request, response: Response):
+        current = data_version.settled()
+        response.headers["Cache-Control"] = "no-cache"
+        if current is None:
+            return {"Cache-Control": "no-cache"}
+        version, changed_at = current
+        tag = f"{version}-{scope}-{date.today().isoformat()}" if per_day else f"{version}-{scope}"
+        headers = {
+            "ETag": f'W/"{tag}"',
+            "Last-Modified": formatdate(changed_at, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        response.headers.update(headers)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+            if "*" in candidates or f'"{tag}"' in candidates:
+                raise HTTPException(status_code=304, headers=headers)
+        elif not per_day and _not_modified_since(request, changed_at):
+            raise HTTPException(status_code=304, headers=headers)
+        return headers
+
+    return dependency
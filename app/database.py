@@ -1,9 +1,17 @@
 
+import asyncio
+import contextlib
+import contextvars
+import itertools
 import os
+import time
 from dotenv import load_dotenv
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, List, Optional
+
+from app.lanes import db_permit
 
 load_dotenv()
 
@@ -14,7 +22,8 @@ DATABASE_URL = os.getenv(
 )
 
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Statement logging is sampled by app/query_metrics.py (SQL_ECHO_SAMPLE_RATE) instead of echo=True
+engine = create_async_engine(DATABASE_URL)
 
 
 AsyncSessionLocal = async_sessionmaker(
@@ -29,9 +38,174 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+async def check_schema_version() -> str:
+    """
+    Compare the database's alembic revision with the newest migration on disk.
+    One indexed single-row read, instead of reflecting every table on each boot.
+    """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads())
+    try:
+        async with engine.connect() as conn:
+            current = set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars().all())
+    except Exception:
+        current = set()
+
+    if current != heads:
+        raise SchemaVersionError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"code expects {', '.join(sorted(heads))} - run `alembic upgrade head`"
+        )
+    return ", ".join(sorted(heads))
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with AsyncSessionLocal() as session:
+    # Counts against the request's lane quota of primary connections (app/lanes.py)
+    async with db_permit(), AsyncSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+# ---------- read replicas ----------
+
+# Comma-separated replica URLs; empty means every read goes to the primary
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+# Replicas further behind the primary than this are skipped
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+
+# A replica that has replayed everything it received is current even if the
+# primary has been idle; otherwise lag is the age of the last replayed commit.
+# Returns 0 on a server that is not in recovery (e.g. a second standalone instance).
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_async_engine(url, pool_pre_ping=True)
+        self.session_factory = async_sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+            autocommit=False
+        )
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    async def check(self):
+        try:
+            async with self.engine.connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+            self.lag_seconds = float(lag or 0)
+            self.healthy = self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+            self.last_error = None
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+        self.checked_at = time.time()
+
+
+class ReplicaRouter:
+    """
+    Picks a session factory for read-only work: round-robin over replicas whose
+    last lag check passed, otherwise the primary. Lag is checked in the background
+    so choosing a replica never costs a round trip on the request path.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+
+    def pick(self):
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy:
+                return replica.session_factory
+        return AsyncSessionLocal
+
+    async def check_all(self):
+        if self.replicas:
+            await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def monitor_forever(self):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(REPLICA_CHECK_INTERVAL_SECONDS)
+
+    def status(self) -> List[Dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "last_error": replica.last_error,
+                "checked_at": replica.checked_at,
+            }
+            for replica in self.replicas
+        ]
+
+
+replica_router = ReplicaRouter(REPLICA_DATABASE_URLS)
+
+# Per-request routing state, set by the middleware in main.py. The dict is
+# mutated (not replaced) so a write seen deep inside a dependency is visible
+# to everything else running for the same request.
+_request_routing: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("db_routing", default=None)
+
+_READ_ONLY_PREFIXES = ("SELECT", "SHOW", "EXPLAIN")
+
+
+def start_request_routing():
+    return _request_routing.set({"wrote": False})
+
+
+def finish_request_routing(token):
+    _request_routing.reset(token)
+
+
+def request_wrote() -> bool:
+    state = _request_routing.get()
+    return bool(state and state["wrote"])
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _mark_primary_write(conn, cursor, statement, parameters, context, executemany):
+    state = _request_routing.get()
+    if state is not None and not state["wrote"]:
+        if not statement.lstrip()[:7].upper().startswith(_READ_ONLY_PREFIXES):
+            state["wrote"] = True
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only routes. Goes to a replica unless none is current
+    enough, or this request has already written to the primary.
+    """
+    session_factory = AsyncSessionLocal if request_wrote() else replica_router.pick()
+    permit = db_permit() if session_factory is AsyncSessionLocal else contextlib.nullcontext()
+    async with permit, session_factory() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
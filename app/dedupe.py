@@ -0,0 +1,196 @@
+import hashlib
+import math
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Report
+
+# Reports closer than this and with similar text are treated as the same issue
+DEDUPE_RADIUS_M = float(os.getenv("DEDUPE_RADIUS_M", "75"))
+# Max differing bits between two 64-bit SimHashes to count as near-duplicates
+DEDUPE_MAX_HAMMING = int(os.getenv("DEDUPE_MAX_HAMMING", "12"))
+
+CLOSED_STATUSES = ("Resolved", "Closed")
+
+METERS_PER_DEGREE = 111_320.0
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "at", "for", "from", "has", "have", "in", "is", "it",
+    "near", "of", "on", "our", "the", "there", "this", "to", "very", "was", "with",
+}
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+# blake2b of a word / bigram, memoised - report vocabulary repeats heavily,
+# so hashing dominated simhash64 before (bulk ingest hashes millions of features)
+_FEATURE_DIGESTS: Dict[str, bytes] = {}
+_MAX_FEATURE_DIGESTS = 500_000
+
+
+def _feature_digest(feature: str) -> bytes:
+    digest = _FEATURE_DIGESTS.get(feature)
+    if digest is None:
+        if len(_FEATURE_DIGESTS) >= _MAX_FEATURE_DIGESTS:
+            _FEATURE_DIGESTS.clear()
+        digest = _FEATURE_DIGESTS[feature] = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+    return digest
+
+
+def _features(text: str) -> List[str]:
+    tokens = _tokens(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def simhash64_many(texts: List[str]) -> List[int]:
+    """
+    64-bit SimHash over word unigrams and bigrams, for many texts at once.
+    Each feature votes +1 / -1 on every bit of its hash; all texts' bits are
+    unpacked and summed in a single numpy pass.
+    """
+    counts, digests = [], []
+    for text in texts:
+        features = _features(text)
+        counts.append(len(features))
+        digests.extend(map(_feature_digest, features))
+    if not digests:
+        return [0] * len(texts)
+
+    hashes = np.frombuffer(b"".join(digests), dtype=">u8").astype("<u8")
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+
+    counts = np.asarray(counts)
+    nonempty = counts > 0
+    starts = (np.cumsum(counts) - counts)[nonempty]
+    votes = np.add.reduceat(bits, starts, axis=0, dtype=np.int32) * 2 - counts[nonempty, None]
+
+    result = np.zeros(len(texts), dtype="<u8")
+    result[nonempty] = np.packbits(votes > 0, axis=1, bitorder="little").view("<u8").ravel()
+    return [int(value) for value in result]
+
+
+def simhash64(text: str) -> int:
+    """64-bit SimHash over word unigrams and bigrams"""
+    return simhash64_many([text])[0]
+
+
+def to_signed64(value: int) -> int:
+    """Postgres BIGINT is signed, SimHashes are unsigned"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Equirectangular approximation - accurate to well under a metre at dedupe distances"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return math.hypot(x, y) * 6_371_000
+
+
+class DuplicateIndex:
+    """
+    Spatial grid of open reports with their text SimHash.
+
+    Cells are DEDUPE_RADIUS_M tall, so a lookup only touches the 3 x N block of
+    cells around the new report (N grows with latitude as meridians converge),
+    which keeps it independent of how many reports are open city-wide.
+    """
+
+    def __init__(self, radius_m: float = DEDUPE_RADIUS_M, max_hamming: int = DEDUPE_MAX_HAMMING):
+        self.radius_m = radius_m
+        self.max_hamming = max_hamming
+        self._cell_deg = radius_m / METERS_PER_DEGREE
+        self._cells: Dict[Tuple[int, int], List[Tuple[int, int, float, float]]] = {}
+        self._report_cells: Dict[int, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._report_cells)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self._cell_deg), math.floor(lon / self._cell_deg)
+
+    def add(self, report_id: int, lat: float, lon: float, simhash: int):
+        cell = self._cell(lat, lon)
+        with self._lock:
+            self._remove_locked(report_id)
+            self._cells.setdefault(cell, []).append((report_id, simhash, lat, lon))
+            self._report_cells[report_id] = cell
+
+    def remove(self, report_id: int):
+        with self._lock:
+            self._remove_locked(report_id)
+
+    def _remove_locked(self, report_id: int):
+        cell = self._report_cells.pop(report_id, None)
+        if cell is None:
+            return
+        bucket = [entry for entry in self._cells[cell] if entry[0] != report_id]
+        if bucket:
+            self._cells[cell] = bucket
+        else:
+            del self._cells[cell]
+
+    def find_duplicate(self, lat: float, lon: float, simhash: int) -> Optional[Tuple[int, int, float]]:
+        """
+        Closest open report that is both nearby and textually similar,
+        as (report_id, hamming_distance, distance_m), or None.
+        """
+        row, col = self._cell(lat, lon)
+        lon_span = math.ceil(1 / max(math.cos(math.radians(lat)), 1e-6))
+
+        best = None
+        with self._lock:
+            for d_row in (-1, 0, 1):
+                for d_col in range(-lon_span, lon_span + 1):
+                    for report_id, other_hash, other_lat, other_lon in self._cells.get((row + d_row, col + d_col), ()):
+                        hamming = (simhash ^ other_hash).bit_count()
+                        if hamming > self.max_hamming:
+                            continue
+                        meters = distance_m(lat, lon, other_lat, other_lon)
+                        if meters > self.radius_m:
+                            continue
+                        candidate = (report_id, hamming, meters)
+                        if best is None or (hamming, meters) < (best[1], best[2]):
+                            best = candidate
+        return best
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Load every open, geolocated report"""
+        result = await session.execute(
+            select(
+                Report.id, Report.title, Report.description, Report.text_simhash,
+                Report.location_lat, Report.location_long
+            ).where(
+                or_(Report.status.is_(None), Report.status.notin_(CLOSED_STATUSES)),
+                Report.location_lat.isnot(None),
+                Report.location_long.isnot(None)
+            )
+        )
+
+        with self._lock:
+            self._cells = {}
+            self._report_cells = {}
+
+        for report_id, title, description, stored_hash, lat, lon in result.all():
+            if stored_hash is None:
+                simhash = simhash64(f"{title} {description}")
+            else:
+                simhash = to_unsigned64(stored_hash)
+            self.add(report_id, lat, lon, simhash)
+
+        return len(self)
+
+
+duplicate_index = DuplicateIndex()
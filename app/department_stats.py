@@ -0,0 +1,207 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.data_version import data_version
+from app.models import Department, DepartmentStats, Report
+
+# How often the rolling windows are recomputed
+DEPARTMENT_STATS_REFRESH_SECONDS = float(os.getenv("DEPARTMENT_STATS_REFRESH_SECONDS", "300"))
+
+# reports.department value -> departments.name (rows seeded by 0006_department_stats_windows)
+DEPARTMENTS = {
+    "water_dept": "Water Dept",
+    "road_dept": "Road Dept",
+    "sanitation_dept": "Sanitation Dept",
+    "electricity_dept": "Electricity Dept",
+    "other": "Other",
+}
+
+# Rolling windows ending now. Reports only leave the reports table REPORT_RETENTION_DAYS
+# (365 by default) after they were closed, so a year's window is all in reports.
+PERIODS = {
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+    "year": relativedelta(years=1),
+}
+
+# DepartmentStats column -> status counted (None counts every report)
+_COUNTS = {
+    "total_issues": None,
+    "resolved_issues": "Resolved",
+    "pending_issues": "Pending",
+    "in_progress_issues": "In Progress",
+}
+
+# One refresh at a time across workers; the others skip the tick
+_REFRESH_LOCK_ID = 0x64657074  # "dept"
+
+
+def efficiency_score(resolved: int, total: int) -> float:
+    return round((resolved / total * 100) if total > 0 else 0, 1)
+
+
+class DepartmentStatsScheduler:
+    """
+    Keeps one department_stats row per (department, period) up to date: every
+    DEPARTMENT_STATS_REFRESH_SECONDS a single grouped scan of the last year's
+    reports fills the week, month and year windows of every department, and the
+    department routes read those rows instead of counting reports per request.
+
+    Numbers are at most one interval old. The data version is only bumped when
+    a count actually changed, so a refresh that just slides the windows keeps
+    the routes' ETags valid.
+    """
+
+    def __init__(self, session_factory, interval: float = DEPARTMENT_STATS_REFRESH_SECONDS):
+        self._session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.skipped = 0
+        self.failed_refreshes = 0
+        self.last_refresh_ms: Optional[float] = None
+        self.last_refreshed_at: Optional[datetime] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    async def refresh(self) -> bool:
+        """Recompute every window; False when another worker holds the refresh"""
+        started = time.perf_counter()
+        try:
+            async with self._session_factory() as session:
+                locked = await session.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": _REFRESH_LOCK_ID})
+                if not locked.scalar():
+                    self.skipped += 1
+                    return False
+                changed = await self._refresh(session, datetime.utcnow())
+                await session.commit()
+        except Exception as e:
+            self.failed_refreshes += 1
+            print(f"⚠️ Could not refresh department stats: {str(e)}")
+            return False
+
+        if changed:
+            data_version.bump()
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.last_refreshed_at = datetime.utcnow()
+        return True
+
+    async def _refresh(self, session: AsyncSession, now: datetime) -> bool:
+        department_ids = dict((await session.execute(
+            select(Department.name, Department.id).where(Department.name.in_(DEPARTMENTS.values()))
+        )).all())
+        if len(department_ids) < len(DEPARTMENTS):
+            missing = [name for name in DEPARTMENTS.values() if name not in department_ids]
+            print(f"⚠️ No departments rows for {', '.join(missing)} - run `alembic upgrade head`")
+
+        starts = {period: now - window for period, window in PERIODS.items()}
+        aggregates = [
+            func.count(Report.id).filter(and_(
+                Report.created_at >= start,
+                *([Report.status == counted] if counted else []),
+            )).label(f"{period}_{column}")
+            for period, start in starts.items()
+            for column, counted in _COUNTS.items()
+        ]
+        result = await session.execute(
+            select(Report.department, *aggregates)
+            .where(Report.created_at >= min(starts.values()), Report.department.in_(DEPARTMENTS))
+            .group_by(Report.department)
+        )
+        counts = {row.department: row._mapping for row in result}
+
+        previous = {
+            (row.department_id, row.period): tuple(row[2:])
+            for row in await session.execute(
+                select(DepartmentStats.department_id, DepartmentStats.period, *(
+                    getattr(DepartmentStats, column) for column in _COUNTS
+                ))
+            )
+        }
+
+        rows = []
+        for dept_key, dept_name in DEPARTMENTS.items():
+            department_id = department_ids.get(dept_name)
+            if department_id is None:
+                continue
+            for period, start in starts.items():
+                values = {column: counts[dept_key][f"{period}_{column}"] if dept_key in counts else 0 for column in _COUNTS}
+                rows.append({
+                    "department_id": department_id,
+                    "period": period,
+                    **values,
+                    "efficiency_score": efficiency_score(values["resolved_issues"], values["total_issues"]),
+                    "period_start": start,
+                    "period_end": now,
+                    "calculated_at": now,
+                })
+        if not rows:
+            return False
+
+        stmt = insert(DepartmentStats).values(rows)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[DepartmentStats.department_id, DepartmentStats.period],
+            set_={
+                column: stmt.excluded[column]
+                for column in (*_COUNTS, "efficiency_score", "period_start", "period_end", "calculated_at")
+            },
+        ))
+        return any(
+            previous.get((row["department_id"], row["period"])) != tuple(row[column] for column in _COUNTS)
+            for row in rows
+        )
+
+    def status(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "refreshes": self.refreshes,
+            "skipped": self.skipped,
+            "failed_refreshes": self.failed_refreshes,
+            "last_refresh_ms": self.last_refresh_ms,
+            "last_refreshed_at": self.last_refreshed_at.isoformat() if self.last_refreshed_at else None,
+        }
+
+
+async def read_department_stats(db: AsyncSession, period: str) -> List[Tuple[str, str, DepartmentStats]]:
+    """(reports.department key, display name, stats row) of each department, in DEPARTMENTS order"""
+    result = await db.execute(
+        select(Department.name, DepartmentStats)
+        .join(DepartmentStats, DepartmentStats.department_id == Department.id)
+        .where(DepartmentStats.period == period, Department.name.in_(DEPARTMENTS.values()))
+    )
+    by_name: Dict[str, DepartmentStats] = dict(result.all())
+    return [(key, name, by_name[name]) for key, name in DEPARTMENTS.items() if name in by_name]
+
+
+def _session_factory():
+    from app.database import AsyncSessionLocal
+    return AsyncSessionLocal()
+
+
+department_stats = DepartmentStatsScheduler(_session_factory)
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dedupe import to_signed64, to_unsigned64
+from app.models import ImagePrediction
+
+# dHash bits that may differ for a re-encoded / resized copy of the same photo
+IMAGE_PHASH_MAX_HAMMING = int(os.getenv("IMAGE_PHASH_MAX_HAMMING", "4"))
+# Cosine similarity of embeddings above which two photos show the same scene
+IMAGE_DUPLICATE_SIMILARITY = float(os.getenv("IMAGE_DUPLICATE_SIMILARITY", "0.92"))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def perceptual_hash(data: bytes) -> int:
+    """64-bit difference hash - survives re-compression, resizing and small colour shifts"""
+    img = Image.open(io.BytesIO(data)).convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = np.asarray(img, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(sum(1 << i for i, bit in enumerate(bits) if bit))
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class CachedImagePrediction:
+    __slots__ = ("content_hash", "perceptual_hash", "department", "original_prediction",
+                 "confidence", "embedding", "model_version", "report_id")
+
+    def __init__(self, content_hash, perceptual_hash, department, original_prediction,
+                 confidence, embedding, model_version, report_id=None):
+        self.content_hash = content_hash
+        self.perceptual_hash = perceptual_hash
+        self.department = department
+        self.original_prediction = original_prediction
+        self.confidence = confidence
+        self.embedding = embedding
+        self.model_version = model_version
+        self.report_id = report_id
+
+
+class ImageEmbeddingCache:
+    """
+    In-memory view of the image_predictions table.
+
+    Exact re-uploads hit on the content hash, near-exact copies (re-encoded,
+    resized, screenshotted) on the perceptual hash; both skip the CNN.
+    Embeddings are kept L2-normalised in one matrix so "visually similar
+    reports" is a single matrix-vector product. The phash array and embedding
+    matrix grow by doubling and new rows are written in place, so storing a
+    prediction costs O(d), not a rebuild of all N rows.
+
+    Only the predictions of one image model version are held - the active one.
+    Another version's department, confidence and embedding mean nothing to the
+    current model, so a version switch reloads the cache (see ensure_version()).
+    """
+
+    def __init__(self):
+        self.model_version: Optional[str] = None
+        self._reload_lock = asyncio.Lock()
+        self._lock = threading.Lock()
+        self._reset_locked()
+
+    def _reset_locked(self):
+        self._entries: Dict[str, CachedImagePrediction] = {}
+        self._order: List[str] = []      # row -> content hash, append-only
+        self._rows: Dict[str, int] = {}  # content hash -> row
+        self._count = 0
+        self._phashes = np.empty(0, dtype=np.uint64)     # capacity rows, first _count used
+        self._embeddings: Optional[np.ndarray] = None    # (capacity, d) float32, L2-normalised
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, digest: str) -> Optional[CachedImagePrediction]:
+        return self._entries.get(digest)
+
+    def _grow_locked(self):
+        # Lookups may still hold views of the old arrays; they keep the old buffers
+        capacity = max(64, 2 * len(self._phashes))
+        phashes = np.empty(capacity, dtype=np.uint64)
+        phashes[:self._count] = self._phashes[:self._count]
+        self._phashes = phashes
+        if self._embeddings is not None:
+            embeddings = np.empty((capacity, self._embeddings.shape[1]), dtype=np.float32)
+            embeddings[:self._count] = self._embeddings[:self._count]
+            self._embeddings = embeddings
+
+    def _add_locked(self, entry: CachedImagePrediction):
+        vector = np.asarray(entry.embedding, dtype=np.float32).ravel()
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+        row = self._rows.get(entry.content_hash)
+        if row is None:
+            if self._count == len(self._phashes):
+                self._grow_locked()
+            row = self._count
+            self._rows[entry.content_hash] = row
+            self._order.append(entry.content_hash)
+            self._count += 1
+        if self._embeddings is None:
+            self._embeddings = np.empty((len(self._phashes), vector.size), dtype=np.float32)
+
+        self._entries[entry.content_hash] = entry
+        self._phashes[row] = entry.perceptual_hash
+        self._embeddings[row] = vector
+
+    def add(self, entry: CachedImagePrediction):
+        with self._lock:
+            # A prediction finished on the previous version while the cache switched
+            if entry.model_version == self.model_version:
+                self._add_locked(entry)
+
+    def link_report(self, digest: str, report_id: int):
+        # Same rule as the database (report_writer): the first report to use a photo keeps it
+        entry = self._entries.get(digest)
+        if entry and entry.report_id is None:
+            entry.report_id = report_id
+
+    def unlink_report(self, report_id: int):
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.report_id == report_id:
+                    entry.report_id = None
+
+    def _arrays(self):
+        """Views of the filled rows; `order` is append-only, so its first rows stay valid"""
+        with self._lock:
+            count = self._count
+            if not count:
+                return self._order, self._phashes[:0], None
+            return self._order, self._phashes[:count], self._embeddings[:count]
+
+    def find_near_exact(self, phash: int) -> Optional[CachedImagePrediction]:
+        order, phashes, _ = self._arrays()
+        if not len(phashes):
+            return None
+        distances = _popcount64(np.bitwise_xor(phashes, np.uint64(phash)))
+        best = int(np.argmin(distances))
+        if distances[best] > IMAGE_PHASH_MAX_HAMMING:
+            return None
+        return self._entries.get(order[best])
+
+    def similar_reports(self, embedding: np.ndarray, k: int = 5) -> List[Tuple[int, float]]:
+        """Reports whose photo looks like this one, as (report_id, cosine similarity)"""
+        order, _, embeddings = self._arrays()
+        if embeddings is None:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        scores = embeddings @ query
+
+        matches = {}
+        for i in np.argsort(-scores):
+            if scores[i] < IMAGE_DUPLICATE_SIMILARITY or len(matches) >= k:
+                break
+            entry = self._entries.get(order[i])
+            if entry is None or entry.report_id is None:
+                continue
+            matches.setdefault(entry.report_id, float(scores[i]))
+        return list(matches.items())
+
+    async def load(self, session: AsyncSession, model_version: str) -> int:
+        result = await session.execute(
+            select(ImagePrediction).where(ImagePrediction.model_version == model_version)
+        )
+        with self._lock:
+            self.model_version = model_version
+            self._reset_locked()
+            for row in result.scalars().all():
+                self._add_locked(CachedImagePrediction(
+                    content_hash=row.content_hash,
+                    perceptual_hash=to_unsigned64(row.perceptual_hash),
+                    department=row.department,
+                    original_prediction=row.original_prediction,
+                    confidence=row.confidence,
+                    embedding=np.frombuffer(row.embedding, dtype=np.float16).astype(np.float32),
+                    model_version=row.model_version,
+                    report_id=row.report_id,
+                ))
+        return len(self)
+
+    async def ensure_version(self, session: AsyncSession, model_version: str):
+        """Reload for `model_version` if the active image model changed since the last load"""
+        if self.model_version == model_version:
+            return
+        async with self._reload_lock:
+            if self.model_version != model_version:
+                cached = await self.load(session, model_version)
+                print(f"✅ Image prediction cache switched to model {model_version} ({cached} images)")
+
+    async def store(self, session: AsyncSession, entry: CachedImagePrediction):
+        """Persist a fresh prediction and make it visible to lookups"""
+        stmt = insert(ImagePrediction).values(
+            content_hash=entry.content_hash,
+            perceptual_hash=to_signed64(entry.perceptual_hash),
+            department=entry.department,
+            original_prediction=entry.original_prediction,
+            confidence=entry.confidence,
+            embedding=np.asarray(entry.embedding, dtype=np.float16).tobytes(),
+            model_version=entry.model_version,
+            report_id=entry.report_id,
+        ).on_conflict_do_nothing(index_elements=[ImagePrediction.content_hash, ImagePrediction.model_version])
+        await session.execute(stmt)
+        await session.commit()
+        self.add(entry)
+
+
+image_cache = ImageEmbeddingCache()
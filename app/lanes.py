@@ -0,0 +1,160 @@
+import contextvars
+import os
+import re
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.admission import AdmissionGate
+
+# Set to false to run every request unclassified (e.g. for benchmark_lanes.py baselines)
+LANES_ENABLED = os.getenv("LANES_ENABLED", "true").lower() == "true"
+
+# Requests in flight per lane and primary-database sessions per lane. The
+# submission lane has no caps of its own: whatever the other lanes can't take
+# (with the default pool of 5 + 10 overflow connections, at least 4) is left for it.
+LANE_ANALYTICS_CONCURRENCY = int(os.getenv("LANE_ANALYTICS_CONCURRENCY", "4"))
+LANE_ANALYTICS_DB_QUOTA = int(os.getenv("LANE_ANALYTICS_DB_QUOTA", "3"))
+LANE_ANALYTICS_QUEUE_BUDGET_MS = float(os.getenv("LANE_ANALYTICS_QUEUE_BUDGET_MS", "10000"))
+LANE_DEFAULT_CONCURRENCY = int(os.getenv("LANE_DEFAULT_CONCURRENCY", "64"))
+LANE_DEFAULT_DB_QUOTA = int(os.getenv("LANE_DEFAULT_DB_QUOTA", "8"))
+LANE_DEFAULT_QUEUE_BUDGET_MS = float(os.getenv("LANE_DEFAULT_QUEUE_BUDGET_MS", "2000"))
+LANE_MAX_QUEUE = int(os.getenv("LANE_MAX_QUEUE", "256"))
+
+SUBMISSION, DEFAULT, ANALYTICS = "submission", "default", "analytics"
+
+# (method, path pattern, lane), first match wins; everything else is DEFAULT
+LANE_RULES: List[Tuple[str, "re.Pattern", str]] = [
+    (method, re.compile(pattern), lane) for method, pattern, lane in (
+        # Citizens filing reports, and signing in to do so
+        ("POST", r"^/api/reports/?$", SUBMISSION),
+        ("POST", r"^/api/media/(images|voice-notes)$", SUBMISSION),
+        ("POST", r"^/api/login$", SUBMISSION),
+        ("POST", r"^/api/users/register$", SUBMISSION),
+        # Admin analytics, map dumps and bulk jobs
+        ("GET", r"^/api/admin/dashboard/", ANALYTICS),
+        ("GET", r"^/api/admin/map/(issues|issues-in-bounds|stats)$", ANALYTICS),
+        ("GET", r"^/api/admin/(issues|departments)$", ANALYTICS),
+        ("GET", r"^/api/departments/", ANALYTICS),
+        ("GET", r"^/api/ai/(auto-assigned-issues|assignment-status)$", ANALYTICS),
+        ("GET", r"^/dashboard/", ANALYTICS),
+        ("GET", r"^/reports/category-summary$", ANALYTICS),
+        ("POST", r"^/api/admin/reports/bulk$", ANALYTICS),
+        ("POST", r"^/api/admin/similarity/rebuild$", ANALYTICS),
+    )
+]
+
+_LATENCY_SAMPLES = 4096
+
+_current_lane: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("lane", default=None)
+
+
+def classify(method: str, path: str) -> str:
+    for rule_method, pattern, lane in LANE_RULES:
+        if method == rule_method and pattern.match(path):
+            return lane
+    return DEFAULT
+
+
+class Lane:
+    def __init__(self, name: str, concurrency: Optional[int] = None, db_quota: Optional[int] = None,
+                 budget_ms: float = 0, max_queue: int = LANE_MAX_QUEUE):
+        self.name = name
+        service = f"The {name} lane"
+        self.requests = AdmissionGate(concurrency, budget_ms, max_queue, service) if concurrency else None
+        self.db = AdmissionGate(db_quota, budget_ms, max_queue, service) if db_quota else None
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self.served = 0
+        self.statuses: Counter = Counter()
+
+    def record(self, seconds: float, status_code: int):
+        self.served += 1
+        self.latencies.append(seconds * 1000)
+        self.statuses[status_code // 100 * 100] += 1
+
+    def status(self) -> dict:
+        latencies = np.array(self.latencies) if self.latencies else None
+        return {
+            "served": self.served,
+            "responses": {f"{code // 100}xx": count for code, count in sorted(self.statuses.items())},
+            "latency_ms": {
+                "samples": len(latencies),
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "p99": round(float(np.percentile(latencies, 99)), 2),
+            } if latencies is not None else None,
+            "concurrency": self.requests.status() if self.requests else "unlimited",
+            "db_sessions": self.db.status() if self.db else "unlimited",
+        }
+
+
+class LaneRouter:
+    """
+    Classifies each request into a lane and runs it within the lane's share of
+    the worker: a cap on requests in flight and a cap on primary-database
+    sessions, each with a queue that sheds with 503 once the lane's latency
+    budget is spent. Analytics can only ever hold its quota, so report
+    submission and login always find a free slot and connection.
+
+    Lanes share the event loop; CPU-heavy work still has to leave it (threadpool,
+    process pool) to not delay the other lanes.
+    """
+
+    def __init__(self):
+        self.lanes: Dict[str, Lane] = {
+            SUBMISSION: Lane(SUBMISSION),
+            DEFAULT: Lane(DEFAULT, LANE_DEFAULT_CONCURRENCY, LANE_DEFAULT_DB_QUOTA, LANE_DEFAULT_QUEUE_BUDGET_MS),
+            ANALYTICS: Lane(ANALYTICS, LANE_ANALYTICS_CONCURRENCY, LANE_ANALYTICS_DB_QUOTA, LANE_ANALYTICS_QUEUE_BUDGET_MS),
+        }
+
+    def lane_for(self, method: str, path: str) -> Lane:
+        return self.lanes[classify(method, path)]
+
+    @asynccontextmanager
+    async def admit(self, lane: Lane):
+        """Held while the request runs; raises LoadShed when the lane is saturated"""
+        token = _current_lane.set({"lane": lane, "db_sessions": 0})
+        try:
+            if lane.requests is None:
+                yield lane
+            else:
+                async with lane.requests.slot(lane.name):
+                    yield lane
+        finally:
+            _current_lane.reset(token)
+
+    def status(self) -> dict:
+        return {"enabled": LANES_ENABLED, "lanes": {name: lane.status() for name, lane in self.lanes.items()}}
+
+
+lane_router = LaneRouter()
+
+
+@asynccontextmanager
+async def db_permit():
+    """
+    Held by database sessions on the primary. A request counts against its
+    lane's quota once however many sessions it opens, so a request can't
+    deadlock waiting for a second permit of its own.
+    """
+    state = _current_lane.get()
+    if state is None or state["lane"].db is None:
+        yield
+        return
+    if state["db_sessions"]:
+        state["db_sessions"] += 1
+        try:
+            yield
+        finally:
+            state["db_sessions"] -= 1
+        return
+
+    async with state["lane"].db.slot(state["lane"].name):
+        state["db_sessions"] += 1
+        try:
+            yield
+        finally:
+            state["db_sessions"] -= 1
+
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+# Changes published within this window go out as one message
+LIVE_FEED_COALESCE_MS = float(os.getenv("LIVE_FEED_COALESCE_MS", "250"))
+# Messages a subscriber may fall behind by before it is told to resync
+LIVE_FEED_QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "16"))
+# Idle connections get a keep-alive this often so proxies don't close them
+LIVE_FEED_HEARTBEAT_SECONDS = float(os.getenv("LIVE_FEED_HEARTBEAT_SECONDS", "15"))
+LIVE_FEED_MAX_SUBSCRIBERS = int(os.getenv("LIVE_FEED_MAX_SUBSCRIBERS", "10000"))
+
+# dashboard: report deltas for the map / issue lists and dashboard counters
+# activity: entries for the public "today" feed, same shape as /api/activity/today
+CHANNELS = ("dashboard", "activity")
+
+# Dashboard counters that follow a report's (legacy string) status
+STATUS_COUNTERS = {"Resolved": "resolved_issues", "Pending": "pending_issues"}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# What a map marker / issue row needs (the MapIssueResponse fields minus the long ones)
+MAP_FIELDS = (
+    "id", "title", "status", "urgency_level",
+    "location_lat", "location_long", "location_address", "created_at",
+)
+
+
+def map_fields(report, **values) -> dict:
+    """MAP_FIELDS of `report`; `values` fill in what it doesn't carry yet (a new report's id)"""
+    return {field: values[field] if field in values else getattr(report, field) for field in MAP_FIELDS}
+
+
+class Message:
+    """One channel's delta, encoded once and shared by every subscriber"""
+
+    __slots__ = ("channel", "json", "sse")
+
+    def __init__(self, channel: str, body: dict):
+        self.channel = channel
+        self.json = json.dumps({"channel": channel, **body}, default=_json_default, separators=(",", ":"))
+        self.sse = f"event: {channel}\ndata: {self.json}\n\n"
+
+
+RESYNC = Message("control", {"type": "resync"})
+PING = Message("control", {"type": "ping"})
+
+
+class Subscriber:
+    __slots__ = ("channels", "queue", "resyncs")
+
+    def __init__(self, channels: Set[str], queue_size: int):
+        self.channels = channels
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.resyncs = 0
+
+    def offer(self, message: Message):
+        """
+        Never blocks the publisher. A subscriber that can't keep up loses its
+        unread deltas and gets a resync instead - it refetches the full state
+        rather than the hub buffering without bound.
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.resyncs += 1
+
+
+class LiveFeedHub:
+    """
+    In-process pub/sub for the dashboard, the map and the activity feed.
+
+    Write routes publish after their commit. Changes are coalesced for
+    LIVE_FEED_COALESCE_MS - several updates to one report become its latest
+    state, counter changes are summed - and each channel's delta is encoded
+    once and handed to every subscriber's bounded queue. An idle subscriber
+    costs one queue and one waiting coroutine.
+
+    Subscribers only see writes made by this process; clients refetch on
+    connect and on "resync".
+    """
+
+    def __init__(self, coalesce_ms: float = LIVE_FEED_COALESCE_MS, queue_size: int = LIVE_FEED_QUEUE_SIZE):
+        self.interval = coalesce_ms / 1000
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._reports: Dict[int, dict] = {}
+        self._counters: Counter = Counter()
+        self._activities: List[dict] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.seq = 0
+        self.messages_sent = 0
+        self.resyncs = 0
+
+    # ---------- publishing ----------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def _changed(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def publish_report(self, change: str, fields: dict):
+        if not self.running:
+            return
+        pending = self._reports.get(fields["id"])
+        if pending is None:
+            self._reports[fields["id"]] = {"change": change, **fields}
+        else:
+            # A report created and updated in the same window is still "created"
+            pending.update(fields)
+            if pending["change"] != "created" or change == "deleted":
+                pending["change"] = change
+        self._changed()
+
+    def publish_counters(self, **deltas: int):
+        if not self.running:
+            return
+        self._counters.update(deltas)
+        self._changed()
+
+    def publish_activity(self, entry: dict):
+        if not self.running:
+            return
+        self._activities.append(entry)
+        self._changed()
+
+    def report_created(self, fields: dict, activity_entry: Optional[dict] = None):
+        """`fields` as built by map_fields()"""
+        self.publish_report("created", fields)
+        counters = {"total_issues": 1}
+        if fields.get("status") in STATUS_COUNTERS:
+            counters[STATUS_COUNTERS[fields["status"]]] = 1
+        self.publish_counters(**counters)
+        if activity_entry is not None:
+            self.publish_activity(activity_entry)
+
+    def status_changed(self, report_id: int, old_status: Optional[str], new_status: str,
+                       activity_entry: Optional[dict] = None):
+        self.publish_report("status_changed", {"id": report_id, "status": new_status})
+        counters = Counter()
+        if old_status in STATUS_COUNTERS:
+            counters[STATUS_COUNTERS[old_status]] -= 1
+        if new_status in STATUS_COUNTERS:
+            counters[STATUS_COUNTERS[new_status]] += 1
+        if any(counters.values()):
+            self.publish_counters(**counters)
+        if activity_entry is not None:
+            self.publish_activity(activity_entry)
+
+    def report_deleted(self, report_id: int, status: Optional[str]):
+        self.publish_report("deleted", {"id": report_id})
+        counters = {"total_issues": -1}
+        if status in STATUS_COUNTERS:
+            counters[STATUS_COUNTERS[status]] = -1
+        self.publish_counters(**counters)
+
+    # ---------- fan-out ----------
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Let the rest of the window's changes arrive
+            await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            self._broadcast()
+
+    def _take_messages(self) -> List[Message]:
+        reports, counters, activities = self._reports, self._counters, self._activities
+        self._reports, self._counters, self._activities = {}, Counter(), []
+
+        self.seq += 1
+        sent_at = datetime.utcnow()
+        messages = []
+        counters = {name: delta for name, delta in counters.items() if delta}
+        if reports or counters:
+            messages.append(Message("dashboard", {
+                "seq": self.seq,
+                "sent_at": sent_at,
+                "reports": list(reports.values()),
+                "counters": counters,
+            }))
+        if activities:
+            activities.sort(key=lambda entry: entry["timestamp"], reverse=True)
+            messages.append(Message("activity", {"seq": self.seq, "sent_at": sent_at, "activities": activities}))
+        return messages
+
+    def _broadcast(self):
+        messages = self._take_messages()
+        if not self._subscribers:
+            return
+        for message in messages:
+            for subscriber in self._subscribers:
+                if message.channel in subscriber.channels:
+                    resyncs = subscriber.resyncs
+                    subscriber.offer(message)
+                    self.resyncs += subscriber.resyncs - resyncs
+                    self.messages_sent += 1
+
+    # ---------- subscribing ----------
+
+    def subscribe(self, channels: Set[str]) -> Optional[Subscriber]:
+        """None when the worker already serves LIVE_FEED_MAX_SUBSCRIBERS connections"""
+        if len(self._subscribers) >= LIVE_FEED_MAX_SUBSCRIBERS:
+            return None
+        subscriber = Subscriber(channels, self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def messages(self, subscriber: Subscriber) -> AsyncIterator[Message]:
+        """A subscriber's messages, with a PING whenever it has been idle for a heartbeat"""
+        while True:
+            try:
+                yield await asyncio.wait_for(subscriber.queue.get(), LIVE_FEED_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield PING
+
+    def status(self) -> dict:
+        by_channel = Counter(channel for subscriber in self._subscribers for channel in subscriber.channels)
+        return {
+            "running": self.running,
+            "subscribers": len(self._subscribers),
+            "subscribers_by_channel": dict(by_channel),
+            "coalesce_ms": self.interval * 1000,
+            "seq": self.seq,
+            "messages_sent": self.messages_sent,
+            "resyncs": self.resyncs,
+            "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+        }
+
+
+def parse_channels(value: Optional[str]) -> Set[str]:
+    if not value:
+        return set(CHANNELS)
+    channels = {channel.strip() for channel in value.split(",") if channel.strip()}
+    unknown = channels - set(CHANNELS)
+    if unknown:
+        raise ValueError(f"Unknown channel(s): {', '.join(sorted(unknown))}; expected {', '.join(CHANNELS)}")
+    return channels
+
+
+live_feed = LiveFeedHub()
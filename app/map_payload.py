@@ -0,0 +1,108 @@
+import json
+import struct
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Coordinates are sent as integers of 1e-5 degrees (~1.1 m), enough to place a pin
+MAP_COORD_SCALE = 100_000
+
+MAP_FORMATS = ("full", "compact", "binary")
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+# magic, version, marker count, coordinate scale, byte length of the string tables
+_BINARY_HEADER = struct.Struct("<4sHxxIII")
+_BINARY_MAGIC = b"UIMP"
+_BINARY_VERSION = 1
+
+
+class MapColumns:
+    """
+    Map markers as parallel columns: ids, quantized coordinates and small integer
+    status / urgency codes. The code tables travel with the payload, so adding a
+    status needs no client change. Everything else about a pin is fetched when
+    it is tapped.
+    """
+
+    __slots__ = ("ids", "lat", "lon", "status", "urgency", "statuses", "urgencies")
+
+    def __init__(self, rows: Sequence[tuple]):
+        """rows of (id, lat, long, status, urgency_level)"""
+        ids, lats, lons, statuses, urgencies = zip(*rows) if rows else ((), (), (), (), ())
+        status_codes: Dict[str, int] = {}
+        urgency_codes: Dict[str, int] = {}
+        self.ids = np.array(ids, dtype="<u4")
+        self.lat = np.rint(np.array(lats, dtype=np.float64) * MAP_COORD_SCALE).astype("<i4")
+        self.lon = np.rint(np.array(lons, dtype=np.float64) * MAP_COORD_SCALE).astype("<i4")
+        # Same fallbacks as the full response
+        self.status = np.array(
+            [status_codes.setdefault(value or "Pending", len(status_codes)) for value in statuses], dtype=np.int32
+        )
+        self.urgency = np.array(
+            [urgency_codes.setdefault(value or "Medium", len(urgency_codes)) for value in urgencies], dtype=np.int32
+        )
+        if len(status_codes) > 255 or len(urgency_codes) > 255:
+            raise ValueError("More than 255 distinct status or urgency values")
+        self.status = self.status.astype("u1")
+        self.urgency = self.urgency.astype("u1")
+        self.statuses: List[str] = list(status_codes)
+        self.urgencies: List[str] = list(urgency_codes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_json(self) -> bytes:
+        """
+        {"count", "coord_scale", "statuses", "urgencies", "ids", "lat", "lon",
+        "status", "urgency"} - marker i is ids[i] at (lat[i], lon[i]) / coord_scale,
+        with status statuses[status[i]] and urgency urgencies[urgency[i]].
+        """
+        return json.dumps({
+            "count": len(self),
+            "coord_scale": MAP_COORD_SCALE,
+            "statuses": self.statuses,
+            "urgencies": self.urgencies,
+            "ids": self.ids.tolist(),
+            "lat": self.lat.tolist(),
+            "lon": self.lon.tolist(),
+            "status": self.status.tolist(),
+            "urgency": self.urgency.tolist(),
+        }, separators=(",", ":")).encode()
+
+    def to_binary(self) -> bytes:
+        """
+        Little-endian, laid out so every array can be viewed in place
+        (new Uint32Array(buffer, offset, count) etc.):
+
+            header   "UIMP", uint16 version, 2 pad, uint32 count,
+                     uint32 coord_scale, uint32 table_bytes
+            tables   UTF-8 JSON [statuses, urgencies], space-padded to 4 bytes
+            uint32   ids[count]
+            int32    lat[count]
+            int32    lon[count]
+            uint8    status[count]
+            uint8    urgency[count]
+        """
+        tables = json.dumps([self.statuses, self.urgencies], separators=(",", ":")).encode()
+        tables += b" " * (-len(tables) % 4)
+        header = _BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, len(self), MAP_COORD_SCALE, len(tables))
+        return b"".join((
+            header, tables,
+            self.ids.tobytes(), self.lat.tobytes(), self.lon.tobytes(),
+            self.status.tobytes(), self.urgency.tobytes(),
+        ))
+
+
+def decode_binary(payload: bytes) -> dict:
+    """Reads a to_binary() payload back (for tests, benchmarks and Python clients)"""
+    magic, version, count, scale, table_bytes = _BINARY_HEADER.unpack_from(payload)
+    if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+        raise ValueError("Not a version 1 map payload")
+    offset = _BINARY_HEADER.size
+    statuses, urgencies = json.loads(payload[offset:offset + table_bytes])
+    offset += table_bytes
+    columns = {}
+    for name, dtype in (("ids", "<u4"), ("lat", "<i4"), ("lon", "<i4"), ("status", "u1"), ("urgency", "u1")):
+        columns[name] = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += columns[name].nbytes
+    return {"count": count, "coord_scale": scale, "statuses": statuses, "urgencies": urgencies, **columns}
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media"))
+MEDIA_MAX_IMAGE_BYTES = int(os.getenv("MEDIA_MAX_IMAGE_BYTES", str(15 * 1024 * 1024)))
+MEDIA_MAX_VOICE_NOTE_BYTES = int(os.getenv("MEDIA_MAX_VOICE_NOTE_BYTES", str(10 * 1024 * 1024)))
+MEDIA_THUMBNAIL_SIZE = int(os.getenv("MEDIA_THUMBNAIL_SIZE", "320"))
+MEDIA_THUMBNAIL_WORKERS = int(os.getenv("MEDIA_THUMBNAIL_WORKERS", "2"))
+
+IMAGE_TYPES = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+VOICE_NOTE_TYPES = {
+    "audio/mpeg": ".mp3", "audio/mp4": ".m4a", "audio/aac": ".aac", "audio/ogg": ".ogg",
+    "audio/wav": ".wav", "audio/webm": ".webm",
+}
+EXTENSION_TYPES = {ext: content_type for content_type, ext in {**IMAGE_TYPES, **VOICE_NOTE_TYPES}.items()}
+
+# <sha256 of the bytes><extension> - the reference stored on reports
+MEDIA_KEY_RE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{2,5}$")
+
+
+class MediaError(ValueError):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def is_media_key(key: str) -> bool:
+    return bool(MEDIA_KEY_RE.match(key))
+
+
+def media_path(key: str) -> str:
+    # Two levels of fan-out keep directories small
+    return os.path.join(MEDIA_ROOT, key[:2], key[2:4], key)
+
+
+def thumbnail_key(key: str) -> str:
+    return key.split(".", 1)[0] + ".jpg"
+
+
+def thumbnail_path(key: str) -> str:
+    thumb = thumbnail_key(key)
+    return os.path.join(MEDIA_ROOT, "thumbs", thumb[:2], thumb[2:4], thumb)
+
+
+def exists(key: str) -> bool:
+    return is_media_key(key) and os.path.exists(media_path(key))
+
+
+def make_thumbnail(source: str, destination: str, size: int) -> Tuple[int, int]:
+    """
+    Runs in the thumbnail process pool. Also proves the upload is a readable
+    image; returns its (width, height).
+    """
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        dimensions = img.size
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        partial = f"{destination}.{os.getpid()}.tmp"
+        img.save(partial, "JPEG", quality=80, optimize=True)
+        os.replace(partial, destination)
+    return dimensions
+
+
+class StoredMedia:
+    __slots__ = ("key", "content_type", "size", "deduplicated", "thumbnail", "width", "height")
+
+    def __init__(self, key: str, content_type: str, size: int, deduplicated: bool):
+        self.key = key
+        self.content_type = content_type
+        self.size = size
+        self.deduplicated = deduplicated
+        self.thumbnail: Optional[str] = None
+        self.width: Optional[int] = None
+        self.height: Optional[int] = None
+
+
+class MediaStore:
+    """
+    Content-addressed files under MEDIA_ROOT. Uploads are streamed chunk by
+    chunk into a temporary file while being hashed, then renamed to their
+    hash, so a photo uploaded twice is stored once and nothing is ever held in
+    memory whole. Thumbnails are made in a process pool, off the event loop and
+    outside the GIL.
+
+    Reports keep only the keys (Report.images as a JSON list, Report.voice_note).
+    """
+
+    def __init__(self, thumbnail_workers: int = MEDIA_THUMBNAIL_WORKERS):
+        self.thumbnail_workers = thumbnail_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+
+    def _thumbnail_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: workers must not inherit the server's TensorFlow state
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.thumbnail_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def save_stream(self, chunks: AsyncIterator[bytes], content_type: str, max_bytes: int,
+                          extension: str) -> StoredMedia:
+        incoming = os.path.join(MEDIA_ROOT, "incoming")
+        os.makedirs(incoming, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=incoming)
+        digest, size = hashlib.sha256(), 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise MediaError(f"File is larger than {max_bytes // (1024 * 1024)} MB", 413)
+                    digest.update(chunk)
+                    await run_in_threadpool(f.write, chunk)
+            if size == 0:
+                raise MediaError("Empty upload")
+
+            key = digest.hexdigest() + extension
+            destination = media_path(key)
+            deduplicated = os.path.exists(destination)
+            if not deduplicated:
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                os.replace(partial, destination)
+                self.stored += 1
+                self.bytes_written += size
+            else:
+                self.deduplicated += 1
+            return StoredMedia(key, content_type, size, deduplicated)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def _discard(self, media: StoredMedia):
+        """Undo save_stream() for an upload that turned out to be unusable"""
+        if not media.deduplicated:
+            os.remove(media_path(media.key))
+            self.stored -= 1
+            self.bytes_written -= media.size
+
+    async def save_image(self, chunks: AsyncIterator[bytes], content_type: str) -> StoredMedia:
+        if content_type not in IMAGE_TYPES:
+            raise MediaError(f"Unsupported image type {content_type}; expected {', '.join(IMAGE_TYPES)}", 415)
+        media = await self.save_stream(chunks, content_type, MEDIA_MAX_IMAGE_BYTES, IMAGE_TYPES[content_type])
+
+        thumb = thumbnail_path(media.key)
+        if not media.deduplicated or not os.path.exists(thumb):
+            try:
+                loop = asyncio.get_running_loop()
+                media.width, media.height = await loop.run_in_executor(
+                    self._thumbnail_pool(), make_thumbnail, media_path(media.key), thumb, MEDIA_THUMBNAIL_SIZE
+                )
+            except BrokenProcessPool:
+                # A worker died; the next upload gets a fresh pool
+                self._pool = None
+                self._discard(media)
+                raise
+            except Exception as e:
+                self._discard(media)
+                raise MediaError(f"Not a readable image: {str(e)}")
+        media.thumbnail = thumbnail_key(media.key)
+        return media
+
+    async def save_voice_note(self, chunks: AsyncIterator[bytes], content_type: str) -> StoredMedia:
+        if content_type not in VOICE_NOTE_TYPES:
+            raise MediaError(f"Unsupported audio type {content_type}; expected {', '.join(VOICE_NOTE_TYPES)}", 415)
+        return await self.save_stream(chunks, content_type, MEDIA_MAX_VOICE_NOTE_BYTES, VOICE_NOTE_TYPES[content_type])
+
+    def missing(self, keys: List[str]) -> List[str]:
+        """Keys that were never uploaded (or aren't media keys at all)"""
+        return [key for key in keys if not exists(key)]
+
+    def status(self) -> dict:
+        return {
+            "root": MEDIA_ROOT,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "bytes_written": self.bytes_written,
+            "thumbnail_workers": self.thumbnail_workers,
+        }
+
+
+media_store = MediaStore()
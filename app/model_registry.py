@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "model_registry")
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "10"))
+BASELINE_VERSION = "baseline"
+
+# Registry layout:
+#   model_registry/<kind>/<version>/manifest.json   {"files": {name: sha256}, ...}
+#   model_registry/<kind>/<version>/<artifact files>
+#   model_registry/<kind>/ACTIVE                    version every worker should serve
+#   model_registry/<kind>/SHADOW                    {"version": ..., "sample_rate": ...}
+
+
+class ModelRegistryError(Exception):
+    pass
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class VersionMetrics:
+    """Latency and shadow agreement for one model version"""
+
+    def __init__(self):
+        self.calls = 0
+        self.latencies_ms = deque(maxlen=2000)
+        self.shadow_calls = 0
+        self.shadow_items = 0
+        self.shadow_agreed = 0
+        self.shadow_errors = 0
+
+    def summary(self) -> dict:
+        latencies = np.asarray(self.latencies_ms) if self.latencies_ms else None
+        return {
+            "calls": self.calls,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "p99": round(float(np.percentile(latencies, 99)), 2),
+            } if latencies is not None else None,
+            "shadow_calls": self.shadow_calls,
+            "shadow_errors": self.shadow_errors,
+            "agreement": round(self.shadow_agreed / self.shadow_items, 4) if self.shadow_items else None,
+        }
+
+
+class ModelSlot:
+    """
+    One kind of model ("text", "image"). `current` and `shadow` are swapped as
+    whole tuples, so a request that already read them keeps using the model it
+    started with while a new version goes live.
+    """
+
+    def __init__(self, kind: str, loader: Callable, baseline_model):
+        self.kind = kind
+        self.loader = loader
+        self.current = (BASELINE_VERSION, baseline_model)
+        self.shadow = None  # (version, model, sample_rate)
+        self.loaded = {BASELINE_VERSION: baseline_model}
+        self.metrics: Dict[str, VersionMetrics] = {}
+        self.lock = threading.Lock()
+
+    def version_metrics(self, version: str) -> VersionMetrics:
+        if version not in self.metrics:
+            self.metrics[version] = VersionMetrics()
+        return self.metrics[version]
+
+
+class ModelRegistry:
+    def __init__(self, root: str = MODEL_REGISTRY_DIR):
+        self.root = root
+        self._slots: Dict[str, ModelSlot] = {}
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-scoring")
+
+    def register(self, kind: str, loader: Callable, baseline_model):
+        """loader(directory) builds a model from a registry version directory"""
+        self._slots[kind] = ModelSlot(kind, loader, baseline_model)
+
+    def _slot(self, kind: str) -> ModelSlot:
+        if kind not in self._slots:
+            raise ModelRegistryError(f"Unknown model kind '{kind}'")
+        return self._slots[kind]
+
+    def active(self, kind: str):
+        return self._slot(kind).current[1]
+
+    def active_version(self, kind: str) -> str:
+        return self._slot(kind).current[0]
+
+    # ---------- artifacts on disk ----------
+
+    def _version_dir(self, kind: str, version: str) -> str:
+        return os.path.join(self.root, kind, version)
+
+    def publish(self, kind: str, version: str, files: List[str]) -> dict:
+        """Copy artifacts into a new immutable version directory with checksums"""
+        version_dir = self._version_dir(kind, version)
+        if os.path.exists(version_dir):
+            raise ModelRegistryError(f"{kind} version '{version}' already exists")
+        os.makedirs(version_dir)
+
+        checksums = {}
+        for path in files:
+            name = os.path.basename(path)
+            shutil.copy2(path, os.path.join(version_dir, name))
+            checksums[name] = file_sha256(os.path.join(version_dir, name))
+
+        manifest = {
+            "kind": kind,
+            "version": version,
+            "files": checksums,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        _write_atomic(os.path.join(version_dir, "manifest.json"), json.dumps(manifest, indent=2))
+        return manifest
+
+    def list_versions(self, kind: str) -> List[dict]:
+        kind_dir = os.path.join(self.root, kind)
+        if not os.path.isdir(kind_dir):
+            return []
+        manifests = []
+        for version in sorted(os.listdir(kind_dir)):
+            manifest_path = os.path.join(kind_dir, version, "manifest.json")
+            if os.path.isfile(manifest_path):
+                with open(manifest_path) as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+    def _load_version(self, kind: str, version: str):
+        slot = self._slot(kind)
+        with slot.lock:
+            if version in slot.loaded:
+                return slot.loaded[version]
+
+        version_dir = self._version_dir(kind, version)
+        manifest_path = os.path.join(version_dir, "manifest.json")
+        if not os.path.isfile(manifest_path):
+            raise ModelRegistryError(f"{kind} version '{version}' not found")
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        for name, expected in manifest["files"].items():
+            actual = file_sha256(os.path.join(version_dir, name))
+            if actual != expected:
+                raise ModelRegistryError(f"Checksum mismatch for {kind}/{version}/{name}")
+
+        start = time.perf_counter()
+        model = slot.loader(version_dir)
+        print(f"✅ Loaded {kind} model {version} in {time.perf_counter() - start:.1f}s")
+
+        with slot.lock:
+            slot.loaded[version] = model
+        return model
+
+    # ---------- switching versions ----------
+
+    def activate_blocking(self, kind: str, version: str, persist: bool = True):
+        """Load (outside any lock), then swap the active pointer in one assignment"""
+        model = self._load_version(kind, version)
+        slot = self._slot(kind)
+        slot.current = (version, model)
+        if persist:
+            _write_atomic(os.path.join(self.root, kind, "ACTIVE"), version)
+        if slot.shadow and slot.shadow[0] == version:
+            # A promoted candidate no longer needs shadowing
+            self.set_shadow_blocking(kind, None, persist=persist)
+        self._evict_unused(slot)
+
+    def set_shadow_blocking(self, kind: str, version: Optional[str], sample_rate: float = 0.1, persist: bool = True):
+        slot = self._slot(kind)
+        shadow_path = os.path.join(self.root, kind, "SHADOW")
+        if version is None:
+            slot.shadow = None
+            if persist and os.path.exists(shadow_path):
+                os.remove(shadow_path)
+        else:
+            model = self._load_version(kind, version)
+            slot.shadow = (version, model, sample_rate)
+            if persist:
+                _write_atomic(shadow_path, json.dumps({"version": version, "sample_rate": sample_rate}))
+        self._evict_unused(slot)
+
+    def _evict_unused(self, slot: ModelSlot):
+        keep = {BASELINE_VERSION, slot.current[0]}
+        if slot.shadow:
+            keep.add(slot.shadow[0])
+        with slot.lock:
+            for version in list(slot.loaded):
+                if version not in keep:
+                    del slot.loaded[version]
+
+    def sync_blocking(self):
+        """Apply the ACTIVE / SHADOW pointers on disk - how other workers learn about a switch"""
+        for kind, slot in self._slots.items():
+            kind_dir = os.path.join(self.root, kind)
+            try:
+                active_path = os.path.join(kind_dir, "ACTIVE")
+                if os.path.isfile(active_path):
+                    with open(active_path) as f:
+                        version = f.read().strip()
+                    if version and version != slot.current[0]:
+                        self.activate_blocking(kind, version, persist=False)
+
+                shadow_path = os.path.join(kind_dir, "SHADOW")
+                if os.path.isfile(shadow_path):
+                    with open(shadow_path) as f:
+                        shadow = json.load(f)
+                    if not slot.shadow or slot.shadow[0] != shadow["version"] or slot.shadow[2] != shadow["sample_rate"]:
+                        self.set_shadow_blocking(kind, shadow["version"], shadow["sample_rate"], persist=False)
+                elif slot.shadow:
+                    self.set_shadow_blocking(kind, None, persist=False)
+            except Exception as e:
+                print(f"❌ Model registry sync failed for {kind}: {str(e)}")
+
+    async def activate(self, kind: str, version: str):
+        await asyncio.to_thread(self.activate_blocking, kind, version)
+
+    async def set_shadow(self, kind: str, version: Optional[str], sample_rate: float = 0.1):
+        await asyncio.to_thread(self.set_shadow_blocking, kind, version, sample_rate)
+
+    async def sync(self):
+        await asyncio.to_thread(self.sync_blocking)
+
+    async def poll_forever(self):
+        while True:
+            await asyncio.sleep(MODEL_REGISTRY_POLL_SECONDS)
+            await self.sync()
+
+    # ---------- serving ----------
+
+    def run(self, kind: str, fn: Callable, *args, labels: Optional[Callable] = None):
+        """
+        Call fn(model, *args) on the active version and record its latency.
+        A sampled fraction of calls is replayed on the shadow candidate in a
+        background thread; labels(result) -> list of labels is compared for agreement.
+        """
+        slot = self._slot(kind)
+        version, model = slot.current
+
+        start = time.perf_counter()
+        result = fn(model, *args)
+        metrics = slot.version_metrics(version)
+        metrics.calls += 1
+        metrics.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        shadow = slot.shadow
+        if shadow and labels and random.random() < shadow[2]:
+            self._shadow_pool.submit(self._score_shadow, slot, shadow, fn, args, labels, labels(result))
+
+        return result
+
+    def _score_shadow(self, slot: ModelSlot, shadow, fn, args, labels, primary_labels):
+        version, model, _ = shadow
+        metrics = slot.version_metrics(version)
+        try:
+            start = time.perf_counter()
+            shadow_labels = labels(fn(model, *args))
+            metrics.latencies_ms.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            metrics.shadow_errors += 1
+            print(f"❌ Shadow scoring failed for {slot.kind}/{version}: {str(e)}")
+            return
+
+        metrics.shadow_calls += 1
+        metrics.shadow_items += len(primary_labels)
+        metrics.shadow_agreed += sum(1 for a, b in zip(primary_labels, shadow_labels) if a == b)
+
+    def status(self) -> dict:
+        report = {}
+        for kind, slot in self._slots.items():
+            report[kind] = {
+                "active_version": slot.current[0],
+                "shadow": {"version": slot.shadow[0], "sample_rate": slot.shadow[2]} if slot.shadow else None,
+                "available_versions": [m["version"] for m in self.list_versions(kind)],
+                "metrics": {version: m.summary() for version, m in slot.metrics.items()},
+            }
+        return report
+
+
+model_registry = ModelRegistry()
@@ -1,5 +1,5 @@
 from app.database import Base
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, DateTime, Boolean, ForeignKey, LargeBinary, Index, JSON, text
 from sqlalchemy.orm import relationship,Mapped, mapped_column
 from datetime import datetime
 from typing import Optional
@@ -35,18 +35,30 @@ class Confirmation(Base):
     __tablename__ = "confirmations"
     
     id = Column(Integer, primary_key=True, index=True)
-    report_id = Column(Integer, ForeignKey("reports.id"))
+    report_id = Column(Integer, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     confirmed_at = Column(DateTime, default=datetime.utcnow)
 
+    # Reporter details for duplicate submissions folded into an existing report
+    user_name = Column(String(255), nullable=True)
+    user_mobile = Column(String(15), nullable=True)
+    user_email = Column(String(255), nullable=True)
+
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    # Append-only, written in batches by app/activity.py. Timelines read by
+    # (report_id, created_at), the public feed by created_at (0005_activity_log_pipeline).
+    __table_args__ = (
+        Index("ix_activity_logs_report_id_created_at", "report_id", "created_at"),
+        Index("ix_activity_logs_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    activity_type = Column(String)  # 'report_created', 'issue_resolved', 'confirmed'
-    report_id = Column(Integer, ForeignKey("reports.id"))
+    activity_type = Column(String)  # 'report_created', 'status_changed', 'issue_resolved', 'confirmed'
+    report_id = Column(Integer)
     user_id = Column(Integer, ForeignKey("users.id"))
     description = Column(String)
+    payload = Column(JSON, nullable=True)  # report fields shown by the feed / timeline, status change details
     created_at = Column(DateTime, default=datetime.utcnow)
 
 from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
@@ -54,9 +66,9 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 
-class Report(Base):
-    __tablename__ = "reports"
-    
+class ReportColumns:
+    """Columns shared by reports and reports_archive, so the two can't drift apart"""
+
     id = Column(Integer, primary_key=True, index=True)
     
     # User Information
@@ -71,10 +83,6 @@ class Report(Base):
     category = Column(String(50), nullable=False, default="General")    # ✅ Add default
     urgency_level = Column(String(20), nullable=False)
 
-    # Foreign keys
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
-    status_id = Column(Integer, ForeignKey("statuses.id"), nullable=True)
-    
     # Status Information
     status = Column(String(20), default="Pending")
     
@@ -94,18 +102,81 @@ class Report(Base):
     voice_note = Column(String(500), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)  # partition key of reports
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
-    
+    resolved_at = Column(DateTime, nullable=True)  # set when the status becomes Resolved, cleared on reopen
+
+    department: Mapped[str] = mapped_column(String, default="other")
+    auto_assigned: Mapped[bool] = mapped_column(Boolean, default=False)
+    prediction_confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # Duplicate detection
+    text_simhash = Column(BigInteger, nullable=True)  # signed 64-bit SimHash of title + description
+    confirmation_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+class Report(ReportColumns, Base):
+    __tablename__ = "reports"
+    # Partitioned by month on created_at (0004_partition_reports). The table's primary
+    # key is (id, created_at); id alone stays the ORM identity and is unique via its sequence.
+    # Tables keyed by report_id carry no foreign key - one can't reference a partitioned
+    # table by id alone, and archived reports keep their confirmations and vectors.
+    # Indexes are created on the partitioned table (0004) and cascade to every partition.
+    __table_args__ = (
+        Index("ix_reports_department_status", "department", "status"),
+        Index("ix_reports_user_email_created_at", "user_email", "created_at"),
+        Index("ix_reports_status_id_updated_at", "status_id", "updated_at"),
+        Index("ix_reports_created_at", "created_at"),
+        Index("ix_reports_resolved_at", "resolved_at"),
+        Index("ix_reports_geo_lat_long", "location_lat", "location_long",
+              postgresql_where=text("location_lat IS NOT NULL AND location_long IS NOT NULL")),
+        Index("ix_reports_geo_status", "status",
+              postgresql_where=text("location_lat IS NOT NULL AND location_long IS NOT NULL")),
+    )
+
     # Foreign keys
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    status_id = Column(Integer, ForeignKey("statuses.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="reports")
-    department: Mapped[str] = mapped_column(String, default="other")
-    auto_assigned: Mapped[bool] = mapped_column(Boolean, default=False)
-    prediction_confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
-    
+
+class ReportArchive(ReportColumns, Base):
+    __tablename__ = "reports_archive"
+
+    # Closed reports past the retention window, moved out by archive_reports.py.
+    # Same columns as reports; looked up by id only.
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    category_id = Column(Integer, nullable=True)
+    status_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+class ReportVector(Base):
+    __tablename__ = "report_vectors"
+
+    # TF-IDF vector of the report text, computed once at ingest
+    report_id = Column(Integer, primary_key=True)  # deleted along with the report by delete_report_rows()
+    term_ids = Column(LargeBinary, nullable=False)   # uint32 feature indices
+    weights = Column(LargeBinary, nullable=False)    # float16 TF-IDF weights
+    vocab_size = Column(Integer, nullable=False)     # detects vectors from an older vectorizer
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ImagePrediction(Base):
+    __tablename__ = "image_predictions"
+
+    # Persistent cache of CNN results keyed by the uploaded file's content hash and
+    # the image model version that produced them (0007_image_prediction_model_version)
+    content_hash = Column(String(64), primary_key=True)        # sha256 hex of the raw bytes
+    model_version = Column(String(100), primary_key=True)      # model registry version, e.g. "baseline"
+    perceptual_hash = Column(BigInteger, nullable=False, index=True)  # signed 64-bit dHash
+    department = Column(String(50), nullable=False)
+    original_prediction = Column(String(50), nullable=False)
+    confidence = Column(Float, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)            # float16 penultimate-layer output
+    report_id = Column(Integer, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # ========== DEPARTMENT ANALYSIS MODELS ==========
 
 class Department(Base):
@@ -126,6 +197,10 @@ class Department(Base):
 
 class DepartmentStats(Base):
     __tablename__ = "department_stats"
+    # One row per department and rolling window, upserted by app/department_stats.py
+    __table_args__ = (
+        Index("ux_department_stats_department_id_period", "department_id", "period", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     department_id = Column(Integer, ForeignKey("departments.id"), index=True)
@@ -0,0 +1,141 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select
+
+from app.models import Report
+
+
+class ProjectedRow:
+    """
+    Base of the list routes' row DTOs: one slot per selected column, filled
+    straight from the row tuple. No identity map, no change tracking and none
+    of the columns the route doesn't return.
+    """
+
+    __slots__ = ()
+    columns: Tuple = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def select(cls):
+        return select(*cls.columns)
+
+    @classmethod
+    def from_rows(cls, rows) -> List["ProjectedRow"]:
+        return [cls(*row) for row in rows]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def projection(name: str, **columns) -> type:
+    """
+    A ProjectedRow subclass selecting `columns` (field name -> column expression),
+    e.g. projection("IdTitle", id=Report.id, title=Report.title)
+    """
+    return type(name, (ProjectedRow,), {
+        "__slots__": tuple(columns),
+        "columns": tuple(column.label(field) for field, column in columns.items()),
+    })
+
+
+# ---------- list route projections ----------
+# Fallbacks the routes used to apply in Python (`x or "Pending"`) are done by the database
+
+AdminIssueRow = projection(
+    "AdminIssueRow",
+    id=Report.id,
+    user_name=Report.user_name,
+    user_email=Report.user_email,
+    title=Report.title,
+    description=Report.description,
+    urgency_level=Report.urgency_level,
+    status=Report.status,
+    location_address=Report.location_address,
+    location_lat=Report.location_lat,
+    location_long=Report.location_long,
+    assigned_department=Report.assigned_department,
+    created_at=Report.created_at,
+)
+
+MapIssueRow = projection(
+    "MapIssueRow",
+    id=Report.id,
+    title=func.coalesce(Report.title, "Untitled Issue"),
+    status=func.coalesce(Report.status, "Pending"),
+    urgency_level=func.coalesce(Report.urgency_level, "Medium"),
+    location_lat=Report.location_lat,
+    location_long=Report.location_long,
+    description=Report.description,
+    created_at=Report.created_at,
+    user_email=Report.user_email,
+    location_address=Report.location_address,
+)
+
+AutoAssignedIssueRow = projection(
+    "AutoAssignedIssueRow",
+    id=Report.id,
+    description=Report.description,
+    department=Report.department,
+    prediction_confidence=Report.prediction_confidence,
+    status=Report.status,
+    created_at=Report.created_at,
+    category=Report.category,
+)
+
+RecentReportRow = projection(
+    "RecentReportRow",
+    id=Report.id,
+    title=Report.title,
+    description=Report.description,
+    location=func.coalesce(Report.location_address, "Location not specified"),
+    status=func.coalesce(Report.status, "Pending"),
+    department=func.coalesce(Report.department, "Not assigned"),
+    created_at=Report.created_at,
+)
+
+# The ReportResponse fields
+ReportRow = projection("ReportRow", **{
+    field: getattr(Report, field) for field in (
+        "id", "user_name", "user_mobile", "user_email", "title", "description", "category",
+        "urgency_level", "status", "location_lat", "location_long", "location_address", "distance",
+        "images", "voice_note", "assigned_department", "resolution_notes", "resolved_by",
+        "created_at", "updated_at", "user_id",
+    )
+})
+
+
+# ---------- serialization ----------
+
+def _default(value):
+    if isinstance(value, ProjectedRow):
+        return value.as_dict()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    JSON via orjson. Datetimes come out as isoformat() did in the old routes;
+    ProjectedRows are encoded as objects.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Renders with orjson and skips FastAPI's response_model validation and
+    jsonable_encoder pass - return it only with data already in the response's
+    shape (ProjectedRows, dicts, lists, scalars).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
@@ -0,0 +1,178 @@
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Fraction of statements printed to stdout (replaces engine echo=True)
+SQL_ECHO_SAMPLE_RATE = float(os.getenv("SQL_ECHO_SAMPLE_RATE", "0"))
+# Statements slower than this are always printed
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "500"))
+# Same statement text this many times in one request is reported as an N+1 candidate
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+_MAX_SQL_CHARS = 500
+
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= _MAX_SQL_CHARS else statement[:_MAX_SQL_CHARS] + "..."
+
+
+class RequestQueryStats:
+    """Statements issued while handling one request"""
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_sql", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+        self.statements = Counter()
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] += 1
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = statement
+
+    def repeated(self) -> Dict[str, int]:
+        return {sql: n for sql, n in self.statements.items() if n >= N_PLUS_ONE_THRESHOLD}
+
+
+class RouteQueryStats:
+    """Aggregate over every request served by one route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.db_ms = 0.0
+        self.max_statements = 0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+        self.n_plus_one_requests = 0
+        self.n_plus_one_statements: Counter = Counter()
+
+    def merge(self, stats: RequestQueryStats):
+        self.requests += 1
+        self.statements += stats.count
+        self.db_ms += stats.total_ms
+        self.max_statements = max(self.max_statements, stats.count)
+        if stats.slowest_ms > self.slowest_ms:
+            self.slowest_ms = stats.slowest_ms
+            self.slowest_sql = _shorten(stats.slowest_sql)
+
+        repeated = stats.repeated()
+        if repeated:
+            self.n_plus_one_requests += 1
+            for sql, n in repeated.items():
+                self.n_plus_one_statements[_shorten(sql)] = max(self.n_plus_one_statements[_shorten(sql)], n)
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "avg_statements": round(self.statements / self.requests, 2) if self.requests else 0,
+            "max_statements": self.max_statements,
+            "db_ms": round(self.db_ms, 2),
+            "avg_db_ms": round(self.db_ms / self.requests, 2) if self.requests else 0,
+            "slowest_statement": {
+                "ms": round(self.slowest_ms, 2),
+                "sql": self.slowest_sql,
+            } if self.slowest_sql else None,
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "n_plus_one_candidates": [
+                {"sql": sql, "max_repeats": n}
+                for sql, n in self.n_plus_one_statements.most_common(5)
+            ],
+        }
+
+
+_current_stats: contextvars.ContextVar[Optional[RequestQueryStats]] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+class QueryMetrics:
+    """
+    Per-route statement counts and DB time, collected from engine events.
+
+    The middleware puts a RequestQueryStats in a context variable; SQLAlchemy's
+    async engine runs the cursor events inside the request's context, so every
+    statement lands on the request that issued it without touching the routes.
+    Numbers are per worker process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteQueryStats] = {}
+        self._started_at = time.time()
+
+    def install(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed_ms)
+
+        if elapsed_ms >= SQL_SLOW_QUERY_MS:
+            print(f"🐢 Slow query ({elapsed_ms:.1f} ms): {_shorten(statement)}")
+        elif SQL_ECHO_SAMPLE_RATE and random.random() < SQL_ECHO_SAMPLE_RATE:
+            print(f"🔎 SQL ({elapsed_ms:.1f} ms): {_shorten(statement)}")
+
+    def _handle_error(self, context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        # so the connection's next statement isn't timed from it
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    def start_request(self):
+        stats = RequestQueryStats()
+        return stats, _current_stats.set(stats)
+
+    def finish_request(self, route: str, stats: RequestQueryStats, token):
+        _current_stats.reset(token)
+        with self._lock:
+            if route not in self._routes:
+                self._routes[route] = RouteQueryStats()
+            self._routes[route].merge(stats)
+
+        repeated = stats.repeated()
+        if repeated:
+            worst_sql, worst_n = max(repeated.items(), key=lambda item: item[1])
+            print(f"⚠️ Possible N+1 on {route}: {worst_n}x {_shorten(worst_sql)[:120]}")
+
+    def summary(self, sort_by: str = "db_ms") -> dict:
+        with self._lock:
+            routes = {route: stats.summary() for route, stats in self._routes.items()}
+        ordered = dict(sorted(routes.items(), key=lambda item: item[1].get(sort_by, 0), reverse=True))
+        return {
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(self._started_at)),
+            "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+            "routes": ordered,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self._started_at = time.time()
+
+
+query_metrics = QueryMetrics()
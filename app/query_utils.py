@@ -0,0 +1,34 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def day_range(day: date) -> Tuple[datetime, datetime]:
+    """
+    Half-open [start, end) bounds for one calendar day.
+
+    Filter with `column >= start, column < end` rather than
+    `func.date(column) == day` - wrapping the column in a function hides it
+    from its index and forces a scan of the whole table.
+    """
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def day_start(day: date) -> datetime:
+    """Lower bound for "since this day" filters"""
+    return datetime.combine(day, time.min)
+
+
+async def explain(session: AsyncSession, stmt, analyze: bool = False) -> List[str]:
+    """Postgres plan for a SQLAlchemy statement, one line per plan node"""
+    compiled = stmt.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+    result = await session.execute(text(f"{prefix} {compiled}"))
+    return [row[0] for row in result.all()]
+
+
+def uses_index(plan: List[str]) -> bool:
+    return any("Index" in line for line in plan) and not any("Seq Scan on reports" in line for line in plan)
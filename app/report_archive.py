@@ -0,0 +1,175 @@
+import os
+import re
+import time
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.dedupe import CLOSED_STATUSES
+from app.models import Report, ReportArchive
+
+# Closed reports untouched for longer than this move to reports_archive
+REPORT_RETENTION_DAYS = int(os.getenv("REPORT_RETENTION_DAYS", "365"))
+# Rows moved per transaction, so the archiver never holds locks for long
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+# Monthly partitions kept ready ahead of the current month
+REPORT_PARTITION_MONTHS_AHEAD = int(os.getenv("REPORT_PARTITION_MONTHS_AHEAD", "3"))
+
+# Serialises partition DDL between workers starting at once and the archive job
+_PARTITION_LOCK_ID = 0x7265706F  # "repo"
+_PARTITION_NAME = re.compile(r"^reports_y(\d{4})m(\d{2})$")
+
+_PARTITIONS_SQL = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'reports'::regclass
+"""
+
+_CLOSED_PREDICATE = """
+    (status_id IN (SELECT id FROM statuses WHERE name = ANY(:statuses))
+     OR (status_id IS NULL AND status = ANY(:statuses)))
+    AND COALESCE(resolved_at, updated_at, created_at) < now() - make_interval(days => :retention_days)
+"""
+
+_ARCHIVE_COLUMNS = ", ".join(column.name for column in Report.__table__.columns)
+
+# Oldest closed reports first; SKIP LOCKED leaves rows an admin is editing for the next run
+_MOVE_BATCH_SQL = f"""
+    WITH candidates AS (
+        SELECT id, created_at FROM reports
+        WHERE {_CLOSED_PREDICATE}
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM reports
+        USING candidates
+        WHERE reports.id = candidates.id AND reports.created_at = candidates.created_at
+        RETURNING {", ".join("reports." + column.name for column in Report.__table__.columns)}
+    )
+    INSERT INTO reports_archive ({_ARCHIVE_COLUMNS})
+    SELECT {_ARCHIVE_COLUMNS} FROM moved
+    RETURNING id
+"""
+
+_COUNT_CANDIDATES_SQL = f"SELECT count(*) FROM reports WHERE {_CLOSED_PREDICATE}"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Same naming as migration 0004: reports_y2026m10"""
+    return f"reports_y{month.year}m{month.month:02d}"
+
+
+async def list_partitions(conn: AsyncConnection) -> List[str]:
+    return sorted((await conn.execute(text(_PARTITIONS_SQL))).scalars().all())
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int = REPORT_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create the monthly partitions for this month and the next `months_ahead`, so
+    new reports never land in reports_default. Run inside a transaction.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": _PARTITION_LOCK_ID})
+    existing = set(await list_partitions(conn))
+    this_month = month_start(date.today())
+
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(this_month, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        try:
+            # A savepoint per partition: one that clashes with rows already in
+            # reports_default must not stop the others from being created
+            async with conn.begin_nested():
+                await conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF reports "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+                ))
+            created.append(name)
+        except Exception as e:
+            print(f"⚠️ Could not create partition {name}: {str(e)}")
+    return created
+
+
+async def drop_empty_partitions(conn: AsyncConnection, retention_days: int = REPORT_RETENTION_DAYS) -> List[str]:
+    """
+    Drop monthly partitions that ended before the retention window and that the
+    archiver has emptied. Months that still hold open reports are kept.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": _PARTITION_LOCK_ID})
+    cutoff = month_start(date.fromordinal(date.today().toordinal() - retention_days))
+
+    dropped = []
+    for name in await list_partitions(conn):
+        match = _PARTITION_NAME.match(name)
+        if not match:
+            continue
+        start = date(int(match.group(1)), int(match.group(2)), 1)
+        if add_months(start, 1) > cutoff:
+            continue
+        has_rows = (await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})"))).scalar()
+        if not has_rows:
+            await conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+
+async def count_archivable(conn: AsyncConnection, retention_days: int = REPORT_RETENTION_DAYS) -> int:
+    result = await conn.execute(
+        text(_COUNT_CANDIDATES_SQL),
+        {"statuses": list(CLOSED_STATUSES), "retention_days": retention_days}
+    )
+    return result.scalar()
+
+
+async def archive_closed_reports(
+    engine,
+    retention_days: int = REPORT_RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> dict:
+    """
+    Move closed reports older than the retention window from reports to
+    reports_archive, one batch per transaction. Each batch is a single
+    DELETE ... RETURNING feeding an INSERT, so a row is never in both tables or
+    in neither. Returns counts and the archived ids.
+    """
+    started = time.perf_counter()
+    archived_ids: List[int] = []
+    batches = 0
+    params = {"statuses": list(CLOSED_STATUSES), "retention_days": retention_days, "batch_size": batch_size}
+
+    while max_batches is None or batches < max_batches:
+        async with engine.begin() as conn:
+            moved = (await conn.execute(text(_MOVE_BATCH_SQL), params)).scalars().all()
+        batches += 1
+        archived_ids.extend(moved)
+        if len(moved) < batch_size:
+            break
+
+    return {
+        "archived": len(archived_ids),
+        "batches": batches,
+        "archived_ids": archived_ids,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def get_archived_report(session: AsyncSession, report_id: int) -> Optional[ReportArchive]:
+    """Archived reports stay readable by id"""
+    result = await session.execute(select(ReportArchive).where(ReportArchive.id == report_id))
+    return result.scalar_one_or_none()
@@ -0,0 +1,288 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Integer, LargeBinary, any_, bindparam, delete, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.activity import activity_log
+from app.models import ActivityLog, Confirmation, ImagePrediction, Report, ReportVector, Status
+
+# Coalesce concurrent report submissions into one transaction (off by default)
+REPORT_GROUP_COMMIT = os.getenv("REPORT_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+# How long the first report of a batch waits for company
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "256"))
+# Batches committing in parallel; the next batch fills up while these are in flight
+GROUP_COMMIT_WORKERS = int(os.getenv("GROUP_COMMIT_WORKERS", "2"))
+
+
+class StatusIdCache:
+    """
+    Status name -> id. Statuses are seed data and are never renamed or deleted,
+    so an id stays valid once seen. Misses aren't cached - a status created later
+    is picked up on its first use.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+
+    async def get(self, session: AsyncSession, name: str) -> Optional[int]:
+        status_id = self._ids.get(name)
+        if status_id is None:
+            result = await session.execute(select(Status.id).where(Status.name == name))
+            status_id = result.scalar_one_or_none()
+            if status_id is not None:
+                self._ids[name] = status_id
+        return status_id
+
+    def clear(self):
+        self._ids = {}
+
+
+status_ids = StatusIdCache()
+
+
+class NewReport:
+    """
+    One report waiting to be written: `values` are the reports columns, `vector`
+    the report_vectors columns without report_id (None when vectorizing failed).
+    """
+
+    __slots__ = ("values", "vector", "image_hash")
+
+    def __init__(self, values: dict, vector: Optional[dict] = None, image_hash: Optional[str] = None):
+        self.values = values
+        self.vector = vector
+        self.image_hash = image_hash
+
+
+def single_insert_statement(report: NewReport):
+    """
+    INSERT ... RETURNING id with the vector row and the photo link riding along
+    as data-modifying CTEs - one statement instead of insert, flush, insert,
+    update and a refresh to read the id back.
+    """
+    new_report = insert(Report).values(**report.values).returning(Report.id).cte("new_report")
+    stmt = select(new_report.c.id)
+
+    if report.vector is not None:
+        stmt = stmt.add_cte(
+            insert(ReportVector).from_select(
+                ["report_id", "term_ids", "weights", "vocab_size"],
+                select(
+                    new_report.c.id,
+                    literal(report.vector["term_ids"], LargeBinary),
+                    literal(report.vector["weights"], LargeBinary),
+                    literal(report.vector["vocab_size"]),
+                ),
+            ).cte("new_vector")
+        )
+
+    if report.image_hash:
+        stmt = stmt.add_cte(
+            update(ImagePrediction)
+            .where(
+                ImagePrediction.content_hash == report.image_hash,
+                ImagePrediction.report_id.is_(None)
+            )
+            .values(report_id=select(new_report.c.id).scalar_subquery())
+            .cte("linked_image")
+        )
+    return stmt
+
+
+async def insert_report(session: AsyncSession, report: NewReport) -> int:
+    """Write one report in its own transaction and return its id"""
+    result = await session.execute(single_insert_statement(report))
+    report_id = result.scalar_one()
+    await session.commit()
+    return report_id
+
+
+async def insert_report_batch(session: AsyncSession, reports: List[NewReport]) -> List[int]:
+    """
+    Write many reports in one transaction: one multi-row INSERT ... RETURNING
+    (ids come back in parameter order) and one executemany for the vectors.
+    """
+    result = await session.execute(
+        insert(Report).returning(Report.id, sort_by_parameter_order=True),
+        [report.values for report in reports]
+    )
+    ids = list(result.scalars().all())
+
+    vectors = [
+        {"report_id": report_id, **report.vector}
+        for report_id, report in zip(ids, reports) if report.vector is not None
+    ]
+    if vectors:
+        await session.execute(insert(ReportVector), vectors)
+
+    for report_id, report in zip(ids, reports):
+        if report.image_hash:
+            await session.execute(
+                update(ImagePrediction)
+                .where(
+                    ImagePrediction.content_hash == report.image_hash,
+                    ImagePrediction.report_id.is_(None)
+                )
+                .values(report_id=report_id)
+            )
+
+    await session.commit()
+    return ids
+
+
+async def delete_report_rows(db: AsyncSession, report_ids: Sequence[int]):
+    """
+    Rows keyed by report_id have no foreign key to the partitioned reports
+    table, so they are removed (or unlinked) here together with the reports.
+    One statement per table for any number of reports; deleting the reports
+    and committing is left to the caller.
+    """
+    ids = bindparam("report_ids", value=list(report_ids), type_=ARRAY(Integer))
+    for table in (ReportVector, Confirmation, ActivityLog):
+        await db.execute(delete(table).where(table.report_id == any_(ids)))
+    await db.execute(
+        update(ImagePrediction).where(ImagePrediction.report_id == any_(ids)).values(report_id=None)
+    )
+    activity_log.discard(report_ids)
+
+
+class GroupCommitter:
+    """
+    Coalesces concurrent report inserts. Each submit() queues a report and waits
+    for its id; a worker takes the first queued report, collects whatever else
+    arrives within GROUP_COMMIT_WINDOW_MS (up to GROUP_COMMIT_MAX_BATCH) and
+    writes the lot with insert_report_batch() - one commit for the whole batch.
+
+    Ids are only handed out after the commit, so a response never points at a
+    report that could still be rolled back. If a batch fails, its reports are
+    retried one by one so a single bad row doesn't fail its neighbours.
+    """
+
+    def __init__(self, session_factory, window_ms: float = GROUP_COMMIT_WINDOW_MS,
+                 max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        self._session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.batches = 0
+        self.reports = 0
+        self.largest_batch = 0
+        self.fallbacks = 0
+        self.commit_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self, workers: int = GROUP_COMMIT_WORKERS):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._run()) for _ in range(max(1, workers))]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, report: NewReport) -> int:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((report, future))
+        return await future
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            # Submitters that gave up (client disconnected) aren't written
+            batch = [(report, future) for report, future in batch if not future.done()]
+            if batch:
+                await self._write(batch)
+
+    async def _write(self, batch: list):
+        started = time.perf_counter()
+        try:
+            async with self._session_factory() as session:
+                ids = await insert_report_batch(session, [report for report, _ in batch])
+        except Exception as e:
+            print(f"⚠️ Group commit of {len(batch)} reports failed, retrying one by one: {str(e)}")
+            self.fallbacks += 1
+            await self._write_each(batch)
+            return
+
+        self.commit_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.reports += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for report_id, (_, future) in zip(ids, batch):
+            if not future.done():
+                future.set_result(report_id)
+
+    async def _write_each(self, batch: list):
+        for report, future in batch:
+            try:
+                async with self._session_factory() as session:
+                    report_id = await insert_report(session, report)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.reports += 1
+            if not future.done():
+                future.set_result(report_id)
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.running,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "reports": self.reports,
+            "avg_batch": round(self.reports / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "avg_commit_ms": round(self.commit_seconds / self.batches * 1000, 2) if self.batches else 0,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class ReportWriter:
+    """Single-statement inserts by default; group commit when it has been started"""
+
+    def __init__(self, committer: GroupCommitter):
+        self.committer = committer
+
+    async def write(self, session: AsyncSession, report: NewReport) -> int:
+        if self.committer.running:
+            return await self.committer.submit(report)
+        return await insert_report(session, report)
+
+
+def _session_factory():
+    from app.database import AsyncSessionLocal
+    return AsyncSessionLocal()
+
+
+group_committer = GroupCommitter(_session_factory)
+report_writer = ReportWriter(group_committer)
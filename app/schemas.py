@@ -4,6 +4,8 @@ import re
 from datetime import datetime
 from enum import Enum
 
+from app.media_store import is_media_key, IMAGE_TYPES, VOICE_NOTE_TYPES
+
 class UrgencyLevel(str, Enum):
     LOW = "Low"
     MEDIUM = "Medium"
@@ -76,20 +78,37 @@ class UserLogin(BaseModel):
             raise ValueError('Password cannot be empty')
         return v
 
+MAX_IMAGES_PER_REPORT = 10
+
 class ReportCreate(BaseModel):
+    # User Information
     user_name: str
     user_mobile: str
     user_email: Optional[str] = None
+    
+    # Issue Information
     urgency_level: str
     title: str
     description: str
+    
+    # Location Information
     location_lat: float
     location_long: float
     location_address: Optional[str] = None
-    department: Optional[str] = "other"
+    
+    # ✅ ADD THESE FIELDS FOR AI ASSIGNMENT
+    department: Optional[str] = "other"  # Will be set by AI prediction
     auto_assigned: Optional[bool] = False
     prediction_confidence: Optional[float] = None
+
+    # image_hash returned by /api/predict-department, links the photo to this report
+    image_hash: Optional[str] = None
+
+    # Media keys returned by /api/media/images and /api/media/voice-notes
+    images: Optional[List[str]] = None
+    voice_note: Optional[str] = None
     
+    # Validation
     @validator('user_name')
     def validate_user_name(cls, v):
         if not v or not v.strip():
@@ -104,16 +123,9 @@ class ReportCreate(BaseModel):
             raise ValueError('Mobile number must be exactly 10 digits')
         return v
 
-    # @validator('category')
-    # def validate_category(cls, v):
-    #     valid_categories = ["Garbage", "Water", "Sanitation", "Other"]
-    #     if v not in valid_categories:
-    #         raise ValueError(f'Category must be one of: {", ".join(valid_categories)}')
-    #     return v
-
     @validator('urgency_level')
     def validate_urgency_level(cls, v):
-        valid_urgency_levels = ["Low", "Medium", "High", "Urgent"]
+        valid_urgency_levels = ["High", "Medium", "Low"]
         if v not in valid_urgency_levels:
             raise ValueError(f'Urgency level must be one of: {", ".join(valid_urgency_levels)}')
         return v
@@ -124,8 +136,6 @@ class ReportCreate(BaseModel):
             raise ValueError('Title cannot be empty')
         if len(v) < 5:
             raise ValueError('Title must be at least 5 characters long')
-        if len(v) > 100:
-            raise ValueError('Title cannot exceed 100 characters')
         return v.strip()
 
     @validator('description')
@@ -134,8 +144,6 @@ class ReportCreate(BaseModel):
             raise ValueError('Description cannot be empty')
         if len(v) < 10:
             raise ValueError('Description must be at least 10 characters long')
-        if len(v) > 1000:
-            raise ValueError('Description cannot exceed 1000 characters')
         return v.strip()
 
     @validator('location_lat')
@@ -150,6 +158,35 @@ class ReportCreate(BaseModel):
             raise ValueError('Longitude must be between -180 and 180')
         return v
 
+    @validator('department')
+    def validate_department(cls, v):
+        valid_depts = ["water_dept", "road_dept", "sanitation_dept", "electricity_dept", "other"]
+        if v and v not in valid_depts:
+            raise ValueError(f'Department must be one of: {", ".join(valid_depts)}')
+        return v if v else "other"
+
+    @validator('images')
+    def validate_images(cls, v):
+        if v is None:
+            return v
+        if len(v) > MAX_IMAGES_PER_REPORT:
+            raise ValueError(f'At most {MAX_IMAGES_PER_REPORT} images can be attached')
+        image_extensions = set(IMAGE_TYPES.values())
+        for key in v:
+            if not is_media_key(key) or key[64:] not in image_extensions:
+                raise ValueError(f'{key} is not an uploaded image key')
+        return list(dict.fromkeys(v))
+
+    @validator('voice_note')
+    def validate_voice_note(cls, v):
+        if v is not None and (not is_media_key(v) or v[64:] not in VOICE_NOTE_TYPES.values()):
+            raise ValueError(f'{v} is not an uploaded voice note key')
+        return v
+
+class BulkReportRow(ReportCreate):
+    # Legacy / partner imports keep their original submission time
+    created_at: Optional[datetime] = None
+
 class ReportResponse(BaseModel):
     id: int
     user_name: str
@@ -200,9 +237,15 @@ class TokenResponse(BaseModel):
     message: str
 
 class FileUploadResponse(BaseModel):
-    filename: str
+    filename: str  # content-addressed media key, what reports store
     file_url: str
     message: str
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+    deduplicated: bool = False
+    thumbnail_url: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
 
 class UrgencyLevelsResponse(BaseModel):
     urgency_levels: List[str]
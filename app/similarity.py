@@ -0,0 +1,233 @@
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Report, ReportVector
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def report_text(title: Optional[str], description: Optional[str]) -> str:
+    """Text that gets vectorized for similarity (title carries most of the signal)"""
+    return f"{title or ''} {description or ''}"
+
+
+def encode_vector(row) -> Tuple[bytes, bytes]:
+    """Pack one sparse TF-IDF row into compact (uint32 term ids, float16 weights) blobs"""
+    row = sparse.csr_matrix(row)
+    return row.indices.astype(np.uint32).tobytes(), row.data.astype(np.float16).tobytes()
+
+
+def decode_vector(term_ids: bytes, weights: bytes, vocab_size: int) -> sparse.csr_matrix:
+    indices = np.frombuffer(term_ids, dtype=np.uint32).astype(np.int32)
+    data = np.frombuffer(weights, dtype=np.float16).astype(np.float32)
+    return sparse.csr_matrix((data, indices, [0, len(indices)]), shape=(1, vocab_size))
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SimilarityIndex:
+    """
+    In-memory sparse nearest-neighbour index over report TF-IDF vectors.
+
+    Vectors are L2-normalised by the vectorizer, so a sparse dot product is the
+    cosine similarity. New reports go into a pending buffer that is merged into
+    the CSR matrix on the next query, so ingest never pays for a matrix rebuild.
+    """
+
+    def __init__(self, vocab_size: int = 0):
+        self._lock = threading.Lock()
+        self._rebuild_log = None
+        self._reset(vocab_size)
+
+    def _reset(self, vocab_size: int):
+        self.vocab_size = vocab_size
+        self._matrix = sparse.csr_matrix((0, vocab_size), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._lats = np.empty(0, dtype=np.float64)
+        self._lons = np.empty(0, dtype=np.float64)
+        self._alive = np.empty(0, dtype=bool)
+        self._positions = {}
+        self._pending = []
+
+    def __len__(self):
+        return len(self._positions)
+
+    def add(self, report_id: int, vector, lat: float, lon: float):
+        """Add (or replace) one report's vector"""
+        vector = sparse.csr_matrix(vector, dtype=np.float32)
+        if vector.shape[1] != self.vocab_size:
+            raise ValueError(f"Vector has {vector.shape[1]} features, index expects {self.vocab_size}")
+        with self._lock:
+            self._remove_locked(report_id)
+            self._positions[report_id] = len(self._ids) + len(self._pending)
+            self._pending.append((report_id, vector, lat, lon))
+            if self._rebuild_log is not None:
+                self._rebuild_log.append((report_id, vector, lat, lon))
+
+    def remove(self, report_id: int):
+        with self._lock:
+            self._remove_locked(report_id)
+            if self._rebuild_log is not None:
+                self._rebuild_log.append((report_id, None, None, None))
+
+    def _remove_locked(self, report_id: int):
+        position = self._positions.pop(report_id, None)
+        if position is None:
+            return
+        if position < len(self._alive):
+            self._alive[position] = False
+        else:
+            # Still in the pending buffer - drop it before it gets merged
+            self._pending = [p for p in self._pending if p[0] != report_id]
+            self._positions = {rid: i for i, rid in enumerate(self._ids.tolist()) if self._alive[i]}
+            for offset, (rid, _, _, _) in enumerate(self._pending):
+                self._positions[rid] = len(self._ids) + offset
+
+    def _merge_pending_locked(self):
+        if not self._pending:
+            return
+        ids, vectors, lats, lons = zip(*self._pending)
+        self._matrix = sparse.vstack([self._matrix, *vectors], format="csr")
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+        self._lats = np.concatenate([self._lats, np.asarray(lats, dtype=np.float64)])
+        self._lons = np.concatenate([self._lons, np.asarray(lons, dtype=np.float64)])
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        self._pending = []
+
+    def get_vector(self, report_id: int):
+        with self._lock:
+            self._merge_pending_locked()
+            position = self._positions.get(report_id)
+            return None if position is None else self._matrix[position]
+
+    def query(
+        self,
+        vector,
+        k: int = 5,
+        exclude_id: Optional[int] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        radius_km: Optional[float] = None,
+    ) -> List[Tuple[int, float, Optional[float]]]:
+        """
+        Top-k most similar reports as (report_id, similarity, distance_km).
+        When radius_km is given only reports within that distance of (lat, lon) are returned.
+        """
+        with self._lock:
+            self._merge_pending_locked()
+            matrix, ids, lats, lons, alive = self._matrix, self._ids, self._lats, self._lons, self._alive
+
+        vector = sparse.csr_matrix(vector, dtype=np.float32)
+        if vector.shape[1] != matrix.shape[1]:
+            raise ValueError(f"Vector has {vector.shape[1]} features, index expects {matrix.shape[1]}")
+
+        # Only rows sharing at least one term come back from the sparse product
+        scores = (matrix @ vector.T).tocoo()
+        rows, values = scores.row, scores.data
+
+        keep = alive[rows] & (values > 0)
+        if exclude_id is not None:
+            keep &= ids[rows] != exclude_id
+        rows, values = rows[keep], values[keep]
+
+        distances = None
+        if radius_km is not None and lat is not None and lon is not None:
+            distances = haversine_km(lat, lon, lats[rows], lons[rows])
+            nearby = distances <= radius_km
+            rows, values, distances = rows[nearby], values[nearby], distances[nearby]
+
+        if len(rows) > k:
+            top = np.argpartition(-values, k)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-values[top], kind="stable")]
+
+        return [
+            (
+                int(ids[rows[i]]),
+                float(values[i]),
+                float(distances[i]) if distances is not None else None,
+            )
+            for i in top
+        ]
+
+    async def rebuild(self, session: AsyncSession, vocab_size: int) -> dict:
+        """
+        Reload every stored vector from the database and atomically swap it in.
+        Reports added or removed while loading are replayed on top of the fresh index.
+        """
+        with self._lock:
+            self._rebuild_log = []
+
+        try:
+            result = await session.execute(
+                select(
+                    ReportVector.report_id,
+                    ReportVector.term_ids,
+                    ReportVector.weights,
+                    ReportVector.vocab_size,
+                    Report.location_lat,
+                    Report.location_long,
+                ).join(Report, Report.id == ReportVector.report_id)
+            )
+            rows = result.all()
+
+            ids, lats, lons, indices, data, indptr = [], [], [], [], [], [0]
+            stale = 0
+            for report_id, term_ids, weights, stored_vocab_size, lat, lon in rows:
+                if stored_vocab_size != vocab_size:
+                    stale += 1
+                    continue
+                row_indices = np.frombuffer(term_ids, dtype=np.uint32)
+                indices.append(row_indices)
+                data.append(np.frombuffer(weights, dtype=np.float16))
+                indptr.append(indptr[-1] + len(row_indices))
+                ids.append(report_id)
+                lats.append(lat)
+                lons.append(lon)
+
+            matrix = sparse.csr_matrix(
+                (
+                    np.concatenate(data).astype(np.float32) if data else np.empty(0, dtype=np.float32),
+                    np.concatenate(indices).astype(np.int32) if indices else np.empty(0, dtype=np.int32),
+                    np.asarray(indptr, dtype=np.int64),
+                ),
+                shape=(len(ids), vocab_size),
+            )
+
+            with self._lock:
+                log, self._rebuild_log = self._rebuild_log, None
+                self._reset(vocab_size)
+                self._matrix = matrix
+                self._ids = np.asarray(ids, dtype=np.int64)
+                self._lats = np.asarray(lats, dtype=np.float64)
+                self._lons = np.asarray(lons, dtype=np.float64)
+                self._alive = np.ones(len(ids), dtype=bool)
+                self._positions = {rid: i for i, rid in enumerate(ids)}
+
+            for report_id, vector, lat, lon in log:
+                if vector is None:
+                    self.remove(report_id)
+                else:
+                    self.add(report_id, vector, lat, lon)
+        finally:
+            with self._lock:
+                self._rebuild_log = None
+
+        if stale:
+            print(f"⚠️ Skipped {stale} report vectors from an older vectorizer - run rebuild_similarity_index.py")
+
+        return {"indexed": len(self), "stale": stale}
+
+
+similarity_index = SimilarityIndex()
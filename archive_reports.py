@@ -0,0 +1,64 @@
+# archive_reports.py
+# Moves closed (Resolved / Closed) reports that haven't changed for
+# REPORT_RETENTION_DAYS from the partitioned reports table into reports_archive,
+# creates the monthly partitions for the coming months, and drops old
+# partitions the archiver has emptied. Meant to run nightly from cron:
+#
+#   python archive_reports.py
+#   python archive_reports.py --retention-days 180 --drop-empty
+#   python archive_reports.py --dry-run
+#
+# Archived reports are still served by GET /reports/{id} and
+# GET /api/admin/issues/{id}; they drop out of lists, counts and the map.
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.database import engine
+# Registers the commit hooks, so the API's ETags change once reports move (needs DATA_VERSION_FILE)
+import app.data_version  # noqa: F401
+from app.report_archive import (
+    archive_closed_reports, count_archivable, drop_empty_partitions, ensure_partitions,
+    ARCHIVE_BATCH_SIZE, REPORT_PARTITION_MONTHS_AHEAD, REPORT_RETENTION_DAYS,
+)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Archive old closed reports")
+    parser.add_argument("--retention-days", type=int, default=REPORT_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+    parser.add_argument("--months-ahead", type=int, default=REPORT_PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--drop-empty", action="store_true", help="Drop emptied partitions older than the retention window")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    args = parser.parse_args()
+
+    try:
+        if args.dry_run:
+            async with engine.connect() as conn:
+                pending = await count_archivable(conn, args.retention_days)
+            print(f"🔎 {pending} closed reports older than {args.retention_days} days would be archived")
+            return
+
+        async with engine.begin() as conn:
+            created = await ensure_partitions(conn, args.months_ahead)
+        if created:
+            print(f"✅ Created partitions: {', '.join(created)}")
+
+        result = await archive_closed_reports(engine, args.retention_days, args.batch_size, args.max_batches)
+        print(f"✅ Archived {result['archived']} reports in {result['batches']} batches "
+              f"({result['elapsed_seconds']}s)")
+
+        if args.drop_empty:
+            async with engine.begin() as conn:
+                dropped = await drop_empty_partitions(conn, args.retention_days)
+            print(f"🧹 Dropped {len(dropped)} empty partitions{': ' + ', '.join(dropped) if dropped else ''}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+# benchmark_lanes.py
+# Tail latency of citizen submissions with and without a concurrent admin
+# analytics load, per lane (app/lanes.py):
+#   baseline - submitters only: report creation + login
+#   mixed    - the same submitters while analytics clients hammer the dashboard,
+#              department, map and issue list routes
+#
+#   python benchmark_lanes.py --base-url http://localhost:8000 --admin-email a@b.c --admin-password ...
+#   python benchmark_lanes.py --submitters 20 --analysts 40 --seconds 30
+#
+# Runs against a live server. Start it once as is and once with LANES_ENABLED=false
+# to compare; with lanes the submission p99 should hardly move between the two
+# phases while analytics queues (and sheds with 503) inside its own quota.
+# Reports are created with a marker email and deleted from DATABASE_URL afterwards.
+import argparse
+import asyncio
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import delete, select
+
+from app.database import AsyncSessionLocal, engine
+from app.models import Report
+from app.report_writer import delete_report_rows
+
+BENCH_EMAIL = "lane-benchmark@urbanissues.local"
+
+ANALYTICS_ROUTES = (
+    "/api/admin/dashboard/department-performance",
+    "/api/departments/resolution-trends",
+    "/api/admin/map/issues",
+    "/api/admin/issues",
+)
+
+
+def report_payload(i):
+    return {
+        "user_name": "Lane Benchmark",
+        "user_mobile": "9999999999",
+        "user_email": BENCH_EMAIL,
+        "urgency_level": "Medium",
+        "title": f"Lane benchmark report {i}",
+        "description": f"Streetlight {i} on the benchmark road is not working",
+        "location_lat": 18.52 + (i % 100) / 10000,
+        "location_long": 73.85 + (i % 100) / 10000,
+        "location_address": "Benchmark Road",
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, lane, started, status_code):
+        self.latencies[lane].append((time.perf_counter() - started) * 1000)
+        self.statuses[lane][status_code] += 1
+
+    def report(self, phase, seconds):
+        for lane in sorted(self.latencies):
+            timings = np.array(self.latencies[lane])
+            statuses = self.statuses[lane]
+            print(f"   {phase:<8} {lane:<10} n={len(timings):6d}  {len(timings) / seconds:7.1f} req/s  "
+                  f"p50={np.percentile(timings, 50):8.1f}ms  p95={np.percentile(timings, 95):8.1f}ms  "
+                  f"p99={np.percentile(timings, 99):8.1f}ms  503={statuses[503]}  "
+                  f"errors={sum(n for code, n in statuses.items() if code >= 400 and code != 503)}")
+
+
+async def submitter(client, recorder, deadline, worker, login):
+    i = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if login and i % 4 == 3:
+            response = await client.post("/api/login", json=login)
+        else:
+            response = await client.post("/api/reports/", params={"force_new": "true"},
+                                         json=report_payload(worker * 100000 + i))
+        recorder.record("submission", started, response.status_code)
+        i += 1
+
+
+async def analyst(client, recorder, deadline, worker, headers):
+    i = worker
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(ANALYTICS_ROUTES[i % len(ANALYTICS_ROUTES)], headers=headers)
+        recorder.record("analytics", started, response.status_code)
+        if response.status_code == 503:
+            # Back off as told, like a well-behaved dashboard would
+            await asyncio.sleep(min(float(response.headers.get("retry-after", "1")), 1.0))
+        i += 1
+
+
+async def run_phase(client, phase, args, login, admin_headers):
+    recorder = Recorder()
+    deadline = time.perf_counter() + args.seconds
+    tasks = [submitter(client, recorder, deadline, w, login) for w in range(args.submitters)]
+    if phase == "mixed":
+        tasks += [analyst(client, recorder, deadline, w, admin_headers) for w in range(args.analysts)]
+    await asyncio.gather(*tasks)
+    recorder.report(phase, args.seconds)
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        bench_ids = (await db.execute(select(Report.id).where(Report.user_email == BENCH_EMAIL))).scalars().all()
+        await delete_report_rows(db, bench_ids)
+        result = await db.execute(delete(Report).where(Report.user_email == BENCH_EMAIL))
+        await db.commit()
+    return result.rowcount
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Priority lane mixed-workload benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--submitters", type=int, default=20, help="Concurrent citizen clients")
+    parser.add_argument("--analysts", type=int, default=40, help="Concurrent analytics clients (mixed phase)")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of each phase")
+    parser.add_argument("--admin-email", help="Admin account for the analytics routes and the login mix")
+    parser.add_argument("--admin-password")
+    parser.add_argument("--keep", action="store_true", help="Don't delete the benchmark reports")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.submitters + args.analysts + 10)
+    try:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+            status = (await client.get("/")).status_code
+            print(f"🚦 {args.base_url} (status {status}), {args.submitters} submitters, "
+                  f"{args.analysts} analysts, {args.seconds:g}s per phase")
+
+            login, admin_headers = None, {}
+            if args.admin_email and args.admin_password:
+                login = {"email": args.admin_email, "password": args.admin_password}
+                response = await client.post("/api/login", json=login)
+                response.raise_for_status()
+                admin_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            for phase in ("baseline", "mixed"):
+                await run_phase(client, phase, args, login, admin_headers)
+
+            lanes = await client.get("/api/admin/metrics/lanes", headers=admin_headers)
+            if lanes.status_code == 200:
+                for name, lane in lanes.json()["lanes"].items():
+                    concurrency = lane["concurrency"]
+                    shed = concurrency["shed_total"] if isinstance(concurrency, dict) else 0
+                    print(f"   server   {name:<10} served={lane['served']}  shed={shed}  "
+                          f"latency={lane['latency_ms']}")
+    finally:
+        if not args.keep:
+            print(f"🧹 Deleted {await cleanup()} benchmark reports")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
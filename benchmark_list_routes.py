@@ -0,0 +1,203 @@
+# benchmark_list_routes.py
+# Time and memory of the list routes from query to response bytes, before and
+# after the projection layer (app/projections.py):
+#   before - select(Report) ORM entities, dicts / Pydantic models built in a loop,
+#            FastAPI's response_model validation + jsonable_encoder + json.dumps
+#   after  - column-limited select, __slots__ row DTOs, orjson
+#
+#   python benchmark_list_routes.py
+#   python benchmark_list_routes.py --routes admin_issues map_issues --iterations 20
+#
+# Read-only: runs against whatever DATABASE_URL holds, so seed it with realistic
+# data (e.g. bulk_ingest_reports.py) first. Memory is the tracemalloc peak.
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, engine
+from app.models import Report
+from app.projections import (
+    dumps, AdminIssueRow, MapIssueRow, AutoAssignedIssueRow, RecentReportRow, ReportRow,
+)
+from app.schemas import MapIssueResponse, MapIssuesResponse
+
+
+def fastapi_json(content):
+    # What FastAPI does with a returned dict / model before the response is sent
+    return json.dumps(jsonable_encoder(content)).encode()
+
+
+# ---------- before ----------
+
+async def admin_issues_before(db):
+    issues = (await db.execute(select(Report))).scalars().all()
+    issues_list = []
+    for issue in issues:
+        if issue.location_lat is None or issue.location_long is None:
+            continue
+        issues_list.append({
+            "id": issue.id,
+            "user_name": issue.user_name,
+            "user_email": issue.user_email,
+            "title": issue.title,
+            "description": issue.description,
+            "urgency_level": issue.urgency_level,
+            "status": issue.status,
+            "location_address": issue.location_address,
+            "location_lat": issue.location_lat,
+            "location_long": issue.location_long,
+            "assigned_department": issue.assigned_department,
+            "created_at": issue.created_at.isoformat() if issue.created_at else None,
+        })
+    return fastapi_json({"issues": issues_list})
+
+
+async def map_issues_before(db):
+    stmt = select(Report).where(Report.location_lat.isnot(None), Report.location_long.isnot(None))
+    reports = (await db.execute(stmt)).scalars().all()
+    map_issues = [
+        MapIssueResponse(
+            id=report.id,
+            title=report.title or "Untitled Issue",
+            status=report.status or "Pending",
+            urgency_level=report.urgency_level or "Medium",
+            location_lat=report.location_lat,
+            location_long=report.location_long,
+            description=report.description,
+            created_at=report.created_at or datetime.utcnow(),
+            user_email=report.user_email,
+            location_address=report.location_address,
+        )
+        for report in reports
+    ]
+    response = MapIssuesResponse(issues=map_issues)
+    # response_model=MapIssuesResponse validates the returned model once more
+    return fastapi_json(MapIssuesResponse.model_validate(response.model_dump()))
+
+
+async def auto_assigned_before(db):
+    stmt = select(Report).where(Report.auto_assigned == True, Report.created_at >= datetime.utcnow() - timedelta(days=365))
+    issues = (await db.execute(stmt)).scalars().all()
+    issues_data = [{
+        "id": issue.id,
+        "description": issue.description,
+        "department": issue.department,
+        "prediction_confidence": issue.prediction_confidence,
+        "status": issue.status,
+        "created_at": issue.created_at.isoformat() if issue.created_at else None,
+        "category": issue.category,
+    } for issue in issues]
+    return fastapi_json({"issues": issues_data, "count": len(issues_data), "department": "all", "period": "year"})
+
+
+async def recent_reports_before(db, limit=100):
+    reports = (await db.execute(select(Report).order_by(Report.created_at.desc()).limit(limit))).scalars().all()
+    return fastapi_json({"recent_reports": [{
+        "id": report.id,
+        "title": report.title,
+        "description": report.description,
+        "location": report.location_address or "Location not specified",
+        "status": report.status or "Pending",
+        "department": report.department or "Not assigned",
+        "created_at": report.created_at.isoformat(),
+    } for report in reports]})
+
+
+async def read_reports_before(db, limit=1000):
+    reports = (await db.execute(select(Report).limit(limit))).scalars().all()
+    return fastapi_json(reports)
+
+
+# ---------- after ----------
+
+async def admin_issues_after(db):
+    stmt = AdminIssueRow.select().where(Report.location_lat.isnot(None), Report.location_long.isnot(None))
+    return dumps({"issues": AdminIssueRow.from_rows((await db.execute(stmt)).all())})
+
+
+async def map_issues_after(db):
+    stmt = MapIssueRow.select().where(Report.location_lat.isnot(None), Report.location_long.isnot(None))
+    return dumps({"issues": MapIssueRow.from_rows((await db.execute(stmt)).all())})
+
+
+async def auto_assigned_after(db):
+    stmt = AutoAssignedIssueRow.select().where(
+        Report.auto_assigned == True, Report.created_at >= datetime.utcnow() - timedelta(days=365)
+    )
+    issues_data = AutoAssignedIssueRow.from_rows((await db.execute(stmt)).all())
+    return dumps({"issues": issues_data, "count": len(issues_data), "department": "all", "period": "year"})
+
+
+async def recent_reports_after(db, limit=100):
+    stmt = RecentReportRow.select().order_by(Report.created_at.desc()).limit(limit)
+    return dumps({"recent_reports": [row.as_dict() for row in RecentReportRow.from_rows((await db.execute(stmt)).all())]})
+
+
+async def read_reports_after(db, limit=1000):
+    return dumps(ReportRow.from_rows((await db.execute(ReportRow.select().limit(limit))).all()))
+
+
+ROUTES = {
+    "admin_issues": ("GET /api/admin/issues", admin_issues_before, admin_issues_after),
+    "map_issues": ("GET /api/admin/map/issues", map_issues_before, map_issues_after),
+    "auto_assigned": ("GET /api/ai/auto-assigned-issues?period=year", auto_assigned_before, auto_assigned_after),
+    "recent_reports": ("GET /api/admin/dashboard/recent-reports?limit=100", recent_reports_before, recent_reports_after),
+    "read_reports": ("GET /reports/?limit=1000", read_reports_before, read_reports_after),
+}
+
+
+async def measure(fn, iterations):
+    timings, peaks, size = [], [], 0
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as db:
+            tracemalloc.start()
+            start = time.perf_counter()
+            body = await fn(db)
+            timings.append((time.perf_counter() - start) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        size = len(body)
+    return np.array(timings), max(peaks), size
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="List route serialization benchmark")
+    parser.add_argument("--routes", nargs="+", choices=list(ROUTES), default=list(ROUTES))
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            # Warm the connection pool and the statement caches
+            for name in args.routes:
+                await ROUTES[name][1](db)
+                await ROUTES[name][2](db)
+
+        for name in args.routes:
+            label, before, after = ROUTES[name]
+            print(f"📋 {label}")
+            results = {}
+            for phase, fn in (("before", before), ("after", after)):
+                timings, peak, size = await measure(fn, args.iterations)
+                results[phase] = (np.median(timings), peak)
+                print(f"   {phase:<7} p50={np.median(timings):8.2f}ms  p95={np.percentile(timings, 95):8.2f}ms  "
+                      f"peak={peak / 1024 / 1024:7.2f} MiB  body={size / 1024:8.1f} KiB")
+            print(f"   ⚡ {results['before'][0] / results['after'][0]:.1f}x faster, "
+                  f"{results['before'][1] / max(results['after'][1], 1):.1f}x less memory")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+# benchmark_map_payload.py
+# Payload size and serialization time of the map issue formats at 50k markers:
+#   full     - MapIssuesResponse, one object per issue (what format=full returns)
+#   compact  - columnar JSON (format=compact)
+#   binary   - columnar little-endian typed arrays (format=binary)
+#
+#   python benchmark_map_payload.py
+#   python benchmark_map_payload.py --markers 200000 --iterations 5
+#
+# Uses synthetic rows, so no database is needed. "serialize" is the time from
+# fetched rows to response bytes; gzip sizes show what a compressing proxy sends.
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from app.map_payload import MapColumns, decode_binary, MAP_COORD_SCALE
+from app.schemas import MapIssueResponse, MapIssuesResponse
+
+STATUSES = ["Reported", "Pending", "In Progress", "Resolved"]
+URGENCIES = ["low", "medium", "high", "critical"]
+
+
+def synthetic_rows(n_markers, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    rows = []
+    for report_id in range(1, n_markers + 1):
+        rows.append({
+            "id": report_id,
+            "title": f"Pothole near junction {rng.randint(1, 5000)}",
+            "status": rng.choice(STATUSES),
+            "urgency_level": rng.choice(URGENCIES),
+            "location_lat": 12.85 + rng.random() * 0.25,
+            "location_long": 77.45 + rng.random() * 0.3,
+            "description": "Large pothole causing traffic slowdowns, reported by several residents " * 2,
+            "created_at": start + timedelta(minutes=report_id),
+            "user_email": f"citizen{rng.randint(1, 20000)}@example.com",
+            "location_address": f"{rng.randint(1, 300)} MG Road, Bengaluru",
+        })
+    return rows
+
+
+def serialize_full(rows):
+    # What FastAPI does for response_model=MapIssuesResponse
+    response = MapIssuesResponse(issues=[MapIssueResponse(**row) for row in rows])
+    return json.dumps(jsonable_encoder(response)).encode()
+
+
+def serialize_compact(rows):
+    return MapColumns([
+        (row["id"], row["location_lat"], row["location_long"], row["status"], row["urgency_level"]) for row in rows
+    ]).to_json()
+
+
+def serialize_binary(rows):
+    return MapColumns([
+        (row["id"], row["location_lat"], row["location_long"], row["status"], row["urgency_level"]) for row in rows
+    ]).to_binary()
+
+
+FORMATS = {"full": serialize_full, "compact": serialize_compact, "binary": serialize_binary}
+
+
+def check_round_trip(rows, compact, binary):
+    decoded = decode_binary(binary)
+    as_json = json.loads(compact)
+    assert decoded["count"] == as_json["count"] == len(rows)
+    assert decoded["ids"].tolist() == as_json["ids"]
+    max_error = np.abs(decoded["lat"] / MAP_COORD_SCALE - np.array([row["location_lat"] for row in rows])).max()
+    print(f"🔎 Round trip ok, max coordinate error {max_error * 111_000:.2f} m")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map payload format benchmark")
+    parser.add_argument("--markers", type=int, default=50_000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.markers)
+    print(f"📍 {args.markers} markers, {args.iterations} iterations per format")
+
+    payloads = {}
+    baseline = None
+    for name, serialize in FORMATS.items():
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            payloads[name] = serialize(rows)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings = np.array(timings)
+        size, gzipped = len(payloads[name]), len(gzip.compress(payloads[name], 6))
+        baseline = baseline or (size, np.median(timings))
+        print(
+            f"{name:<8} {size / 1024:9.1f} KiB  gzip {gzipped / 1024:8.1f} KiB  "
+            f"serialize p50={np.median(timings):8.2f}ms  p95={np.percentile(timings, 95):8.2f}ms  "
+            f"({baseline[0] / size:5.1f}x smaller, {baseline[1] / np.median(timings):5.1f}x faster)"
+        )
+
+    check_round_trip(rows, payloads["compact"], payloads["binary"])
+
+
+if __name__ == "__main__":
+    main()
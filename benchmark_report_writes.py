@@ -0,0 +1,158 @@
+# benchmark_report_writes.py
+# Write throughput of report creation at 1, 50 and 500 concurrent submitters:
+#   orm     - the old path: Status lookup, add + flush, commit, refresh
+#   single  - one INSERT ... RETURNING id per report (what create_report does by default)
+#   group   - group commit (REPORT_GROUP_COMMIT=true), one transaction per batch
+#
+#   python benchmark_report_writes.py --reports 2000
+#   python benchmark_report_writes.py --concurrency 500 --modes single group --window-ms 10
+#
+# Needs a migrated database; rows are written with a marker email and deleted afterwards.
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import delete, select
+
+from app.database import AsyncSessionLocal, engine
+from app.models import Report, ReportVector, Status
+from app.report_writer import GroupCommitter, NewReport, insert_report, status_ids
+
+BENCH_EMAIL = "write-benchmark@urbanissues.local"
+MODES = ("orm", "single", "group")
+
+# A small encoded TF-IDF vector so every report also writes its report_vectors row
+VECTOR = {
+    "term_ids": np.arange(16, dtype=np.uint32).tobytes(),
+    "weights": np.full(16, 0.25, dtype=np.float16).tobytes(),
+    "vocab_size": 16,
+}
+
+
+def report_values(i, status_id):
+    return {
+        "user_name": "Write Benchmark",
+        "user_mobile": "9999999999",
+        "user_email": BENCH_EMAIL,
+        "urgency_level": "low",
+        "title": f"Benchmark report {i}",
+        "description": f"Synthetic report {i} written by benchmark_report_writes.py",
+        "issue_type": "General",
+        "category": "General",
+        "location_lat": 12.9 + (i % 1000) * 1e-4,
+        "location_long": 77.5 + (i % 997) * 1e-4,
+        "status": "Reported",
+        "status_id": status_id,
+        "department": "other",
+        "auto_assigned": False,
+        "text_simhash": i,
+    }
+
+
+async def write_orm(i, status_id, committer):
+    async with AsyncSessionLocal() as db:
+        reported = (await db.execute(select(Status).where(Status.name == "Reported"))).scalar_one()
+        report = Report(**{**report_values(i, status_id), "status_id": reported.id})
+        db.add(report)
+        await db.flush()
+        db.add(ReportVector(report_id=report.id, **VECTOR))
+        await db.commit()
+        await db.refresh(report)
+        return report.id
+
+
+async def write_single(i, status_id, committer):
+    async with AsyncSessionLocal() as db:
+        return await insert_report(db, NewReport(report_values(i, status_id), VECTOR))
+
+
+async def write_group(i, status_id, committer):
+    return await committer.submit(NewReport(report_values(i, status_id), VECTOR))
+
+
+WRITERS = {"orm": write_orm, "single": write_single, "group": write_group}
+
+
+async def run(mode, concurrency, n_reports, status_id, window_ms):
+    committer = None
+    if mode == "group":
+        committer = GroupCommitter(AsyncSessionLocal, window_ms=window_ms)
+        committer.start()
+
+    write = WRITERS[mode]
+    counter = iter(range(n_reports))
+    latencies, errors = [], 0
+
+    async def submitter():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await write(i, status_id, committer)
+            except Exception as e:
+                errors += 1
+                if errors == 1:
+                    print(f"   ⚠️ {mode}: {str(e)[:200]}")
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(submitter() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    line = f"{mode:<7} c={concurrency:<4} {len(latencies) / elapsed:9.1f} reports/s"
+    if latencies:
+        timings = np.array(latencies)
+        line += (f"  p50={np.percentile(timings, 50):7.2f}ms  p95={np.percentile(timings, 95):7.2f}ms"
+                 f"  p99={np.percentile(timings, 99):7.2f}ms")
+    if errors:
+        line += f"  errors={errors}"
+    if committer is not None:
+        await committer.stop()
+        stats = committer.status()
+        line += f"  avg_batch={stats['avg_batch']} largest={stats['largest_batch']}"
+    print(line)
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        bench_ids = select(Report.id).where(Report.user_email == BENCH_EMAIL).scalar_subquery()
+        await db.execute(delete(ReportVector).where(ReportVector.report_id.in_(bench_ids)))
+        result = await db.execute(delete(Report).where(Report.user_email == BENCH_EMAIL))
+        await db.commit()
+    return result.rowcount
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Report write throughput benchmark")
+    parser.add_argument("--reports", type=int, default=2000, help="Reports written per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--window-ms", type=float, default=5.0, help="Group commit window")
+    parser.add_argument("--keep", action="store_true", help="Don't delete the benchmark rows")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        status_id = await status_ids.get(db, "Reported")
+    if status_id is None:
+        raise SystemExit("❌ Reported status not found - run seed_data.py first")
+
+    pool = engine.pool
+    print(f"🔌 Connection pool: size={pool.size()} max_overflow={pool._max_overflow}")
+    try:
+        for concurrency in args.concurrency:
+            for mode in args.modes:
+                await run(mode, concurrency, args.reports, status_id, args.window_ms)
+    finally:
+        if not args.keep:
+            print(f"🧹 Deleted {await cleanup()} benchmark reports")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
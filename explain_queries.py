@@ -0,0 +1,69 @@
+# explain_queries.py
+# Prints the Postgres plan for the dashboard date-range queries and flags any
+# that fall back to a sequential scan of reports.
+#
+#   python explain_queries.py            # EXPLAIN
+#   python explain_queries.py --analyze  # EXPLAIN (ANALYZE, BUFFERS) - runs the queries
+import argparse
+import asyncio
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+
+load_dotenv()
+
+from app.database import AsyncSessionLocal
+from app.models import Report
+from app.query_utils import day_range, day_start, explain, uses_index
+
+
+def dashboard_queries(user_email: str):
+    today = date.today()
+    today_start, today_end = day_range(today)
+    week_start = day_start(today - relativedelta(days=today.weekday()))
+
+    return {
+        "resolved today (count)": select(func.count(Report.id)).where(
+            Report.resolved_at >= today_start, Report.resolved_at < today_end
+        ),
+        "resolved today (feed)": select(Report.id).where(
+            Report.resolved_at >= today_start, Report.resolved_at < today_end
+        ).order_by(Report.resolved_at.desc()).limit(10),
+        "created today (feed)": select(Report.id).where(
+            Report.created_at >= today_start, Report.created_at < today_end
+        ).order_by(Report.created_at.desc()).limit(10),
+        "user reports today": select(func.count(Report.id)).where(
+            Report.user_email == user_email,
+            Report.created_at >= today_start,
+            Report.created_at < today_end,
+        ),
+        "user reports this week": select(func.count(Report.id)).where(
+            Report.user_email == user_email, Report.created_at >= week_start
+        ),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the dashboard date-range queries")
+    parser.add_argument("--analyze", action="store_true")
+    parser.add_argument("--user-email", default="citizen@example.com")
+    args = parser.parse_args()
+
+    failures = 0
+    async with AsyncSessionLocal() as session:
+        for name, stmt in dashboard_queries(args.user_email).items():
+            plan = await explain(session, stmt, analyze=args.analyze)
+            ok = uses_index(plan)
+            failures += not ok
+            print(f"\n{'✅' if ok else '❌'} {name}")
+            for line in plan:
+                print(f"    {line}")
+
+    # On a near-empty table the planner may still prefer a seq scan - test against real volumes
+    print(f"\n{'✅ All queries use an index' if not failures else f'❌ {failures} queries scan reports sequentially'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
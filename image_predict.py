@@ -1,6 +1,7 @@
 # image_predict.py - FIXED VERSION
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+import os
 import tensorflow as tf
 from tensorflow.keras.preprocessing import image
 import numpy as np
@@ -17,10 +18,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _default_intra_op_threads():
+    """Split the cores between uvicorn workers instead of letting each one grab all of them"""
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+# Thread pools must be sized before TensorFlow executes its first op
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", _default_intra_op_threads()))
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "1"))
+TF_JIT_COMPILE = os.getenv("TF_JIT_COMPILE", "true").lower() == "true"
+
+tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS)
+tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+
+from app.model_registry import model_registry
+
 # Load model
 MODEL_PATH = "civic_eye_model.h5"
 model = tf.keras.models.load_model(MODEL_PATH)
 
+IMAGE_SIZE = (224, 224)
+SINGLE_IMAGE_SIGNATURE = tf.TensorSpec(shape=(1, *IMAGE_SIZE, 3), dtype=tf.float32)
+BATCH_IMAGE_SIGNATURE = tf.TensorSpec(shape=(None, *IMAGE_SIZE, 3), dtype=tf.float32)
+IMAGE_BATCH_SIZE = int(os.getenv("IMAGE_BATCH_SIZE", "32"))
+
 # Original class labels from your model
 original_class_labels = ["garbage", "pothole", "streetlight", "water_leakage"]
 
@@ -32,14 +53,121 @@ department_mapping = {
     "water_leakage": "water_dept"
 }
 
+def _build_single_image_fn(embedding_model, jit_compile):
+    @tf.function(input_signature=[SINGLE_IMAGE_SIGNATURE], jit_compile=jit_compile)
+    def serve(batch):
+        return embedding_model(batch, training=False)
+    return serve
+
+
+def _compile_single_image_fn(embedding_model):
+    """
+    Trace the model once for a fixed (1, 224, 224, 3) float32 input and warm it up,
+    so requests skip Keras' predict() batching machinery and retracing entirely.
+    Falls back to a plain graph when XLA can't compile the model on this CPU.
+    """
+    warmup = tf.zeros(SINGLE_IMAGE_SIGNATURE.shape, dtype=tf.float32)
+    if TF_JIT_COMPILE:
+        try:
+            serve = _build_single_image_fn(embedding_model, jit_compile=True)
+            serve(warmup)
+            return serve
+        except Exception as e:
+            print(f"⚠️ XLA compile failed, using plain graph: {str(e)}")
+    serve = _build_single_image_fn(embedding_model, jit_compile=False)
+    serve(warmup)
+    return serve
+
+
+class ImageModel:
+    """A loaded civic_eye_model with its compiled single-image and batch serving functions"""
+
+    def __init__(self, keras_model):
+        self.model = keras_model
+        # Penultimate layer output doubles as an image embedding for duplicate lookups,
+        # computed in the same forward pass as the class probabilities
+        self.embedding_model = tf.keras.Model(
+            inputs=keras_model.inputs,
+            outputs=[keras_model.output, keras_model.layers[-2].output]
+        )
+        self._serve_single = _compile_single_image_fn(self.embedding_model)
+        self._serve_batch = tf.function(
+            lambda batch: self.embedding_model(batch, training=False),
+            input_signature=[BATCH_IMAGE_SIGNATURE]
+        )
+
+    @classmethod
+    def load(cls, directory="."):
+        return cls(tf.keras.models.load_model(os.path.join(directory, os.path.basename(MODEL_PATH))))
+
+    def predict_single_with_embedding(self, processed_image):
+        batch = tf.convert_to_tensor(processed_image, dtype=tf.float32)
+        probabilities, embedding = self._serve_single(batch)
+        return probabilities.numpy()[0], embedding.numpy()[0].reshape(-1)
+
+    def predict_batch_with_embedding(self, processed_images):
+        probabilities, embeddings = [], []
+        for start in range(0, len(processed_images), IMAGE_BATCH_SIZE):
+            batch = np.concatenate(processed_images[start:start + IMAGE_BATCH_SIZE], axis=0)
+            batch_probabilities, batch_embeddings = self._serve_batch(tf.convert_to_tensor(batch, dtype=tf.float32))
+            probabilities.extend(batch_probabilities.numpy())
+            embeddings.extend(batch_embeddings.numpy().reshape(len(batch), -1))
+        return probabilities, embeddings
+
+
+# The .h5 in the repo root is the baseline, newer versions come from the registry
+model_registry.register("image", ImageModel.load, ImageModel(model))
+
+
 def preprocess_image(file_bytes):
     """Preprocess image for model prediction"""
-    img = Image.open(io.BytesIO(file_bytes))
-    img = img.resize((224, 224))
-    img_array = image.img_to_array(img)
-    img_array = np.expand_dims(img_array, axis=0) / 255.0
+    img = Image.open(io.BytesIO(file_bytes)).convert("RGB")
+    img = img.resize(IMAGE_SIZE)
+    img_array = image.img_to_array(img, dtype="float32")
+    img_array = np.expand_dims(img_array, axis=0) / np.float32(255.0)
     return img_array
 
+def _single_label(result):
+    return [int(np.argmax(result[0]))]
+
+def _batch_labels(result):
+    return [int(np.argmax(p)) for p in result[0]]
+
+def predict_single_with_embedding(processed_image):
+    """Low-latency prediction for one preprocessed image, returns (class probabilities, embedding)"""
+    return model_registry.run(
+        "image", ImageModel.predict_single_with_embedding, processed_image, labels=_single_label
+    )
+
+def predict_single(processed_image):
+    """Low-latency prediction for one preprocessed image, returns the class probabilities"""
+    return predict_single_with_embedding(processed_image)[0]
+
+def _label_probabilities(probabilities):
+    class_idx = int(np.argmax(probabilities))
+    original_pred = original_class_labels[class_idx]
+    confidence = float(probabilities[class_idx]) * 100
+    return department_mapping.get(original_pred, "other"), original_pred, confidence
+
+def classify_image(processed_image):
+    """Returns (department, original_prediction, confidence %) for one preprocessed image"""
+    return _label_probabilities(predict_single(processed_image))
+
+def classify_image_with_embedding(processed_image):
+    """Returns (department, original_prediction, confidence %, embedding) for one preprocessed image"""
+    probabilities, embedding = predict_single_with_embedding(processed_image)
+    return (*_label_probabilities(probabilities), embedding)
+
+def classify_images_with_embedding(processed_images):
+    """Batched classify_image_with_embedding for a list of preprocessed images, in input order"""
+    probabilities, embeddings = model_registry.run(
+        "image", ImageModel.predict_batch_with_embedding, processed_images, labels=_batch_labels
+    )
+    return [
+        (*_label_probabilities(row_probabilities), embedding)
+        for row_probabilities, embedding in zip(probabilities, embeddings)
+    ]
+
 @app.get("/")
 async def root():
     return {"message": "Civic Eye Image Model API"}
@@ -54,14 +182,8 @@ async def predict_image(file: UploadFile = File(...)):
         image_bytes = await file.read()
         processed_image = preprocess_image(image_bytes)
         
-        # Predict
-        predictions = model.predict(processed_image)
-        class_idx = np.argmax(predictions[0])
-        original_pred = original_class_labels[class_idx]
-        confidence = float(predictions[0][class_idx]) * 100
-        
-        # Map to department (lowercase with underscore)
-        department = department_mapping.get(original_pred, "other")
+        # Predict and map to department (lowercase with underscore)
+        department, original_pred, confidence = classify_image(processed_image)
         
         print(f"🤖 Image Prediction: {original_pred} -> {department} ({confidence:.2f}%)")
         
@@ -0,0 +1,467 @@
+# loadtest.py
+# Async load generator for the API. Scenario files in loadtests/ describe a
+# traffic mix (citizens submitting reports, admins polling dashboards, map
+# panning, login storms); a run drives a live server with it and reports
+# throughput and p50/p95/p99 per route, and two runs can be compared.
+#
+#   uvicorn main:app --port 8000        # local server on local Postgres
+#   python loadtest.py run loadtests/citizen_submissions.json --out before.json
+#   python loadtest.py run loadtests/map_panning.json --users 80 --duration 60
+#   python loadtest.py compare before.json after.json --threshold 10
+#   python loadtest.py cleanup
+#
+# Runs are reproducible: every virtual user draws its requests, parameters and
+# think times from a random generator seeded by the scenario's seed, so the
+# same scenario sends the same traffic to the same routes each time.
+#
+# Scenarios with "users" are closed-loop: each virtual user waits for its
+# response, thinks, sends the next. Scenarios with "rate_per_second" are
+# open-loop: requests start on a fixed (seeded Poisson) schedule whether or not
+# the server keeps up, latency counts from the scheduled start, and "users"
+# caps the requests in flight.
+#
+# Citizen accounts (loadtest-<n>@loadtest.example.com) are registered on first
+# use and reused by later runs. Reports filed by a run are deleted from
+# DATABASE_URL afterwards unless --keep is given; `cleanup` does the same.
+# Admin routes need --admin-email / --admin-password (or LOADTEST_ADMIN_EMAIL /
+# LOADTEST_ADMIN_PASSWORD).
+#
+# `compare` exits with 1 when a route regressed, so it can gate a CI job.
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOADTEST_DOMAIN = "loadtest.example.com"
+ACCOUNT_PASSWORD = "loadtest-password"
+RESULTS_DIR = os.path.join("loadtests", "results")
+
+_VARIABLE = re.compile(r"^\{(\w+)\}$")
+
+
+# ---------- scenarios ----------
+
+def load_scenario(path, overrides):
+    with open(path, "rb") as f:
+        raw = f.read()
+    scenario = {
+        "seed": 1,
+        "duration_seconds": 30,
+        "warmup_seconds": 5,
+        "users": 20,
+        "rate_per_second": None,
+        "think_time_ms": [0, 0],
+        "accounts": 0,
+        "admin": False,
+        "area": {"south": 18.45, "north": 18.62, "west": 73.75, "east": 73.95},
+        "viewport_degrees": [0.02, 0.1],
+        **json.loads(raw),
+        **{key: value for key, value in overrides.items() if value is not None},
+    }
+    scenario["name"] = scenario.get("name") or os.path.splitext(os.path.basename(path))[0]
+    scenario["file_sha256"] = hashlib.sha256(raw).hexdigest()
+    for request in scenario["requests"]:
+        request.setdefault("name", f"{request['method']} {request['path']}")
+        request.setdefault("weight", 1)
+    return scenario
+
+
+def render(value, variables):
+    """Fill "{name}" templates; a bare "{name}" keeps the variable's type (numbers stay numbers)"""
+    if isinstance(value, str):
+        match = _VARIABLE.match(value)
+        if match and match.group(1) in variables:
+            return variables[match.group(1)]
+        return value.format_map(variables)
+    if isinstance(value, dict):
+        return {key: render(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render(item, variables) for item in value]
+    return value
+
+
+def render_params(params, variables, rng):
+    # A list of query parameter values means "one of these"
+    return {
+        key: render(rng.choice(value) if isinstance(value, list) else value, variables)
+        for key, value in (params or {}).items()
+    }
+
+
+class VirtualUser:
+    def __init__(self, scenario, index, accounts, admin):
+        self.scenario = scenario
+        self.index = index
+        self.rng = random.Random(f"{scenario['seed']}:{index}")
+        self.account = accounts[index % len(accounts)] if accounts else None
+        self.admin = admin
+        self.sent = 0
+
+    def variables(self):
+        area, rng = self.scenario["area"], self.rng
+        size = rng.uniform(*self.scenario["viewport_degrees"])
+        lat = rng.uniform(area["south"], area["north"])
+        lng = rng.uniform(area["west"], area["east"])
+        self.sent += 1
+        return {
+            "user": self.index,
+            "seq": self.sent,
+            "lat": round(lat, 6),
+            "lng": round(lng, 6),
+            "south": round(max(area["south"], lat - size / 2), 6),
+            "north": round(min(area["north"], lat + size / 2), 6),
+            "west": round(max(area["west"], lng - size / 2), 6),
+            "east": round(min(area["east"], lng + size / 2), 6),
+            "account_email": self.account["email"] if self.account else "",
+            "account_password": ACCOUNT_PASSWORD,
+            "domain": LOADTEST_DOMAIN,
+        }
+
+    def next_request(self):
+        requests = self.scenario["requests"]
+        spec = self.rng.choices(requests, weights=[request["weight"] for request in requests])[0]
+        variables = self.variables()
+        headers = dict(render(spec.get("headers", {}), variables))
+        auth = spec.get("auth")
+        token = self.account["token"] if auth == "account" and self.account else self.admin if auth == "admin" else None
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return spec, {
+            "method": spec["method"],
+            "url": render(spec["path"], variables),
+            "params": render_params(spec.get("params"), variables, self.rng),
+            "json": render(spec["json"], variables) if "json" in spec else None,
+            "headers": headers,
+        }
+
+    def think(self):
+        low, high = self.scenario["think_time_ms"]
+        return self.rng.uniform(low, high) / 1000
+
+
+# ---------- running ----------
+
+class Results:
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.error_samples = {}
+
+    def record(self, spec, started, finished, status_code, error=None):
+        if started < self.measure_from:
+            return
+        name = spec["name"]
+        self.latencies[name].append((finished - started) * 1000)
+        self.statuses[name][status_code] += 1
+        expected = spec.get("expect")
+        ok = status_code in expected if expected else 200 <= status_code < 300
+        if not ok:
+            self.errors[name] += 1
+            self.error_samples.setdefault(name, error or f"HTTP {status_code}")
+
+    def summary(self, seconds):
+        routes = {}
+        for name, timings in sorted(self.latencies.items()):
+            timings = np.array(timings)
+            routes[name] = {
+                "requests": len(timings),
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / len(timings), 4),
+                "first_error": self.error_samples.get(name),
+                "statuses": {str(code): count for code, count in sorted(self.statuses[name].items())},
+                "throughput_rps": round(len(timings) / seconds, 2),
+                "latency_ms": latency_summary(timings),
+            }
+        everything = np.concatenate([np.array(t) for t in self.latencies.values()]) if self.latencies else np.array([])
+        total = {
+            "requests": int(everything.size),
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(everything.size / seconds, 2),
+            "latency_ms": latency_summary(everything) if everything.size else None,
+        }
+        return routes, total
+
+
+def latency_summary(timings):
+    return {
+        "mean": round(float(timings.mean()), 2),
+        "p50": round(float(np.percentile(timings, 50)), 2),
+        "p95": round(float(np.percentile(timings, 95)), 2),
+        "p99": round(float(np.percentile(timings, 99)), 2),
+        "max": round(float(timings.max()), 2),
+    }
+
+
+async def send(client, spec, request, results, started):
+    try:
+        response = await client.request(**request)
+        results.record(spec, started, time.perf_counter(), response.status_code)
+    except httpx.HTTPError as e:
+        results.record(spec, started, time.perf_counter(), 0, f"{type(e).__name__}: {str(e)}")
+
+
+async def closed_loop(client, users, results, deadline, ramp_up):
+    async def run_user(user):
+        # Users join evenly over the warm-up instead of all at once
+        await asyncio.sleep(ramp_up * user.index / max(len(users), 1))
+        while time.perf_counter() < deadline:
+            spec, request = user.next_request()
+            await send(client, spec, request, results, time.perf_counter())
+            await asyncio.sleep(user.think())
+
+    await asyncio.gather(*(run_user(user) for user in users))
+
+
+async def open_loop(client, users, results, deadline, rate):
+    # One seeded schedule; requests are dealt to the virtual users round robin
+    schedule_rng = random.Random(f"{users[0].scenario['seed']}:schedule")
+    in_flight = asyncio.Semaphore(len(users))
+    tasks = []
+
+    async def run_one(spec, request, scheduled):
+        async with in_flight:
+            await send(client, spec, request, results, scheduled)
+
+    next_at, n = time.perf_counter(), 0
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        spec, request = users[n % len(users)].next_request()
+        tasks.append(asyncio.create_task(run_one(spec, request, next_at)))
+        next_at += schedule_rng.expovariate(rate)
+        n += 1
+    await asyncio.gather(*tasks)
+
+
+async def setup_accounts(client, count):
+    """Register (first run only) and log in the scenario's citizen accounts"""
+    async def account(n):
+        email = f"loadtest-{n}@{LOADTEST_DOMAIN}"
+        response = await client.post("/api/users/register", json={
+            "email": email,
+            "password": ACCOUNT_PASSWORD,
+            "full_name": "Load Test",
+            "mobile_number": f"7{n:09d}",
+        })
+        if response.status_code not in (200, 400):
+            raise RuntimeError(f"Could not register {email}: HTTP {response.status_code} {response.text}")
+        response = await client.post("/api/login", json={"email": email, "password": ACCOUNT_PASSWORD})
+        response.raise_for_status()
+        return {"email": email, "token": response.json()["access_token"]}
+
+    return list(await asyncio.gather(*(account(n) for n in range(count))))
+
+
+async def admin_token(client, email, password):
+    if not (email and password):
+        raise SystemExit("❌ This scenario calls admin routes: pass --admin-email and --admin-password")
+    response = await client.post("/api/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    scenario = load_scenario(args.scenario, {
+        "users": args.users,
+        "duration_seconds": args.duration,
+        "rate_per_second": args.rate,
+        "seed": args.seed,
+    })
+    pool = scenario["users"] + 10
+    limits = httpx.Limits(max_connections=pool, max_keepalive_connections=pool)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        server = (await client.get("/")).status_code
+        accounts = await setup_accounts(client, scenario["accounts"]) if scenario["accounts"] else []
+        admin = await admin_token(client, args.admin_email, args.admin_password) if scenario["admin"] else None
+
+        mode = (f"open loop {scenario['rate_per_second']:g} req/s, max {scenario['users']} in flight"
+                if scenario["rate_per_second"] else f"{scenario['users']} users")
+        print(f"🚀 {scenario['name']} against {args.base_url} (status {server}): {mode}, "
+              f"{scenario['warmup_seconds']:g}s warm-up + {scenario['duration_seconds']:g}s measured")
+
+        users = [VirtualUser(scenario, i, accounts, admin) for i in range(scenario["users"])]
+        started = time.perf_counter()
+        results = Results(started + scenario["warmup_seconds"])
+        deadline = started + scenario["warmup_seconds"] + scenario["duration_seconds"]
+        started_at = datetime.utcnow()
+        if scenario["rate_per_second"]:
+            await open_loop(client, users, results, deadline, scenario["rate_per_second"])
+        else:
+            await closed_loop(client, users, results, deadline, scenario["warmup_seconds"])
+
+    routes, total = results.summary(scenario["duration_seconds"])
+    print_run(routes, total)
+    report = {
+        "scenario": {key: value for key, value in scenario.items() if key != "requests"},
+        "base_url": args.base_url,
+        "git_commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "routes": routes,
+        "total": total,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{scenario['name']}-{started_at:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {out}")
+
+    files_reports = any(request["method"] == "POST" and request["path"].startswith("/api/reports")
+                        for request in scenario["requests"])
+    if files_reports and not args.keep:
+        print(f"🧹 Deleted {await cleanup()} load test reports")
+
+
+def print_run(routes, total):
+    width = max([len(name) for name in routes] + [5])
+    print(f"   {'route':<{width}} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    rows = list(routes.items()) + ([("TOTAL", total)] if total["latency_ms"] else [])
+    for name, stats in rows:
+        latency = stats["latency_ms"]
+        print(f"   {name:<{width}} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>8.1f} "
+              f"{latency['p50']:>7.1f}ms {latency['p95']:>7.1f}ms {latency['p99']:>7.1f}ms {latency['max']:>7.1f}ms")
+    for name, stats in routes.items():
+        if stats["errors"]:
+            print(f"   ⚠️ {name}: {stats['errors']} unexpected responses, first: {stats['first_error']}")
+
+
+async def cleanup():
+    from sqlalchemy import delete, select
+
+    from app.database import AsyncSessionLocal, engine
+    from app.models import Report
+    from app.report_writer import delete_report_rows
+
+    try:
+        async with AsyncSessionLocal() as db:
+            marker = Report.user_email.like(f"%@{LOADTEST_DOMAIN}")
+            report_ids = (await db.execute(select(Report.id).where(marker))).scalars().all()
+            await delete_report_rows(db, report_ids)
+            result = await db.execute(delete(Report).where(marker))
+            await db.commit()
+        return result.rowcount
+    finally:
+        await engine.dispose()
+
+
+# ---------- comparing ----------
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["scenario"]["file_sha256"] != candidate["scenario"]["file_sha256"]:
+        print("⚠️ The runs used different scenario files; differences may not be regressions")
+    for key in ("seed", "users", "rate_per_second", "duration_seconds"):
+        if baseline["scenario"].get(key) != candidate["scenario"].get(key):
+            print(f"⚠️ {key} differs: {baseline['scenario'].get(key)} vs {candidate['scenario'].get(key)}")
+    print(f"📊 {baseline['scenario']['name']}: {baseline.get('git_commit')} ({baseline['started_at']}) "
+          f"→ {candidate.get('git_commit')} ({candidate['started_at']})")
+
+    regressions = 0
+    for name in sorted(set(baseline["routes"]) | set(candidate["routes"])):
+        before, after = baseline["routes"].get(name), candidate["routes"].get(name)
+        if before is None or after is None:
+            print(f"   {name}: only in the {'candidate' if before is None else 'baseline'} run")
+            continue
+        lines, regressed = [], False
+        for metric in ("p50", "p95", "p99"):
+            old, new = before["latency_ms"][metric], after["latency_ms"][metric]
+            change = (new - old) / old * 100 if old else 0.0
+            flag = ""
+            if change > args.threshold and new - old > args.min_ms:
+                flag, regressed = " 🔴", True
+            elif change < -args.threshold and old - new > args.min_ms:
+                flag = " 🟢"
+            lines.append(f"{metric} {old:.1f}→{new:.1f}ms ({change:+.0f}%){flag}")
+
+        old, new = before["throughput_rps"], after["throughput_rps"]
+        change = (new - old) / old * 100 if old else 0.0
+        flag = ""
+        if change < -args.threshold:
+            flag, regressed = " 🔴", True
+        lines.append(f"{old:.1f}→{new:.1f} req/s ({change:+.0f}%){flag}")
+
+        old, new = before["error_rate"], after["error_rate"]
+        if new - old > args.max_error_increase:
+            lines.append(f"errors {old:.1%}→{new:.1%} 🔴")
+            regressed = True
+
+        regressions += regressed
+        print(f"   {'🔴' if regressed else '  '} {name}")
+        print(f"        {'  '.join(lines)}")
+
+    if regressions:
+        print(f"❌ {regressions} route(s) regressed (>{args.threshold:g}% and >{args.min_ms:g}ms slower, "
+              f">{args.threshold:g}% less throughput, or more errors)")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a scenario and compare runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run a scenario against a live server")
+    run_parser.add_argument("scenario", help="Scenario file, e.g. loadtests/map_panning.json")
+    run_parser.add_argument("--base-url", default=os.getenv("LOADTEST_BASE_URL", "http://localhost:8000"))
+    run_parser.add_argument("--out", help=f"Results file (default {RESULTS_DIR}/<scenario>-<time>.json)")
+    run_parser.add_argument("--users", type=int, help="Override the scenario's users")
+    run_parser.add_argument("--duration", type=float, help="Override the measured seconds")
+    run_parser.add_argument("--rate", type=float, help="Run open-loop at this many requests per second")
+    run_parser.add_argument("--seed", type=int, help="Override the scenario's seed")
+    run_parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    run_parser.add_argument("--admin-email", default=os.getenv("LOADTEST_ADMIN_EMAIL"))
+    run_parser.add_argument("--admin-password", default=os.getenv("LOADTEST_ADMIN_PASSWORD"))
+    run_parser.add_argument("--keep", action="store_true", help="Don't delete the reports the run filed")
+
+    compare_parser = commands.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="Percent slower / less throughput counted as a regression")
+    compare_parser.add_argument("--min-ms", type=float, default=2.0,
+                                help="Ignore latency changes smaller than this (noise on fast routes)")
+    compare_parser.add_argument("--max-error-increase", type=float, default=0.01,
+                                help="Error rate increase counted as a regression")
+
+    commands.add_parser("cleanup", help="Delete reports filed by load tests")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    elif args.command == "compare":
+        sys.exit(compare(args))
+    else:
+        print(f"🧹 Deleted {asyncio.run(cleanup())} load test reports")
+
+
+if __name__ == "__main__":
+    main()
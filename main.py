@@ -1,19 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Query, UploadFile, File, Form,Body
+from fastapi import FastAPI, Depends, HTTPException, status, Query, UploadFile, File, Form,Body, Request, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, or_, update, delete, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Integer as SAInteger
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr, validator
 import re
 import random
 import json
+import os
+import time
 from jose import JWTError, jwt
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
 import math
 from sqlalchemy.orm import selectinload
 import asyncio
+import base64
+from fastapi.responses import StreamingResponse, Response, FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi import FastAPI, HTTPException, Depends
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -22,20 +29,36 @@ from sqlalchemy.future import select
 from dateutil.relativedelta import relativedelta
 from app.schemas import UserProfileResponse,UserProfileUpdate
 
-import numpy as np
-from image_predict import original_class_labels,model
-from predict_text import predict_department_from_text
+from predict_text import predict_department_from_text, predict_departments_from_texts, vectorize_texts, active_vocab_size
 
 from app import models
-from app.database import get_db, engine, AsyncSessionLocal
-from app.models import Report, User, Category, Status
-from app.schemas import UserCreate, UserResponse, UserLogin,MapStatsResponse,MapIssuesResponse,MapIssueResponse  
+from app.database import get_db, get_read_db, engine, AsyncSessionLocal, check_schema_version, replica_router, start_request_routing, finish_request_routing, REPLICA_MAX_LAG_SECONDS
+from app.models import Report, User, Category, Status, ReportVector, Confirmation, ActivityLog
+from app.similarity import similarity_index, report_text, encode_vector, decode_vector
+from app.dedupe import duplicate_index, simhash64, to_signed64, to_unsigned64, CLOSED_STATUSES
+from app.image_cache import image_cache, content_hash, perceptual_hash, CachedImagePrediction
+from app.model_registry import model_registry, ModelRegistryError
+from app.query_metrics import query_metrics
+from app.query_utils import day_range, day_start
+from app.bulk_ingest import ingest_reports, detect_format, FORMATS
+from app.report_writer import report_writer, group_committer, status_ids, NewReport, delete_report_rows, REPORT_GROUP_COMMIT
+from app.report_archive import ensure_partitions, get_archived_report
+from app.activity import activity_log, report_payload, timeline_events, feed_entry, PUBLIC_FEED_TYPES
+from app.live_feed import live_feed, map_fields, parse_channels
+from app.data_version import data_version, conditional_get
+from app.map_payload import MapColumns, MAP_FORMATS, BINARY_MEDIA_TYPE
+from app.admission import rate_limit, rate_limiter, client_key, inference_gate, admission_status, LoadShed
+from app.lanes import lane_router, LANES_ENABLED
+from app.department_stats import department_stats, read_department_stats, efficiency_score, PERIODS as STATS_PERIODS
+from app.media_store import media_store, media_path, thumbnail_path, is_media_key, MediaError, EXTENSION_TYPES
+from app.projections import FastJSONResponse, AdminIssueRow, MapIssueRow, AutoAssignedIssueRow, RecentReportRow, ReportRow
+from app.schemas import UserCreate, UserResponse, UserLogin,MapStatsResponse,MapIssuesResponse,MapIssueResponse,FileUploadResponse,ReportCreate,BulkReportRow
 from app.auth_utils import get_password_hash, verify_password, create_access_token, SECRET_KEY, ALGORITHM    
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 from predict_text import predict_department_from_text
-from image_predict import predict_image, preprocess_image
+from image_predict import predict_image, preprocess_image, classify_image_with_embedding, classify_images_with_embedding
 
 class UserCreateEnhanced(BaseModel):
     email: EmailStr
@@ -71,90 +94,134 @@ class UserLoginEnhanced(BaseModel):
     password: str
     is_admin: bool = False
 
-class ReportCreate(BaseModel):
-    # User Information
-    user_name: str
-    user_mobile: str
-    user_email: Optional[str] = None
-    
-    # Issue Information
-    urgency_level: str
-    title: str
-    description: str
-    
-    # Location Information
-    location_lat: float
-    location_long: float
-    location_address: Optional[str] = None
-    
-    # ✅ ADD THESE FIELDS FOR AI ASSIGNMENT
-    department: Optional[str] = "other"  # Will be set by AI prediction
-    auto_assigned: Optional[bool] = False
-    prediction_confidence: Optional[float] = None
-    
-    # Validation
-    @validator('user_name')
-    def validate_user_name(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Full name cannot be empty')
-        if len(v) < 2:
-            raise ValueError('Full name must be at least 2 characters long')
-        return v.strip()
+app = FastAPI(title="Smart Urban Issue Redressal API", version="0.1.0")
 
-    @validator('user_mobile')
-    def validate_user_mobile(cls, v):
-        if not re.match(r'^\d{10}$', v):
-            raise ValueError('Mobile number must be exactly 10 digits')
-        return v
+@app.on_event("startup")
+async def on_startup():
+    # Schema changes go through `alembic upgrade head` (run by the Procfile / Dockerfile)
+    revision = await check_schema_version()
+    print(f"✅ Database schema at revision {revision}")
 
-    @validator('urgency_level')
-    def validate_urgency_level(cls, v):
-        valid_urgency_levels = ["High", "Medium", "Low"]
-        if v not in valid_urgency_levels:
-            raise ValueError(f'Urgency level must be one of: {", ".join(valid_urgency_levels)}')
-        return v
+@app.on_event("startup")
+async def ensure_report_partitions():
+    # Next months' partitions exist before any report is dated in them
+    async with engine.begin() as conn:
+        created = await ensure_partitions(conn)
+    if created:
+        print(f"✅ Created report partitions: {', '.join(created)}")
 
-    @validator('title')
-    def validate_title(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Title cannot be empty')
-        if len(v) < 5:
-            raise ValueError('Title must be at least 5 characters long')
-        return v.strip()
+@app.on_event("startup")
+async def start_activity_log():
+    activity_log.start()
 
-    @validator('description')
-    def validate_description(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Description cannot be empty')
-        if len(v) < 10:
-            raise ValueError('Description must be at least 10 characters long')
-        return v.strip()
+@app.on_event("shutdown")
+async def flush_activity_log():
+    await activity_log.stop()
 
-    @validator('location_lat')
-    def validate_latitude(cls, v):
-        if not -90 <= v <= 90:
-            raise ValueError('Latitude must be between -90 and 90')
-        return v
+@app.on_event("shutdown")
+async def stop_thumbnail_workers():
+    media_store.shutdown()
 
-    @validator('location_long')
-    def validate_longitude(cls, v):
-        if not -180 <= v <= 180:
-            raise ValueError('Longitude must be between -180 and 180')
-        return v
+@app.on_event("startup")
+async def start_live_feed():
+    live_feed.start()
 
-    @validator('department')
-    def validate_department(cls, v):
-        valid_depts = ["water_dept", "road_dept", "sanitation_dept", "electricity_dept", "other"]
-        if v and v not in valid_depts:
-            raise ValueError(f'Department must be one of: {", ".join(valid_depts)}')
-        return v if v else "other"
+@app.on_event("shutdown")
+async def stop_live_feed():
+    await live_feed.stop()
 
-app = FastAPI(title="Smart Urban Issue Redressal API", version="0.1.0")
+@app.on_event("startup")
+async def start_replica_monitor():
+    # First lag check before serving, so reads go to replicas from the first request
+    await replica_router.check_all()
+    asyncio.create_task(replica_router.monitor_forever())
+    for replica in replica_router.status():
+        print(f"{'✅' if replica['healthy'] else '⚠️'} Read replica {replica['url']} lag={replica['lag_seconds']}")
 
 @app.on_event("startup")
-async def on_startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(models.Base.metadata.create_all)
+async def start_group_commit():
+    if REPORT_GROUP_COMMIT:
+        group_committer.start()
+        print(f"✅ Group commit on for new reports ({group_committer.window * 1000:.0f} ms window, max {group_committer.max_batch})")
+
+@app.on_event("startup")
+async def sync_model_registry():
+    # Serve whatever version is marked ACTIVE, then follow switches made on other workers
+    await model_registry.sync()
+    asyncio.create_task(model_registry.poll_forever())
+    print(f"✅ Serving text model {model_registry.active_version('text')}, image model {model_registry.active_version('image')}")
+
+@app.on_event("startup")
+async def load_similarity_index():
+    async with AsyncSessionLocal() as session:
+        stats = await similarity_index.rebuild(session, active_vocab_size())
+    print(f"✅ Similarity index loaded with {stats['indexed']} reports")
+
+@app.on_event("startup")
+async def load_duplicate_index():
+    async with AsyncSessionLocal() as session:
+        open_reports = await duplicate_index.rebuild(session)
+    print(f"✅ Duplicate index loaded with {open_reports} open reports")
+
+@app.on_event("startup")
+async def start_department_stats():
+    # Windows are filled before serving, then kept fresh in the background
+    await department_stats.refresh()
+    department_stats.start()
+    print(f"✅ Department stats refreshed every {department_stats.interval:.0f}s")
+
+@app.on_event("shutdown")
+async def stop_department_stats():
+    await department_stats.stop()
+
+@app.on_event("startup")
+async def load_image_cache():
+    # Predictions of the active image model only (sync_model_registry ran first)
+    async with AsyncSessionLocal() as session:
+        cached_images = await image_cache.load(session, model_registry.active_version("image"))
+    print(f"✅ Image prediction cache loaded with {cached_images} images")
+
+query_metrics.install(engine.sync_engine)
+_route_paths = {}
+
+def route_label(request) -> str:
+    """Route template ("GET /reports/{report_id}") so metrics don't split per id"""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return f"{request.method} <unmatched>"
+    if endpoint not in _route_paths:
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                _route_paths[endpoint] = route.path
+                break
+        else:
+            _route_paths[endpoint] = request.url.path
+    return f"{request.method} {_route_paths[endpoint]}"
+
+@app.middleware("http")
+async def collect_query_metrics(request, call_next):
+    stats, token = query_metrics.start_request()
+    routing_token = start_request_routing()
+    try:
+        return await call_next(request)
+    finally:
+        finish_request_routing(routing_token)
+        query_metrics.finish_request(route_label(request), stats, token)
+
+@app.middleware("http")
+async def route_lanes(request, call_next):
+    """Runs each request in its lane (app/lanes.py) so analytics can't starve submissions"""
+    if not LANES_ENABLED:
+        return await call_next(request)
+    lane = lane_router.lane_for(request.method, request.url.path)
+    started = time.perf_counter()
+    try:
+        async with lane_router.admit(lane):
+            response = await call_next(request)
+    except LoadShed as e:
+        response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+    lane.record(time.perf_counter() - started, response.status_code)
+    return response
 
 app.add_middleware(
     CORSMiddleware,
@@ -328,60 +395,191 @@ async def initialize_admin_users(db: AsyncSession = Depends(get_db)):
 async def read_reports(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    result = await db.execute(select(Report).offset(skip).limit(limit))
-    reports = result.scalars().all()
-    return reports
+    result = await db.execute(ReportRow.select().offset(skip).limit(limit))
+    return FastJSONResponse(ReportRow.from_rows(result.all()))
+
+def mark_resolution(report: Report, status_name: Optional[str]):
+    """resolved_at is when the report entered Resolved - later edits keep it, reopening clears it"""
+    if status_name == "Resolved":
+        if report.resolved_at is None:
+            report.resolved_at = datetime.utcnow()
+    else:
+        report.resolved_at = None
+
+def record_status_change(report, old_status: Optional[str], new_status: str, user_id: Optional[int] = None):
+    """Emit the activity event and live feed delta for a committed status change"""
+    if old_status == new_status:
+        return
+    payload = report_payload(report, from_status=old_status, to_status=new_status)
+    if new_status == "Resolved":
+        activity_log.emit(
+            "issue_resolved", report.id, f"Resolved by {report.resolved_by or 'admin'}", payload, user_id
+        )
+        live_feed.status_changed(
+            report.id, old_status, new_status, feed_entry("issue_resolved", payload, datetime.utcnow())
+        )
+    else:
+        live_feed.status_changed(report.id, old_status, new_status)
+        activity_log.emit(
+            "status_changed", report.id,
+            f"Status changed from {old_status} to {new_status}" if old_status else f"Status changed to {new_status}",
+            payload, user_id
+        )
+
+def sync_duplicate_index(report: Report, status_name: Optional[str]):
+    """Only open reports can absorb duplicates - drop closed ones, re-add reopened ones"""
+    if status_name in CLOSED_STATUSES:
+        duplicate_index.remove(report.id)
+    elif report.location_lat is not None and report.location_long is not None:
+        simhash = (
+            to_unsigned64(report.text_simhash)
+            if report.text_simhash is not None
+            else simhash64(report_text(report.title, report.description))
+        )
+        duplicate_index.add(report.id, report.location_lat, report.location_long, simhash)
+
+async def add_duplicate_confirmation(db: AsyncSession, report_id: int, report_data: ReportCreate) -> bool:
+    """
+    Record the submitter of a duplicate as a confirmation of the open report.
+    Returns False if that report is gone or closed (stale duplicate index entry).
+    """
+    report_result = await db.execute(
+        select(Report.id, Report.user_mobile).where(
+            Report.id == report_id,
+            or_(Report.status.is_(None), Report.status.notin_(CLOSED_STATUSES))
+        )
+    )
+    canonical = report_result.one_or_none()
+    if not canonical:
+        return False
+
+    # The original reporter re-submitting doesn't count as a confirmation
+    if canonical.user_mobile == report_data.user_mobile:
+        return True
+
+    existing_result = await db.execute(
+        select(Confirmation.id).where(
+            Confirmation.report_id == report_id,
+            Confirmation.user_mobile == report_data.user_mobile
+        ).limit(1)
+    )
+    if existing_result.first():
+        return True
+
+    db.add(Confirmation(
+        report_id=report_id,
+        user_name=report_data.user_name,
+        user_mobile=report_data.user_mobile,
+        user_email=report_data.user_email
+    ))
+    await db.execute(
+        update(Report)
+        .where(Report.id == report_id)
+        .values(confirmation_count=Report.confirmation_count + 1)
+    )
+    await db.commit()
+    activity_log.emit("confirmed", report_id, f"Confirmed by {report_data.user_name}")
+    return True
 
 @app.post("/api/reports/")
 async def create_report(
     report_data: ReportCreate,
+    force_new: bool = Query(False, description="Skip duplicate detection and always create a new report"),
     db: AsyncSession = Depends(get_db)
 ):
+    # Photos and voice notes are uploaded first; the report only keeps their keys
+    media_keys = (report_data.images or []) + ([report_data.voice_note] if report_data.voice_note else [])
+    missing_media = media_store.missing(media_keys)
+    if missing_media:
+        raise HTTPException(status_code=400, detail=f"Media not uploaded: {', '.join(missing_media)}")
+
     try:
-        # 1️⃣ Fetch "Reported" status
-        status_result = await db.execute(
-            select(Status).where(Status.name == "Reported")
-        )
-        reported_status = status_result.scalar_one_or_none()
+        simhash = simhash64(report_text(report_data.title, report_data.description))
 
-        if not reported_status:
+        # 0️⃣ Fold near-duplicates of an open nearby report into a confirmation
+        if not force_new:
+            duplicate = duplicate_index.find_duplicate(
+                report_data.location_lat, report_data.location_long, simhash
+            )
+            if duplicate:
+                canonical_id, hamming, meters = duplicate
+                if await add_duplicate_confirmation(db, canonical_id, report_data):
+                    return {
+                        "message": "This issue was already reported nearby - your report was added as a confirmation",
+                        "report_id": canonical_id,
+                        "is_duplicate": True,
+                        "duplicate_of": canonical_id,
+                        "distance_m": round(meters, 1)
+                    }
+                duplicate_index.remove(canonical_id)
+
+        # 1️⃣ Status id from the in-process cache - no lookup per submission
+        reported_status_id = await status_ids.get(db, "Reported")
+        if reported_status_id is None:
             raise HTTPException(
                 status_code=500,
                 detail="Reported status not found in database"
             )
 
-        # 2️⃣ Create report
-        db_report = Report(
-            user_name=report_data.user_name,
-            user_mobile=report_data.user_mobile,
-            user_email=report_data.user_email,
-            urgency_level=report_data.urgency_level,
-            title=report_data.title,
-            description=report_data.description,
-            issue_type="General",
-            category="General",
-            location_lat=report_data.location_lat,
-            location_long=report_data.location_long,
-            location_address=report_data.location_address,
-
-            # ✅ FIXED
-            status="Reported",                 # optional (legacy)
-            status_id=reported_status.id,      # source of truth
-
-            department=report_data.department or "other",
-            auto_assigned=report_data.auto_assigned or False,
-            prediction_confidence=report_data.prediction_confidence
-        )
-
-        db.add(db_report)
-        await db.commit()
-        await db.refresh(db_report)
+        # 2️⃣ Vectorize once at ingest for similar-report lookups
+        report_vector, vector_columns = None, None
+        try:
+            report_vector = vectorize_texts([report_text(report_data.title, report_data.description)])[0]
+            term_ids, weights = encode_vector(report_vector)
+            vector_columns = {"term_ids": term_ids, "weights": weights, "vocab_size": report_vector.shape[1]}
+        except Exception as e:
+            report_vector = None
+            print(f"⚠️ Could not vectorize new report: {str(e)}")
+
+        # 3️⃣ Report, vector and photo link in one INSERT ... RETURNING id (or one group commit)
+        report_id = await report_writer.write(db, NewReport(
+            values={
+                "user_name": report_data.user_name,
+                "user_mobile": report_data.user_mobile,
+                "user_email": report_data.user_email,
+                "urgency_level": report_data.urgency_level,
+                "title": report_data.title,
+                "description": report_data.description,
+                "issue_type": "General",
+                "category": "General",
+                "location_lat": report_data.location_lat,
+                "location_long": report_data.location_long,
+                "location_address": report_data.location_address,
+                "status": "Reported",                 # optional (legacy)
+                "status_id": reported_status_id,      # source of truth
+                "department": report_data.department or "other",
+                "auto_assigned": report_data.auto_assigned or False,
+                "prediction_confidence": report_data.prediction_confidence,
+                "text_simhash": to_signed64(simhash),
+                "images": json.dumps(report_data.images) if report_data.images else None,
+                "voice_note": report_data.voice_note,
+            },
+            vector=vector_columns,
+            image_hash=report_data.image_hash
+        ))
+
+        # Vectors from a just-swapped vectorizer wait for rebuild_similarity_index.py
+        if report_vector is not None and report_vector.shape[1] == similarity_index.vocab_size:
+            similarity_index.add(
+                report_id, report_vector, report_data.location_lat, report_data.location_long
+            )
+        duplicate_index.add(report_id, report_data.location_lat, report_data.location_long, simhash)
+        if report_data.image_hash:
+            image_cache.link_report(report_data.image_hash, report_id)
+        payload = report_payload(report_data)
+        activity_log.emit("report_created", report_id, "Complaint submitted", payload)
+        created_at = datetime.utcnow()
+        live_feed.report_created(
+            map_fields(report_data, id=report_id, status="Reported", created_at=created_at),
+            feed_entry("report_created", payload, created_at)
+        )
 
         return {
             "message": "Report created successfully",
-            "report_id": db_report.id
+            "report_id": report_id,
+            "is_duplicate": False
         }
 
     except Exception as e:
@@ -389,6 +587,122 @@ async def create_report(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def upload_content_type(request: Request) -> str:
+    return request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+def upload_response(media, message: str) -> FileUploadResponse:
+    return FileUploadResponse(
+        filename=media.key,
+        file_url=f"/media/{media.key}",
+        message=message,
+        content_type=media.content_type,
+        size=media.size,
+        deduplicated=media.deduplicated,
+        thumbnail_url=f"/media/thumbs/{media.thumbnail}" if media.thumbnail else None,
+        width=media.width,
+        height=media.height
+    )
+
+@app.post("/api/media/images", response_model=FileUploadResponse)
+async def upload_image(request: Request):
+    """
+    Upload one photo as the raw request body (Content-Type: image/jpeg, image/png
+    or image/webp). It is streamed to disk, stored under its SHA-256 and gets a
+    thumbnail; pass the returned filename in ReportCreate.images.
+    """
+    try:
+        media = await media_store.save_image(request.stream(), upload_content_type(request))
+    except MediaError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    return upload_response(media, "Image already stored" if media.deduplicated else "Image uploaded")
+
+@app.post("/api/media/voice-notes", response_model=FileUploadResponse)
+async def upload_voice_note(request: Request):
+    """
+    Upload a voice note as the raw request body (Content-Type: audio/*); pass the
+    returned filename in ReportCreate.voice_note.
+    """
+    try:
+        media = await media_store.save_voice_note(request.stream(), upload_content_type(request))
+    except MediaError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    return upload_response(media, "Voice note already stored" if media.deduplicated else "Voice note uploaded")
+
+# Content-addressed files never change, so clients and proxies may keep them forever
+IMMUTABLE_CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+@app.get("/media/thumbs/{key}")
+async def get_media_thumbnail(key: str):
+    if not is_media_key(key):
+        raise HTTPException(status_code=404, detail="Media not found")
+    path = thumbnail_path(key)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Media not found")
+    return FileResponse(path, media_type="image/jpeg", headers=IMMUTABLE_CACHE_HEADERS)
+
+@app.get("/media/{key}")
+async def get_media(key: str):
+    if not is_media_key(key):
+        raise HTTPException(status_code=404, detail="Media not found")
+    path = media_path(key)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Media not found")
+    return FileResponse(path, media_type=EXTENSION_TYPES.get(key[64:]), headers=IMMUTABLE_CACHE_HEADERS)
+
+
+@app.post("/api/admin/reports/bulk")
+async def bulk_ingest_reports(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from Content-Type)"),
+    predict: bool = Query(False, description="Predict department for rows without one"),
+    dry_run: bool = Query(False, description="Validate only, load nothing"),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Load many reports at once from a CSV or NDJSON request body in the ReportCreate
+    shape (plus optional created_at). Rows are validated as they stream in and loaded
+    with COPY; invalid rows, and rows referencing media that was never uploaded, are
+    skipped and listed in the response.
+    """
+    fmt = format or detect_format(None, request.headers.get("content-type"))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+
+    try:
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            result = await ingest_reports(
+                raw.driver_connection,
+                request.stream(),
+                fmt,
+                BulkReportRow,
+                predict_fn=predict_departments_from_texts if predict else None,
+                dry_run=dry_run
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk ingest failed: {str(e)}")
+
+    # COPY runs on the raw asyncpg connection, outside the engine's commit events
+    if not dry_run and result.inserted_rows:
+        data_version.bump()
+
+    # Similarity vectors for these rows come from rebuild_similarity_index.py --only-missing.
+    # Their report_created events were written with them; the live feed hears of them here.
+    for report in result.inserted_rows:
+        duplicate_index.add(report.id, report.location_lat, report.location_long, to_unsigned64(report.text_simhash))
+        if report.image_hash:
+            image_cache.link_report(report.image_hash, report.id)
+        live_feed.report_created(
+            map_fields(report),
+            feed_entry("report_created", report_payload(report), report.created_at)
+        )
+
+    return result.summary(dry_run)
+
 @app.get("/reports/{report_id}")
 async def get_report(
     report_id: int,
@@ -397,6 +711,8 @@ async def get_report(
     result = await db.execute(select(Report).filter(Report.id == report_id))
     db_report = result.scalar_one_or_none()
     
+    if db_report is None:
+        db_report = await get_archived_report(db, report_id)
     if db_report is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -429,9 +745,14 @@ async def update_report_status(
             detail=f"Status '{new_status}' is not valid"
         )
     
+    old_status = db_report.status
     db_report.status_id = status.id
+    db_report.status = new_status
+    mark_resolution(db_report, new_status)
     await db.commit()
     await db.refresh(db_report)
+    sync_duplicate_index(db_report, new_status)
+    record_status_change(db_report, old_status, new_status, current_user.id)
     
     return {"message": f"Report {report_id} status updated to {new_status}", "report": db_report}
 
@@ -450,8 +771,13 @@ async def delete_report(
             detail=f"Report with ID {report_id} not found"
         )
     
+    await delete_report_rows(db, [report_id])
     await db.delete(db_report)
     await db.commit()
+    live_feed.report_deleted(report_id, db_report.status)
+    similarity_index.remove(report_id)
+    duplicate_index.remove(report_id)
+    image_cache.unlink_report(report_id)
     
     return {"message": f"Report with ID {report_id} has been successfully deleted."}
 
@@ -488,8 +814,8 @@ async def signup(user_data: UserCreateEnhanced, db: AsyncSession = Depends(get_d
             detail="Cannot self-assign admin role during signup"
         )
     
-    # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    # Hash password (bcrypt is deliberately slow - keep it off the event loop the other lanes share)
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     
     # Create new user
     new_user = User(
@@ -513,7 +839,7 @@ async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not await run_in_threadpool(verify_password, login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -567,15 +893,15 @@ async def read_own_reports(
     return user_reports
 
 # Get all categories
-@app.get("/categories")
-async def get_categories(db: AsyncSession = Depends(get_db)):
+@app.get("/categories", dependencies=[Depends(conditional_get("categories"))])
+async def get_categories(db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(Category))
     categories = result.scalars().all()
     return categories
 
 # Get all statuses
-@app.get("/statuses")
-async def get_statuses(db: AsyncSession = Depends(get_db)):
+@app.get("/statuses", dependencies=[Depends(conditional_get("statuses"))])
+async def get_statuses(db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(Status))
     statuses = result.scalars().all()
     return statuses
@@ -585,7 +911,7 @@ async def get_statuses(db: AsyncSession = Depends(get_db)):
 # some extra end points
 
 @app.get("/dashboard/summary")
-async def get_dashboard_summary(db: AsyncSession = Depends(get_db)):
+async def get_dashboard_summary(db: AsyncSession = Depends(get_read_db)):
     
     try:
         # Get total reports in system
@@ -593,12 +919,10 @@ async def get_dashboard_summary(db: AsyncSession = Depends(get_db)):
         total_reports_count = total_reports_result.scalar()
 
         # Get today's resolved issues count
-        today = date.today()
+        today_start, today_end = day_range(date.today())
         today_resolved_result = await db.execute(
             select(func.count(Report.id))
-            .join(Status)
-            .filter(Status.name == "Resolved")
-            .filter(func.date(Report.updated_at) == today)
+            .filter(Report.resolved_at >= today_start, Report.resolved_at < today_end)
         )
         today_resolved_count = today_resolved_result.scalar()
 
@@ -628,17 +952,16 @@ async def get_dashboard_summary(db: AsyncSession = Depends(get_db)):
 
 
 @app.get("/reports/resolved/today")
-async def get_todays_resolved_issues(db: AsyncSession = Depends(get_db)):
+async def get_todays_resolved_issues(db: AsyncSession = Depends(get_read_db)):
     
     try:
         today = date.today()
+        today_start, today_end = day_range(today)
         
         # Get resolved reports from today
         result = await db.execute(
             select(Report)
-            .join(Status)
-            .filter(Status.name == "Resolved")
-            .filter(func.date(Report.updated_at) == today)
+            .filter(Report.resolved_at >= today_start, Report.resolved_at < today_end)
         )
         resolved_reports = result.scalars().all()
         
@@ -650,9 +973,9 @@ async def get_todays_resolved_issues(db: AsyncSession = Depends(get_db)):
                 "title": report.title,
                 "description": report.description,
                 "urgency_level": report.issue_type,
-                "category": report.category.name if report.category else "General",
+                "category": report.category or "General",
                 "location_address": report.location_address,
-                "resolved_at": report.updated_at
+                "resolved_at": report.resolved_at
             }
             formatted_reports.append(report_data)
         
@@ -661,9 +984,7 @@ async def get_todays_resolved_issues(db: AsyncSession = Depends(get_db)):
             select(Category.name, func.count(Report.id))
             .select_from(Report)
             .join(Category)
-            .join(Status)
-            .filter(Status.name == "Resolved")
-            .filter(func.date(Report.updated_at) == today)
+            .filter(Report.resolved_at >= today_start, Report.resolved_at < today_end)
             .group_by(Category.name)
         )
         category_counts = category_count_result.all()
@@ -682,70 +1003,108 @@ async def get_todays_resolved_issues(db: AsyncSession = Depends(get_db)):
         )
 
 @app.get("/api/activity/today")
-async def get_todays_activity(db: AsyncSession = Depends(get_db)):
+async def get_todays_activity(db: AsyncSession = Depends(get_read_db)):
     """
     Returns today's public activity feed (no auth required)
     """
     today = date.today()
-    activities = []
-
-    # 1️⃣ New reports created today
-    new_reports_result = await db.execute(
-        select(Report)
-        .where(func.date(Report.created_at) == today)
-        .order_by(Report.created_at.desc())
-        .limit(10)
-    )
-    new_reports = new_reports_result.scalars().all()
-
-    for report in new_reports:
-        activities.append({
-            "type": "new_report",
-            "title": f"New {report.issue_type} issue reported",
-            "description": report.title,
-            "urgency": report.urgency_level,
-            "category": report.category or "General",
-            "timestamp": report.created_at,
-            "location": report.location_address
-        })
+    today_start, today_end = day_range(today)
 
-    # 2️⃣ Issues resolved today
-    resolved_reports_result = await db.execute(
-        select(Report)
-        .join(Status, Status.id == Report.status_id)
+    # One range read on ix_activity_logs_created_at, newest first
+    result = await db.execute(
+        select(ActivityLog.activity_type, ActivityLog.payload, ActivityLog.created_at)
         .where(
-            Status.name == "Resolved",
-            func.date(Report.updated_at) == today
+            ActivityLog.created_at >= today_start,
+            ActivityLog.created_at < today_end,
+            ActivityLog.activity_type.in_(PUBLIC_FEED_TYPES)
         )
-        .order_by(Report.updated_at.desc())
-        .limit(10)
+        .order_by(ActivityLog.created_at.desc())
+        .limit(15)
     )
-    resolved_reports = resolved_reports_result.scalars().all()
-
-    for report in resolved_reports:
-        activities.append({
-            "type": "issue_resolved",
-            "title": f"{report.issue_type} issue resolved",
-            "description": f"'{report.title}' has been fixed",
-            "category": report.category or "General",
-            "timestamp": report.updated_at,
-            "location": report.location_address
-        })
-
-    # 3️⃣ Sort by time (latest first)
-    activities.sort(key=lambda x: x["timestamp"], reverse=True)
+    activities = [feed_entry(row.activity_type, row.payload, row.created_at) for row in result.all()]
 
     return {
         "date": today.isoformat(),
         "total_activities": len(activities),
-        "activities": activities[:15]
+        "activities": activities
     }
 
 
+@app.get("/api/live/events")
+async def live_events(
+    channels: Optional[str] = Query(None, description="Comma-separated: dashboard, activity (default: both)")
+):
+    """
+    Server-Sent Events push of dashboard / map deltas and activity feed entries,
+    replacing polling of /api/admin/dashboard/stats, /api/admin/map/issues and
+    /api/activity/today. Fetch those once, then apply the deltas; refetch on a
+    "resync" control event.
+    """
+    try:
+        wanted = parse_channels(channels)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    subscriber = live_feed.subscribe(wanted)
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many live feed connections", headers={"Retry-After": "30"})
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            async for message in live_feed.messages(subscriber):
+                yield message.sse
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/live/ws")
+async def live_websocket(websocket: WebSocket, channels: Optional[str] = None):
+    """
+    Same messages as /api/live/events over a WebSocket, one JSON text frame each
+    """
+    try:
+        wanted = parse_channels(channels)
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    subscriber = live_feed.subscribe(wanted)
+    if subscriber is None:
+        await websocket.close(code=1013)  # try again later
+        return
+
+    await websocket.accept()
+
+    async def send_messages():
+        async for message in live_feed.messages(subscriber):
+            await websocket.send_text(message.json)
+
+    async def wait_for_close():
+        # Clients don't send anything; this returns when they disconnect
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    sender = asyncio.create_task(send_messages())
+    receiver = asyncio.create_task(wait_for_close())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+        live_feed.unsubscribe(subscriber)
+
 @app.get("/reports/{report_id}/confirmations")
 async def get_issue_confirmations(
     report_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get confirmation count for an issue (public - no auth required)
@@ -775,8 +1134,8 @@ async def get_issue_confirmations(
             detail=f"Error fetching confirmations: {str(e)}"
         )
 
-@app.get("/dashboard/stats")
-async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
+@app.get("/dashboard/stats", dependencies=[Depends(conditional_get("dashboard-stats"))])
+async def get_dashboard_stats(db: AsyncSession = Depends(get_read_db)):
     """
     Returns public dashboard statistics (no auth required)
     """
@@ -833,7 +1192,7 @@ async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
         )
 
 @app.get("/reports/category-summary")
-async def get_category_summary(db: AsyncSession = Depends(get_db)):
+async def get_category_summary(db: AsyncSession = Depends(get_read_db)):
     """
     Returns count of issues per category (public - no auth required)
     """
@@ -1040,6 +1399,8 @@ async def get_report_timeline(
             select(Report).filter(Report.id == report_id)
         )
         report = report_result.scalar_one_or_none()
+        if not report:
+            report = await get_archived_report(db, report_id)
         
         if not report:
             raise HTTPException(
@@ -1068,53 +1429,19 @@ async def get_report_timeline(
         print(f"📊 Category: {category.name if category else 'None'}")
         print(f"📊 Status: {report_status.name if report_status else 'None'}")
         
-        # ✅ FIX: Handle None dates safely
         created_at = report.created_at if report.created_at else datetime.utcnow()
-        updated_at = report.updated_at if report.updated_at else created_at
-        
-        # Build timeline events
-        timeline_events = []
-        
-        # Event 1: Complaint Submitted
-        timeline_events.append({
-            "event": "Submitted",
-            "description": "Complaint submitted",
-            "timestamp": created_at.isoformat(),
-            "status": "completed"
-        })
-        
-        # Event 2: Assigned to Department
-        if report_status and report_status.name in ["In Progress", "Resolved", "Closed"]:
-            timeline_events.append({
-                "event": "Assigned",
-                "description": "Assigned to department",
-                "timestamp": (created_at + timedelta(hours=2)).isoformat(),
-                "status": "completed"
-            })
 
-        
-        # Event 3: Work in Progress
-        if report_status and report_status.name in ["In Progress", "Resolved", "Closed"]:
-            timeline_events.append({
-                "event": "In Progress",
-                "description": "Work in progress",
-                "timestamp": (created_at + timedelta(hours=4)).isoformat(),
-                "status": "completed" if report_status.name in ["Resolved", "Closed"] else "in_progress"
-            })
-
-        
-        if report_status and report_status.name == "Resolved":
-            timeline_events.append({
-                "event": "Resolved",
-                "description": "Issue resolved successfully",
-                "timestamp": updated_at.isoformat(),
-                "status": "completed"
-            })
+        # Recorded events in one range read on ix_activity_logs_report_id_created_at,
+        # plus any still waiting in this worker's write buffer
+        events_result = await db.execute(
+            select(ActivityLog.activity_type, ActivityLog.description, ActivityLog.payload, ActivityLog.created_at)
+            .where(ActivityLog.report_id == report_id)
+            .order_by(ActivityLog.created_at, ActivityLog.id)
+        )
+        events = [dict(row._mapping) for row in events_result.all()]
+        events.extend(sorted(activity_log.pending(report_id), key=lambda event: event["created_at"]))
+        timeline = timeline_events(events, report_status.name if report_status else report.status)
 
-        
-        # Sort timeline by timestamp
-        timeline_events.sort(key=lambda x: x["timestamp"])
-        
         # Prepare response data
         response_data = {
             "complaint_details": {
@@ -1133,11 +1460,11 @@ async def get_report_timeline(
                 "user_name": report.user_name,
                 "user_email": report.user_email
             },
-            "timeline": timeline_events,
+            "timeline": timeline,
             "confirmation_count": getattr(report, 'confirmation_count', 0)
         }
         
-        print(f"✅ Successfully built timeline with {len(timeline_events)} events")
+        print(f"✅ Successfully built timeline with {len(timeline)} events")
         return response_data
         
     except HTTPException:
@@ -1153,39 +1480,127 @@ async def get_report_timeline(
             detail=f"Error fetching report timeline: {str(e)}"
         )
 
-# admin endpoints
+@app.get("/api/reports/{report_id}/similar")
+async def get_similar_reports(
+    report_id: int,
+    k: int = Query(5, ge=1, le=50, description="Number of similar reports to return"),
+    radius_km: Optional[float] = Query(None, gt=0, description="Only match reports within this distance"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Returns existing reports whose text is most similar to this one
+    """
+    try:
+        report_result = await db.execute(
+            select(
+                Report.id, Report.title, Report.description,
+                Report.location_lat, Report.location_long
+            ).where(Report.id == report_id)
+        )
+        report = report_result.one_or_none()
+
+        if not report:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Report with ID {report_id} not found"
+            )
 
+        # Prefer the vector computed at ingest, fall back to vectorizing now
+        vector = similarity_index.get_vector(report_id)
+        if vector is None:
+            vector_result = await db.execute(
+                select(ReportVector).where(ReportVector.report_id == report_id)
+            )
+            stored = vector_result.scalar_one_or_none()
+            if stored and stored.vocab_size == similarity_index.vocab_size:
+                vector = decode_vector(stored.term_ids, stored.weights, stored.vocab_size)
+            else:
+                vector = vectorize_texts([report_text(report.title, report.description)])[0]
 
-@app.get("/api/admin/issues")
-async def get_admin_issues(db: AsyncSession = Depends(get_db)):
+        if vector.shape[1] != similarity_index.vocab_size:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Similarity index was built with a different text model - rebuild it first"
+            )
+
+        matches = similarity_index.query(
+            vector,
+            k=k,
+            exclude_id=report_id,
+            lat=report.location_lat,
+            lon=report.location_long,
+            radius_km=radius_km
+        )
+
+        similar = []
+        if matches:
+            rows_result = await db.execute(
+                select(
+                    Report.id, Report.title, Report.status, Report.department,
+                    Report.location_address, Report.created_at
+                ).where(Report.id.in_([match_id for match_id, _, _ in matches]))
+            )
+            rows = {row.id: row for row in rows_result.all()}
+
+            for match_id, score, distance in matches:
+                row = rows.get(match_id)
+                if not row:
+                    continue
+                similar.append({
+                    "id": row.id,
+                    "complaint_id": f"#{row.id:05d}",
+                    "title": row.title,
+                    "status": row.status,
+                    "department": row.department,
+                    "location_address": row.location_address,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                    "similarity": round(score, 4),
+                    "distance_km": round(distance, 3) if distance is not None else None
+                })
+
+        return {
+            "report_id": report_id,
+            "radius_km": radius_km,
+            "count": len(similar),
+            "similar_reports": similar
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching similar reports: {str(e)}"
+        )
+
+@app.post("/api/admin/similarity/rebuild")
+async def rebuild_similarity_index(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Reload the in-memory similarity index from the stored report vectors
+    """
     try:
-        result = await db.execute(select(Report))
-        issues = result.scalars().all()
+        stats = await similarity_index.rebuild(db, active_vocab_size())
+        return {"message": "Similarity index rebuilt", **stats}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error rebuilding similarity index: {str(e)}"
+        )
 
-        issues_list = []
-        for issue in issues:
-            if issue.location_lat is None or issue.location_long is None:
-                continue
+# admin endpoints
 
-            issues_list.append({
-                "id": issue.id,
-                "user_name": issue.user_name,
-                "user_email": issue.user_email,
-                "title": issue.title,
-                "description": issue.description,
-                "urgency_level": issue.urgency_level,
-                "status": issue.status,
-                "location_address": issue.location_address,
-
-                # ✅ REQUIRED FOR MAP
-                "location_lat": issue.location_lat,
-                "location_long": issue.location_long,
-
-                "assigned_department": issue.assigned_department,
-                "created_at": issue.created_at.isoformat() if issue.created_at else None,
-            })
 
-        return {"issues": issues_list}
+@app.get("/api/admin/issues")
+async def get_admin_issues(db: AsyncSession = Depends(get_read_db)):
+    try:
+        # ✅ REQUIRED FOR MAP: only issues with coordinates
+        result = await db.execute(
+            AdminIssueRow.select().where(Report.location_lat.isnot(None), Report.location_long.isnot(None))
+        )
+        return FastJSONResponse({"issues": AdminIssueRow.from_rows(result.all())})
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1199,9 +1614,13 @@ async def get_issue_details(report_id: int, db: AsyncSession = Depends(get_db)):
             select(models.Report).where(models.Report.id == report_id)
         )
         report = result.scalar_one_or_none()
+        if not report:
+            report = await get_archived_report(db, report_id)
         if not report:
             raise HTTPException(status_code=404, detail="Issue not found")
         return report
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -1235,14 +1654,18 @@ async def update_issue_status(
             )
 
         # 3️⃣ Update BOTH fields (CRITICAL FIX)
+        old_status = report.status
         report.status_id = new_status.id            # ✅ used everywhere
         report.status = new_status.name             # ⚠️ optional
+        mark_resolution(report, new_status.name)
 
         report.updated_at = datetime.utcnow()
 
         # 4️⃣ Save
         await db.commit()
         await db.refresh(report)
+        sync_duplicate_index(report, new_status.name)
+        record_status_change(report, old_status, new_status.name)
 
         return {
             "message": "Status updated successfully",
@@ -1271,8 +1694,13 @@ async def delete_issue(report_id: int, db: AsyncSession = Depends(get_db)):
         if not report:
             raise HTTPException(status_code=404, detail="Issue not found")
         
+        await delete_report_rows(db, [report_id])
         await db.delete(report)
         await db.commit()
+        live_feed.report_deleted(report_id, report.status)
+        similarity_index.remove(report_id)
+        duplicate_index.remove(report_id)
+        image_cache.unlink_report(report_id)
         
         return {"message": "Issue deleted successfully"}
     except Exception as e:
@@ -1309,8 +1737,10 @@ async def resolve_issue(
             )
 
         # 3️⃣ Update BOTH status fields (CRITICAL FIX)
+        old_status = report.status
         report.status_id = resolved_status.id      # ✅ Source of truth
         report.status = "Resolved"                 # ⚠️ optional (legacy support)
+        mark_resolution(report, "Resolved")
 
         # 4️⃣ Other fields
         report.resolution_notes = resolve_data.resolution_notes
@@ -1320,6 +1750,8 @@ async def resolve_issue(
         # 5️⃣ Save
         await db.commit()
         await db.refresh(report)
+        duplicate_index.remove(report.id)
+        record_status_change(report, old_status, "Resolved")
 
         return {
             "message": "Issue resolved successfully",
@@ -1365,6 +1797,20 @@ def get_department_icon(dept_name: str) -> str:
 }
     return icon_mapping.get(dept_name, "build")
 
+def validate_period(period: str) -> str:
+    if period not in STATS_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of: {', '.join(STATS_PERIODS)}")
+    return period
+
+def period_bounds(rows) -> dict:
+    """Window of the precomputed stats being served (all rows come from one refresh)"""
+    stats = rows[0][2] if rows else None
+    return {
+        "period_start": stats.period_start.isoformat() if stats else None,
+        "period_end": stats.period_end.isoformat() if stats else None,
+        "calculated_at": stats.calculated_at.isoformat() if stats else None,
+    }
+
 def get_category_from_department(dept_name: str) -> str:
     category_mapping = {
         "Water Dept": "Utilities",
@@ -1402,83 +1848,138 @@ class DepartmentFeedbackRequest(BaseModel):
     feedback_text: str
     rating: Optional[int] = None
 
+MAX_BULK_IDS = 10_000
+
+def validate_bulk_ids(v):
+    if not v:
+        raise ValueError('issue_ids must not be empty')
+    if len(v) > MAX_BULK_IDS:
+        raise ValueError(f'At most {MAX_BULK_IDS} issue ids per request')
+    return list(dict.fromkeys(v))
+
 class StatusUpdateRequest(BaseModel):
     department_id: int
     issue_ids: List[int]
     new_status: str
 
+    _validate_ids = validator('issue_ids', allow_reuse=True)(validate_bulk_ids)
+
 class ResolveIssuesRequest(BaseModel):
     department_id: int
     issue_ids: List[int]
     resolution_notes: str
 
+    _validate_ids = validator('issue_ids', allow_reuse=True)(validate_bulk_ids)
+
+async def bulk_set_status(
+    db: AsyncSession,
+    issue_ids: List[int],
+    status_name: str,
+    extra_values: Optional[dict] = None,
+    user_id: Optional[int] = None
+) -> dict:
+    """
+    Move many reports to one status with a single UPDATE ... WHERE id = ANY(:ids) RETURNING.
+    Rows already in that status are left alone (their updated_at / resolved_at keep
+    their meaning). Returns which ids changed, were already in the status, or don't exist.
+    """
+    status_id = await status_ids.get(db, status_name)
+    if status_id is None:
+        raise HTTPException(status_code=400, detail=f"Invalid status '{status_name}'")
+
+    ids_param = bindparam("ids", value=issue_ids, type_=ARRAY(SAInteger))
+    now = datetime.utcnow()
+    values = {
+        "status_id": status_id,
+        "status": status_name,
+        "updated_at": now,
+        # Keep the original resolution time if a report is somehow already marked resolved
+        "resolved_at": func.coalesce(Report.resolved_at, now) if status_name == "Resolved" else None,
+        **(extra_values or {}),
+    }
+    # Rows to change, locked, with the status they had - RETURNING only sees the new one
+    previous = (
+        select(Report.id, Report.status.label("previous_status"))
+        .where(
+            Report.id == any_(ids_param),
+            or_(Report.status_id.is_distinct_from(status_id), Report.status.is_distinct_from(status_name))
+        )
+        .with_for_update()
+        .subquery("previous")
+    )
+    result = await db.execute(
+        update(Report)
+        .where(Report.id == previous.c.id)
+        .values(**values)
+        .returning(
+            Report.id, Report.location_lat, Report.location_long,
+            Report.text_simhash, Report.title, Report.description,
+            # for the activity events and live feed
+            Report.issue_type, Report.category, Report.urgency_level,
+            Report.location_address, Report.department, Report.resolved_by,
+            previous.c.previous_status
+        )
+        .execution_options(synchronize_session=False)
+    )
+    changed_rows = result.all()
+    changed_ids = {row.id for row in changed_rows}
 
+    remaining = [i for i in issue_ids if i not in changed_ids]
+    existing = set()
+    if remaining:
+        existing_result = await db.execute(
+            select(Report.id).where(Report.id == any_(bindparam("remaining", value=remaining, type_=ARRAY(SAInteger))))
+        )
+        existing = set(existing_result.scalars().all())
 
-@app.get("/api/departments/summary")
+    await db.commit()
+    for row in changed_rows:
+        sync_duplicate_index(row, status_name)
+        record_status_change(row, row.previous_status, status_name, user_id)
+
+    return {
+        "status": status_name,
+        "updated_ids": [i for i in issue_ids if i in changed_ids],
+        "unchanged_ids": [i for i in remaining if i in existing],
+        "not_found_ids": [i for i in remaining if i not in existing],
+    }
+
+
+
+@app.get("/api/departments/summary", dependencies=[Depends(conditional_get("departments-summary", per_day=True))])
 async def get_departments_summary(
     period: str = Query("month", description="Time period: week, month, year"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get summary for all departments with REAL DATA from database
+    Summary for all departments over the rolling period, from the precomputed department_stats rows
     """
+    period = validate_period(period)
     try:
-        # ✅ FIXED: Use actual department field from Report model
-        # Map database department values to display names
-        department_display_names = {
-            "water_dept": "Water Dept",
-            "road_dept": "Road Dept",
-            "sanitation_dept": "Sanitation Dept",
-            "electricity_dept": "Electricity Dept",
-            "other": "Other"
-        }
-        
+        rows = await read_department_stats(db, period)
         departments_data = []
-        
-        # Query each department's real data
-        for dept_key, dept_name in department_display_names.items():
-            # Get total issues for this department
-            total_result = await db.execute(
-                select(func.count(Report.id))
-                .where(Report.department == dept_key)
-            )
-            total_issues = total_result.scalar() or 0
-            
-            # Get status counts for this department
-            status_result = await db.execute(
-                select(Report.status, func.count(Report.id))
-                .where(Report.department == dept_key)
-                .group_by(Report.status)
-            )
-            status_counts = dict(status_result.all())
-            
-            resolved = status_counts.get("Resolved", 0)
-            pending = status_counts.get("Pending", 0)
-            progress = status_counts.get("In Progress", 0)
-            
-            # Calculate efficiency
-            efficiency = round((resolved / total_issues * 100) if total_issues > 0 else 0, 1)
-            
+        for dept_key, dept_name, stats in rows:
             # Only add departments that have issues
-            if total_issues > 0:
+            if stats.total_issues > 0:
                 departments_data.append({
     "id": len(departments_data) + 1,
     "name": dept_name,
     "internal_name": dept_key,          # ✅ ADD
     "icon": get_department_icon(dept_name),  # must match frontend
-    "resolved": resolved,
-    "pending": pending,
-    "progress": progress,
-    "efficiency": efficiency,
-    "total_issues": total_issues
+    "resolved": stats.resolved_issues,
+    "pending": stats.pending_issues,
+    "progress": stats.in_progress_issues,
+    "efficiency": stats.efficiency_score,
+    "total_issues": stats.total_issues
 })
 
         
-        print(f"✅ Fetched real data for {len(departments_data)} departments")
+        print(f"✅ Fetched {period} stats for {len(departments_data)} departments")
         
         return {
             "departments": departments_data,
             "period": period,
+            **period_bounds(rows),
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -1494,7 +1995,7 @@ from sqlalchemy import text
 @app.get("/api/departments/resolution-trends")
 async def get_resolution_trends(
     months: int = Query(6, ge=1, le=12),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     REAL month-wise resolution efficiency per department
@@ -1564,11 +2065,12 @@ async def get_resolution_trends(
 async def get_department_details(
     dept_id: int,
     period: str = Query("month", description="Time period: week, month, year"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get REAL detailed information for a specific department
     """
+    period = validate_period(period)
     try:
         # Map department IDs to database keys
         id_to_dept = {
@@ -1587,29 +2089,25 @@ async def get_department_details(
         
         dept_key, dept_name = id_to_dept[dept_id]
         
-        # Get REAL statistics from database
-        status_result = await db.execute(
-            select(Report.status, func.count(Report.id))
-            .where(Report.department == dept_key)
-            .group_by(Report.status)
-        )
-        status_counts = dict(status_result.all())
+        # Precomputed counts for the rolling period
+        rows = [row for row in await read_department_stats(db, period) if row[0] == dept_key]
+        stats = rows[0][2] if rows else None
         
-        resolved = status_counts.get("Resolved", 0)
-        pending = status_counts.get("Pending", 0)
-        progress = status_counts.get("In Progress", 0)
+        resolved = stats.resolved_issues if stats else 0
+        pending = stats.pending_issues if stats else 0
+        progress = stats.in_progress_issues if stats else 0
         total_issues = resolved + pending + progress
         
-        efficiency = round((resolved / total_issues * 100) if total_issues > 0 else 0, 1)
-        
         return {
             "id": dept_id,
             "name": dept_name,
             "icon": get_department_icon(dept_name),
+            "period": period,
+            **period_bounds(rows),
             "resolved": resolved,
             "pending": pending,
             "progress": progress,
-            "efficiency": efficiency,
+            "efficiency": efficiency_score(resolved, total_issues),
             "total_issues": total_issues,
             "efficiency_trend": generate_efficiency_trend(dept_id),
             "breakdown": {
@@ -1632,42 +2130,27 @@ async def get_department_details(
 @app.get("/api/departments/issues/by-department")
 async def get_issues_by_department(
     period: str = Query("month", description="Time period: week, month, year"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get REAL issues count per department for bar chart
+    Issues reported per department over the rolling period, for the bar chart
     """
+    period = validate_period(period)
     try:
-        department_display_names = {
-            "water_dept": "Water Dept",
-            "road_dept": "Road Dept",
-            "sanitation_dept": "Sanitation Dept",
-            "electricity_dept": "Electricity Dept",
-            "other": "Other"
-        }
-        
-        data = []
-        
-        for dept_key, dept_name in department_display_names.items():
-            # Get real count from database
-            count_result = await db.execute(
-                select(func.count(Report.id))
-                .where(Report.department == dept_key)
-            )
-            count = count_result.scalar() or 0
-            
-            # Only include departments with issues
-            if count > 0:
-                data.append({
-                    "department": dept_name,
-                    "issues_count": float(count)
-                })
+        rows = await read_department_stats(db, period)
+        # Only include departments with issues
+        data = [
+            {"department": dept_name, "issues_count": float(stats.total_issues)}
+            for _, dept_name, stats in rows
+            if stats.total_issues > 0
+        ]
         
         print(f"✅ Bar chart data: {data}")
         
         return {
             "data": data,
-            "period": period
+            "period": period,
+            **period_bounds(rows)
         }
         
     except Exception as e:
@@ -1710,33 +2193,20 @@ async def update_issues_status(
     # REMOVED: current_user: User = Depends(get_current_admin)
 ):
     """
-    Bulk update issues status for a department
+    Bulk update issues status for a department (up to 10,000 ids, one UPDATE)
     """
     try:
-        # Update issues in database
-        for issue_id in update.issue_ids:
-            result = await db.execute(
-                select(Report).filter(Report.id == issue_id)
-            )
-            report = result.scalar_one_or_none()
-            if report:
-                # Get status ID for the new status
-                status_result = await db.execute(
-                    select(Status).filter(Status.name == update.new_status)
-                )
-                status_obj = status_result.scalar_one_or_none()
-                if status_obj:
-                    report.status_id = status_obj.id
-                    report.updated_at = datetime.utcnow()
-        
-        await db.commit()
+        outcome = await bulk_set_status(db, update.issue_ids, update.new_status)
         
         return {
-            "message": f"Updated {len(update.issue_ids)} issues to {update.new_status}",
-            "updated_count": len(update.issue_ids),
-            "department_id": update.department_id
+            "message": f"Updated {len(outcome['updated_ids'])} issues to {update.new_status}",
+            "updated_count": len(outcome["updated_ids"]),
+            "department_id": update.department_id,
+            **outcome
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -1744,6 +2214,40 @@ async def update_issues_status(
             detail=f"Error updating issues status: {str(e)}"
         )
 
+@app.post("/api/departments/resolve-issues")
+async def resolve_issues(
+    request: ResolveIssuesRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Bulk resolve issues (e.g. after a cleanup drive) with shared resolution notes
+    """
+    try:
+        outcome = await bulk_set_status(
+            db,
+            request.issue_ids,
+            "Resolved",
+            {"resolution_notes": request.resolution_notes, "resolved_by": current_user.full_name},
+            current_user.id
+        )
+        
+        return {
+            "message": f"Resolved {len(outcome['updated_ids'])} issues",
+            "resolved_count": len(outcome["updated_ids"]),
+            "department_id": request.department_id,
+            **outcome
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error resolving issues: {str(e)}"
+        )
+
 def generate_trend_data(current_efficiency: float, months: int = 6):
     """
     Generate a realistic efficiency trend leading to current efficiency
@@ -1760,7 +2264,7 @@ def generate_trend_data(current_efficiency: float, months: int = 6):
 @app.get("/api/departments/{dept_id}/status-breakdown")
 async def get_department_status_breakdown(
     dept_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get resolved / pending / in-progress breakdown for a department
@@ -1821,7 +2325,7 @@ async def get_department_status_breakdown(
 async def get_department_efficiency_trend(
     dept_id: int,
     months: int = Query(6, ge=1, le=12, description="Number of months for trend"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get efficiency trend for a specific department
@@ -1979,15 +2483,43 @@ class UserProfileUpdate(BaseModel):
     
 # Add these endpoints to your main.py
 
+MAP_FORMAT_DESCRIPTION = (
+    "full: one object per issue; compact: columnar JSON (ids, quantized coordinates, "
+    "status / urgency codes); binary: the same columns as little-endian typed arrays"
+)
+
+
+def validate_map_format(format: str):
+    if format not in MAP_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(MAP_FORMATS)}")
+
+
+async def map_markers_response(db: AsyncSession, stmt, format: str, headers: Optional[dict] = None) -> Response:
+    """
+    Compact / binary map payload: only what's needed to draw the pins, read
+    without loading Report objects. Pin details come from /api/admin/map/issues/{id}.
+    """
+    stmt = stmt.with_only_columns(
+        Report.id, Report.location_lat, Report.location_long, Report.status, Report.urgency_level
+    ).order_by(Report.id)
+    columns = MapColumns((await db.execute(stmt)).all())
+    if format == "binary":
+        return Response(columns.to_binary(), media_type=BINARY_MEDIA_TYPE, headers=headers)
+    return Response(columns.to_json(), media_type="application/json", headers=headers)
+
+
 @app.get("/api/admin/map/issues", response_model=MapIssuesResponse)
 async def get_map_issues(
     status: Optional[str] = None,
     category: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    format: str = Query("full", description=MAP_FORMAT_DESCRIPTION),
+    validators: dict = Depends(conditional_get("map-issues")),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all issues with coordinates for map display
     """
+    validate_map_format(format)
     try:
         # Build query - ensure coordinates exist
         stmt = select(Report).where(
@@ -2003,32 +2535,13 @@ async def get_map_issues(
         if category and category.lower() != "all":
             # Actually filtering by urgency_level based on your Flutter code
             stmt = stmt.where(Report.urgency_level == category)
-        
-        # Execute query
-        result = await db.execute(stmt)
-        reports = result.scalars().all()
-        
-        # Format response - handle None values gracefully
-        map_issues = []
-        for report in reports:
-            try:
-                map_issues.append(MapIssueResponse(
-                    id=report.id,
-                    title=report.title or "Untitled Issue",
-                    status=report.status or "Pending",
-                    urgency_level=report.urgency_level or "Medium",
-                    location_lat=report.location_lat,
-                    location_long=report.location_long,
-                    description=report.description,
-                    created_at=report.created_at or datetime.utcnow(),
-                    user_email=report.user_email,
-                    location_address=report.location_address
-                ))
-            except Exception as e:
-                print(f"Error processing report {report.id}: {str(e)}")
-                continue
-        
-        return MapIssuesResponse(issues=map_issues)
+
+        if format != "full":
+            return await map_markers_response(db, stmt, format, validators)
+
+        # Execute query - None values get their defaults from MapIssueRow
+        result = await db.execute(stmt.with_only_columns(*MapIssueRow.columns))
+        return FastJSONResponse({"issues": MapIssueRow.from_rows(result.all())}, headers=validators)
         
     except Exception as e:
         print(f"Error in get_map_issues: {str(e)}")
@@ -2044,11 +2557,13 @@ async def get_issues_in_bounds(
     south: float,
     east: float,
     west: float,
-    db: AsyncSession = Depends(get_db)
+    format: str = Query("full", description=MAP_FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get issues within specific geographic bounds
     """
+    validate_map_format(format)
     try:
         # Validate bounds
         if north <= south:
@@ -2069,31 +2584,12 @@ async def get_issues_in_bounds(
             Report.location_lat.between(south, north),
             Report.location_long.between(west, east)
         )
-        
-        result = await db.execute(stmt)
-        reports = result.scalars().all()
-        
-        # Format response
-        map_issues = []
-        for report in reports:
-            try:
-                map_issues.append(MapIssueResponse(
-                    id=report.id,
-                    title=report.title or "Untitled Issue",
-                    status=report.status or "Pending",
-                    urgency_level=report.urgency_level or "Medium",
-                    location_lat=report.location_lat,
-                    location_long=report.location_long,
-                    description=report.description,
-                    created_at=report.created_at or datetime.utcnow(),
-                    user_email=report.user_email,
-                    location_address=report.location_address
-                ))
-            except Exception as e:
-                print(f"Error processing report {report.id}: {str(e)}")
-                continue
-        
-        return MapIssuesResponse(issues=map_issues)
+
+        if format != "full":
+            return await map_markers_response(db, stmt, format)
+
+        result = await db.execute(stmt.with_only_columns(*MapIssueRow.columns))
+        return FastJSONResponse({"issues": MapIssueRow.from_rows(result.all())})
         
     except Exception as e:
         print(f"Error in get_issues_in_bounds: {str(e)}")
@@ -2103,8 +2599,32 @@ async def get_issues_in_bounds(
         )
 
 
+@app.get("/api/admin/map/issues/{report_id}", response_model=MapIssueResponse)
+async def get_map_issue(report_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Details of one map pin, fetched when it is tapped on a compact / binary map
+    """
+    result = await db.execute(select(Report).where(Report.id == report_id))
+    report = result.scalar_one_or_none()
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Report with ID {report_id} not found")
+
+    return MapIssueResponse(
+        id=report.id,
+        title=report.title or "Untitled Issue",
+        status=report.status or "Pending",
+        urgency_level=report.urgency_level or "Medium",
+        location_lat=report.location_lat,
+        location_long=report.location_long,
+        description=report.description,
+        created_at=report.created_at or datetime.utcnow(),
+        user_email=report.user_email,
+        location_address=report.location_address
+    )
+
+
 @app.get("/api/admin/map/stats", response_model=MapStatsResponse)
-async def get_map_stats(db: AsyncSession = Depends(get_db)):
+async def get_map_stats(db: AsyncSession = Depends(get_read_db)):
     """
     Get statistics for map view
     """
@@ -2162,7 +2682,7 @@ async def get_map_stats(db: AsyncSession = Depends(get_db)):
 # Add these to your FastAPI backend
 
 @app.get("/api/admin/dashboard/stats")
-async def get_admin_dashboard_stats(db: AsyncSession = Depends(get_db)):
+async def get_admin_dashboard_stats(db: AsyncSession = Depends(get_read_db)):
     """
     Get real-time statistics for admin dashboard
     """
@@ -2196,8 +2716,8 @@ async def get_admin_dashboard_stats(db: AsyncSession = Depends(get_db)):
             detail=f"Error fetching admin dashboard stats: {str(e)}"
         )
 @app.get("/api/admin/dashboard/monthly-trends")
-async def get_monthly_trends(db: AsyncSession = Depends(get_db)):
-    now = datetime.utcnow().replace(day=1)
+async def get_monthly_trends(db: AsyncSession = Depends(get_read_db)):
+    now = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     monthly_data = []
 
     for i in range(5, -1, -1):
@@ -2219,7 +2739,7 @@ async def get_monthly_trends(db: AsyncSession = Depends(get_db)):
 
 
 @app.get("/api/admin/dashboard/department-performance")
-async def get_department_performance(db: AsyncSession = Depends(get_db)):
+async def get_department_performance(db: AsyncSession = Depends(get_read_db)):
     """
     Get department performance based on resolved issues
     """
@@ -2308,35 +2828,24 @@ async def get_department_performance(db: AsyncSession = Depends(get_db)):
         return {"departments": performance_data}
 
 @app.get("/api/admin/dashboard/recent-reports")
-async def get_recent_reports(db: AsyncSession = Depends(get_db), limit: int = 4):
+async def get_recent_reports(db: AsyncSession = Depends(get_read_db), limit: int = 4):
     """
     Get most recent reports for dashboard
     """
     try:
         recent_reports_result = await db.execute(
-            select(Report)
+            RecentReportRow.select()
             .order_by(Report.created_at.desc())
             .limit(limit)
         )
-        recent_reports = recent_reports_result.scalars().all()
-        
         formatted_reports = []
-        for report in recent_reports:
-            # Calculate time ago
-            time_ago = get_time_ago(report.created_at or datetime.utcnow())
-            
-            formatted_reports.append({
-                "id": report.id,
-                "title": report.title,
-                "description": report.description,
-                "location": report.location_address or "Location not specified",
-                "status": report.status or "Pending",
-                "time_ago": time_ago,
-                "department": report.department or "Not assigned",
-                "created_at": report.created_at.isoformat() if report.created_at else datetime.utcnow().isoformat()
-            })
-        
-        return {"recent_reports": formatted_reports}
+        for report in RecentReportRow.from_rows(recent_reports_result.all()):
+            # Rows without created_at count as just submitted, as before
+            created_at = report.created_at or datetime.utcnow()
+            formatted_reports.append(
+                {**report.as_dict(), "created_at": created_at, "time_ago": get_time_ago(created_at)}
+            )
+        return FastJSONResponse({"recent_reports": formatted_reports})
         
     except Exception as e:
         raise HTTPException(
@@ -2392,33 +2901,65 @@ def combine_predictions(text_pred, text_confidence, img_pred=None, img_confidenc
         # Default to text prediction if both are uncertain
         return text_pred, text_confidence
 
-@app.post("/api/predict-department")
+async def predict_image_cached(db: AsyncSession, image_bytes: bytes):
+    """
+    Image prediction that skips the CNN for exact or near-exact re-uploads.
+    Returns (cache entry for this upload, how it matched the cache or None)
+    """
+    version = model_registry.active_version("image")
+    await image_cache.ensure_version(db, version)
+    digest = content_hash(image_bytes)
+    entry = image_cache.get(digest)
+    if entry:
+        return entry, "exact"
+
+    phash = perceptual_hash(image_bytes)
+    match = image_cache.find_near_exact(phash)
+    if match:
+        # Same picture re-encoded - reuse the prediction under this upload's hash
+        entry = CachedImagePrediction(
+            digest, phash, match.department, match.original_prediction,
+            match.confidence, match.embedding, version
+        )
+        await image_cache.store(db, entry)
+        return entry, "perceptual"
+
+    async with inference_gate.slot("predict-department"):
+        department, original_pred, confidence, embedding = await run_in_threadpool(
+            lambda: classify_image_with_embedding(preprocess_image(image_bytes))
+        )
+    entry = CachedImagePrediction(digest, phash, department, original_pred, confidence, embedding, version)
+    await image_cache.store(db, entry)
+    return entry, None
+
+@app.post("/api/predict-department", dependencies=[Depends(rate_limit("predict-department"))])
 async def predict_department(
     description: str = Form(...),
-    image: Optional[UploadFile] = File(None)
+    image: Optional[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Step 1: Get text prediction
-        text_pred, text_conf, text_top3 = predict_department_from_text(description)
-        
+        # Inference runs in the threadpool, at most INFERENCE_CONCURRENCY at a time
+        async with inference_gate.slot("predict-department"):
+            text_pred, text_conf, text_top3 = await run_in_threadpool(predict_department_from_text, description)
+    
         # Step 2: Get image prediction if available
         img_pred = None
         img_conf = None
-        
+        image_entry = None
+        cache_match = None
+    
         if image and image.content_type.startswith('image/'):
             image_bytes = await image.read()
-            processed_image = preprocess_image(image_bytes)
-            predictions = model.predict(processed_image)
-            class_idx = np.argmax(predictions[0])
-            original_pred = original_class_labels[class_idx]
-            img_conf = float(predictions[0][class_idx]) * 100
-            img_pred = department_mapping.get(original_pred, "other")
-        
+            image_entry, cache_match = await predict_image_cached(db, image_bytes)
+            img_pred, img_conf = image_entry.department, image_entry.confidence
+    
         # Step 3: Combine predictions
         final_department, final_confidence = combine_predictions(
             text_pred, text_conf, img_pred, img_conf
         )
-        
+    
         return {
             "final_department": final_department,
             "final_confidence": final_confidence,
@@ -2429,31 +2970,185 @@ async def predict_department(
             },
             "image_prediction": {
                 "department": img_pred,
-                "confidence": img_conf
+                "confidence": img_conf,
+                "image_hash": image_entry.content_hash,
+                "cached": cache_match is not None,
+                "cache_match": cache_match
             } if img_pred else None,
+            "visually_similar_reports": [
+                {"report_id": report_id, "similarity": round(score, 4)}
+                for report_id, score in image_cache.similar_reports(image_entry.embedding)
+            ] if image_entry else [],
             "success": True
         }
-        
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Prediction error: {str(e)}")
 
-@app.post("/predict-text-only")
+@app.post("/predict-text-only", dependencies=[Depends(rate_limit("predict-text-only"))])
 async def predict_text_only(description: str):
     """Endpoint for text-only prediction"""
-    try:
-        pred, confidence, top3 = predict_department_from_text(description)
-        return {
-            "department": pred,
-            "confidence": confidence,
-            "top3_alternatives": top3,
-            "success": True
+    async with inference_gate.slot("predict-text-only"):
+        try:
+            pred, confidence, top3 = await run_in_threadpool(predict_department_from_text, description)
+            return {
+                "department": pred,
+                "confidence": confidence,
+                "top3_alternatives": top3,
+                "success": True
+            }
+        except Exception as e:
+            raise HTTPException(500, f"Text prediction error: {str(e)}")
+
+
+
+BATCH_PREDICT_MAX_ITEMS = 5000
+BATCH_PREDICT_CHUNK_SIZE = 64
+
+class BatchPredictRequest(BaseModel):
+    items: List[IssueRequest]
+
+    @validator('items')
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError('At least one item must be provided')
+        if len(v) > BATCH_PREDICT_MAX_ITEMS:
+            raise ValueError(f'Cannot predict more than {BATCH_PREDICT_MAX_ITEMS} items at once')
+        return v
+
+def decode_image_data(image_data: str) -> bytes:
+    """Accepts plain base64 or a data URL (data:image/png;base64,...)"""
+    if image_data.startswith("data:"):
+        image_data = image_data.split(",", 1)[-1]
+    return base64.b64decode(image_data, validate=True)
+
+def predict_batch_chunk(start_index: int, items: List[IssueRequest], image_version: str):
+    """
+    Classify one chunk of a batch: a single vectorized text pass plus one batched
+    CNN call for the images that miss the image cache (loaded for image_version).
+    Returns (result lines in input order, new image cache entries to persist)
+    """
+    results = {}
+    text_items = []
+    new_entries = []
+
+    # 1️⃣ Decode images, reuse cached predictions where possible
+    image_entries = {}
+    pending_images = []
+    for offset, item in enumerate(items):
+        index = start_index + offset
+        if not item.description or not item.description.strip():
+            results[index] = {"index": index, "success": False, "error": "Description cannot be empty"}
+            continue
+        text_items.append((index, item))
+
+        if not item.image_data:
+            continue
+        try:
+            image_bytes = decode_image_data(item.image_data)
+            digest = content_hash(image_bytes)
+            entry = image_cache.get(digest)
+            if entry is None:
+                phash = perceptual_hash(image_bytes)
+                match = image_cache.find_near_exact(phash)
+                if match:
+                    entry = CachedImagePrediction(
+                        digest, phash, match.department, match.original_prediction,
+                        match.confidence, match.embedding, image_version
+                    )
+                    new_entries.append(entry)
+                else:
+                    pending_images.append((index, digest, phash, preprocess_image(image_bytes)))
+                    continue
+            image_entries[index] = (entry, True)
+        except Exception as e:
+            results[index] = {"index": index, "success": False, "error": f"Invalid image: {str(e)}"}
+
+    # 2️⃣ Batched inference for the cache misses
+    if pending_images:
+        predictions = classify_images_with_embedding([p[3] for p in pending_images])
+        for (index, digest, phash, _), (department, original_pred, confidence, embedding) in zip(pending_images, predictions):
+            entry = CachedImagePrediction(digest, phash, department, original_pred, confidence, embedding, image_version)
+            image_entries[index] = (entry, False)
+            new_entries.append(entry)
+
+    # 3️⃣ One vectorized text pass
+    text_items = [(index, item) for index, item in text_items if index not in results]
+    text_predictions = predict_departments_from_texts([item.description for _, item in text_items])
+
+    for (index, _), (text_pred, text_conf, text_top3) in zip(text_items, text_predictions):
+        entry, cached = image_entries.get(index, (None, False))
+        final_department, final_confidence = combine_predictions(
+            text_pred, text_conf,
+            entry.department if entry else None,
+            entry.confidence if entry else None
+        )
+        results[index] = {
+            "index": index,
+            "success": True,
+            "final_department": final_department,
+            "final_confidence": final_confidence,
+            "text_prediction": {
+                "department": text_pred,
+                "confidence": text_conf,
+                "top3_alternatives": text_top3
+            },
+            "image_prediction": {
+                "department": entry.department,
+                "confidence": entry.confidence,
+                "image_hash": entry.content_hash,
+                "cached": cached
+            } if entry else None
         }
-    except Exception as e:
-        raise HTTPException(500, f"Text prediction error: {str(e)}")
 
+    return [results[index] for index in sorted(results)], new_entries
 
+@app.post("/api/predict-department/batch", dependencies=[Depends(rate_limit("predict-batch"))])
+async def predict_department_batch(batch: BatchPredictRequest, request: Request):
+    """
+    Classify many complaints in one call. Results are streamed back as NDJSON,
+    one line per item in input order, failed items carry "success": false and an "error".
+    Every item costs one rate-limit token, like a single prediction; once the client's
+    burst is spent the stream is paced at its refill rate.
+    """
+    client = client_key(request)
 
-@app.post("/api/ai/auto-assign")
+    async def generate():
+        for start in range(0, len(batch.items), BATCH_PREDICT_CHUNK_SIZE):
+            chunk = batch.items[start:start + BATCH_PREDICT_CHUNK_SIZE]
+            # The route dependency already took the first item's token
+            await rate_limiter.acquire(client, len(chunk) - (1 if start == 0 else 0), "predict-batch")
+            try:
+                image_version = model_registry.active_version("image")
+                if image_cache.model_version != image_version:
+                    async with AsyncSessionLocal() as session:
+                        await image_cache.ensure_version(session, image_version)
+                # A shed chunk comes back as failed lines - the 200 is already sent
+                async with inference_gate.slot("predict-batch"):
+                    lines, new_entries = await run_in_threadpool(predict_batch_chunk, start, chunk, image_version)
+            except Exception as e:
+                lines = [
+                    {"index": start + offset, "success": False, "error": f"Prediction error: {str(e)}"}
+                    for offset in range(len(chunk))
+                ]
+                new_entries = []
+
+            for line in lines:
+                yield json.dumps(line) + "\n"
+
+            if new_entries:
+                try:
+                    async with AsyncSessionLocal() as session:
+                        for entry in new_entries:
+                            await image_cache.store(session, entry)
+                except Exception as e:
+                    print(f"⚠️ Could not persist batch image predictions: {str(e)}")
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.post("/api/ai/auto-assign", dependencies=[Depends(rate_limit("auto-assign"))])
 async def auto_assign_departments(
     force_reassign: bool = Body(False),
     urgency_level: str = Body("Medium"),  # ✅ CHANGED: "Medium" with capital M
@@ -2481,39 +3176,33 @@ async def auto_assign_departments(
         issues = result.scalars().all()
         
         assigned_count = 0
-        processed_count = 0
+        processed_count = len(issues)
         
-        for issue in issues:
-            try:
-                processed_count += 1
-                
-                # Skip if description is too short for meaningful prediction
-                if not issue.description or len(issue.description.strip()) < 10:
-                    continue
-                
-                print(f"🔍 Processing issue {issue.id}: {issue.description[:50]}...")
-                
-                # ✅ FIXED: Use your existing text-only prediction endpoint
-                prediction_response = await predict_text_only(issue.description)
-                
-                if (prediction_response.get('success') and 
-                    prediction_response.get('department') != 'other' and
-                    prediction_response.get('confidence', 0) > 50):  # Minimum confidence threshold
-                    
-                    issue.department = prediction_response['department']
+        # Skip if description is too short for meaningful prediction
+        candidates = [
+            issue for issue in issues
+            if issue.description and len(issue.description.strip()) >= 10
+        ]
+        
+        # One vectorized text pass per chunk, each inside a single inference slot.
+        # A shed chunk raises 503 and nothing is committed, so a retry starts clean.
+        for start in range(0, len(candidates), BATCH_PREDICT_CHUNK_SIZE):
+            chunk = candidates[start:start + BATCH_PREDICT_CHUNK_SIZE]
+            print(f"🔍 Processing issues {chunk[0].id}..{chunk[-1].id} ({len(chunk)})")
+            async with inference_gate.slot("auto-assign"):
+                predictions = await run_in_threadpool(
+                    predict_departments_from_texts, [issue.description for issue in chunk]
+                )
+            
+            for issue, (department, confidence, _) in zip(chunk, predictions):
+                if department != 'other' and confidence > 50:  # Minimum confidence threshold
+                    issue.department = department
                     issue.auto_assigned = True
-                    issue.prediction_confidence = prediction_response['confidence']
+                    issue.prediction_confidence = confidence
                     assigned_count += 1
                     
                     print(f"✅ Assigned issue {issue.id} to {issue.department} "
-                          f"(confidence: {prediction_response['confidence']}%)")
-                
-                # Add small delay to avoid overwhelming the system
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                print(f"❌ Failed to process issue {issue.id}: {e}")
-                continue
+                          f"(confidence: {confidence}%)")
         
         await db.commit()
         
@@ -2530,8 +3219,137 @@ async def auto_assign_departments(
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Auto-assignment failed: {str(e)}")
+class ModelActivateRequest(BaseModel):
+    version: str
+
+class ModelShadowRequest(BaseModel):
+    version: str
+    sample_rate: float = 0.1
+
+    @validator('sample_rate')
+    def validate_sample_rate(cls, v):
+        if not 0 < v <= 1:
+            raise ValueError('Sample rate must be between 0 and 1')
+        return v
+
+@app.get("/api/admin/models")
+async def get_model_registry_status(current_user: User = Depends(get_current_admin)):
+    """
+    Active and shadow model versions with per-version latency and agreement metrics
+    """
+    return model_registry.status()
+
+@app.post("/api/admin/models/{kind}/activate")
+async def activate_model_version(
+    kind: str,
+    request: ModelActivateRequest,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Load a registry version in the background and atomically make it the active model.
+    In-flight predictions finish on the version they started with.
+    """
+    try:
+        await model_registry.activate(kind, request.version)
+        if kind == "image":
+            # Cached predictions of the old version must not answer for the new one;
+            # other workers switch on their next image prediction
+            async with AsyncSessionLocal() as session:
+                await image_cache.ensure_version(session, model_registry.active_version("image"))
+        return {
+            "message": f"{kind} model {request.version} is now active",
+            "active_version": model_registry.active_version(kind)
+        }
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model activation failed: {str(e)}")
+
+@app.post("/api/admin/models/{kind}/shadow")
+async def start_shadow_scoring(
+    kind: str,
+    request: ModelShadowRequest,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Score a sampled fraction of live traffic with a candidate version, off the request path
+    """
+    try:
+        await model_registry.set_shadow(kind, request.version, request.sample_rate)
+        return {"message": f"Shadow scoring {kind} model {request.version} on {request.sample_rate:.0%} of traffic"}
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not start shadow scoring: {str(e)}")
+
+@app.delete("/api/admin/models/{kind}/shadow")
+async def stop_shadow_scoring(kind: str, current_user: User = Depends(get_current_admin)):
+    try:
+        await model_registry.set_shadow(kind, None)
+        return {"message": f"Shadow scoring stopped for {kind} model"}
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/admin/metrics/queries")
+async def get_query_metrics(
+    sort_by: str = Query("db_ms"),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Per-route SQL statement counts, DB time, slowest statement and N+1 candidates
+    for this worker since startup (or the last reset)
+    """
+    return query_metrics.summary(sort_by)
+
+@app.get("/api/admin/metrics/replicas")
+async def get_replica_status(current_user: User = Depends(get_current_admin)):
+    """
+    Lag and health of each read replica as of the last background check
+    """
+    return {"max_lag_seconds": REPLICA_MAX_LAG_SECONDS, "replicas": replica_router.status()}
+
+@app.get("/api/admin/metrics/live-feed")
+async def get_live_feed_status(current_user: User = Depends(get_current_admin)):
+    """
+    Live feed subscribers on this worker and messages fanned out so far
+    """
+    return live_feed.status()
+
+@app.get("/api/admin/metrics/admission")
+async def get_admission_metrics(current_user: User = Depends(get_current_admin)):
+    """
+    Rate-limited and shed inference requests, and how long admitted ones queued
+    """
+    return admission_status()
+
+@app.get("/api/admin/metrics/lanes")
+async def get_lane_metrics(current_user: User = Depends(get_current_admin)):
+    """
+    Latency, concurrency and database session use of each request lane
+    """
+    return lane_router.status()
+
+@app.get("/api/admin/metrics/data-version")
+async def get_data_version(current_user: User = Depends(get_current_admin)):
+    """
+    The data version behind the ETags of the cacheable read routes
+    """
+    return data_version.status()
+
+@app.get("/api/admin/metrics/department-stats")
+async def get_department_stats_status(current_user: User = Depends(get_current_admin)):
+    """
+    Refreshes of the precomputed week / month / year department stats
+    """
+    return department_stats.status()
+
+@app.delete("/api/admin/metrics/queries")
+async def reset_query_metrics(current_user: User = Depends(get_current_admin)):
+    query_metrics.reset()
+    return {"message": "Query metrics reset"}
+
 @app.get("/api/ai/assignment-status")
-async def get_assignment_status(db: AsyncSession = Depends(get_db)):
+async def get_assignment_status(db: AsyncSession = Depends(get_read_db)):
     """
     Get AI assignment statistics
     """
@@ -2586,13 +3404,13 @@ async def get_assignment_status(db: AsyncSession = Depends(get_db)):
 async def get_auto_assigned_issues(
     department: Optional[str] = None,
     period: str = "month",
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get list of auto-assigned issues for a specific department
     """
     try:
-        stmt = select(Report).where(Report.auto_assigned == True)
+        stmt = AutoAssignedIssueRow.select().where(Report.auto_assigned == True)
         
         if department and department != "all":
             stmt = stmt.where(Report.department == department)
@@ -2611,26 +3429,14 @@ async def get_auto_assigned_issues(
             stmt = stmt.where(Report.created_at >= start_date)
         
         result = await db.execute(stmt)
-        issues = result.scalars().all()
-        
-        issues_data = []
-        for issue in issues:
-            issues_data.append({
-                "id": issue.id,
-                "description": issue.description,
-                "department": issue.department,
-                "prediction_confidence": issue.prediction_confidence,
-                "status": issue.status,
-                "created_at": issue.created_at.isoformat() if issue.created_at else None,
-                "category": issue.category
-            })
+        issues_data = AutoAssignedIssueRow.from_rows(result.all())
         
-        return {
+        return FastJSONResponse({
             "issues": issues_data,
             "count": len(issues_data),
             "department": department or "all",
             "period": period
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get auto-assigned issues: {str(e)}")
@@ -2642,7 +3448,8 @@ async def get_user_dashboard_stats(
     db: AsyncSession = Depends(get_db)
 ):
     today = date.today()
-    week_start = today - relativedelta(days=today.weekday())
+    today_start, today_end = day_range(today)
+    week_start = day_start(today - relativedelta(days=today.weekday()))
     user_email = current_user.email
 
     total = await db.scalar(
@@ -2663,7 +3470,8 @@ async def get_user_dashboard_stats(
         select(func.count(Report.id))
         .where(
             Report.user_email == user_email,
-            func.date(Report.created_at) == today
+            Report.created_at >= today_start,
+            Report.created_at < today_end
         )
     )
 
@@ -2671,7 +3479,7 @@ async def get_user_dashboard_stats(
         select(func.count(Report.id))
         .where(
             Report.user_email == user_email,
-            func.date(Report.created_at) >= week_start
+            Report.created_at >= week_start
         )
     )
 
@@ -0,0 +1,212 @@
+"""baseline schema
+
+Every table as it existed before migrations were introduced. Databases that
+were built by metadata.create_all() and fix_database.py already have most of
+it, so tables are only created when missing and the columns those scripts
+added later are added with IF NOT EXISTS - `alembic upgrade head` works on
+both an empty database and an existing one.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("full_name", sa.String(), nullable=False),
+            sa.Column("mobile_number", sa.String(10), nullable=False, unique=True),
+            sa.Column("is_admin", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    op.create_index("ix_users_id", "users", ["id"], if_not_exists=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+
+    for table in ("categories", "statuses"):
+        if not _has_table(table):
+            op.create_table(
+                table,
+                sa.Column("id", sa.Integer(), primary_key=True),
+                sa.Column("name", sa.String(), nullable=False),
+                sa.Column("description", sa.Text()),
+            )
+        op.create_index(f"ix_{table}_id", table, ["id"], if_not_exists=True)
+        op.create_index(f"ix_{table}_name", table, ["name"], unique=True, if_not_exists=True)
+
+    if not _has_table("reports"):
+        op.create_table(
+            "reports",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_name", sa.String(255), nullable=False),
+            sa.Column("user_mobile", sa.String(15), nullable=False),
+            sa.Column("user_email", sa.String(255)),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("issue_type", sa.String(50), nullable=False),
+            sa.Column("category", sa.String(50), nullable=False),
+            sa.Column("urgency_level", sa.String(20), nullable=False),
+            sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id")),
+            sa.Column("status_id", sa.Integer(), sa.ForeignKey("statuses.id")),
+            sa.Column("status", sa.String(20)),
+            sa.Column("location_lat", sa.Float(), nullable=False),
+            sa.Column("location_long", sa.Float(), nullable=False),
+            sa.Column("location_address", sa.Text()),
+            sa.Column("distance", sa.Float()),
+            sa.Column("assigned_department", sa.String(100)),
+            sa.Column("resolution_notes", sa.Text()),
+            sa.Column("resolved_by", sa.String(255)),
+            sa.Column("images", sa.Text()),
+            sa.Column("voice_note", sa.String(500)),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("department", sa.String(), nullable=False),
+            sa.Column("auto_assigned", sa.Boolean(), nullable=False),
+            sa.Column("prediction_confidence", sa.Float()),
+            sa.Column("text_simhash", sa.BigInteger()),
+            sa.Column("confirmation_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+    else:
+        # Columns fix_database.py used to add by hand
+        op.execute("""
+            ALTER TABLE reports
+            ADD COLUMN IF NOT EXISTS department VARCHAR DEFAULT 'other',
+            ADD COLUMN IF NOT EXISTS auto_assigned BOOLEAN DEFAULT false,
+            ADD COLUMN IF NOT EXISTS prediction_confidence FLOAT,
+            ADD COLUMN IF NOT EXISTS text_simhash BIGINT,
+            ADD COLUMN IF NOT EXISTS confirmation_count INTEGER NOT NULL DEFAULT 0
+        """)
+    op.create_index("ix_reports_id", "reports", ["id"], if_not_exists=True)
+
+    if not _has_table("confirmations"):
+        op.create_table(
+            "confirmations",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id")),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("confirmed_at", sa.DateTime()),
+            sa.Column("user_name", sa.String(255)),
+            sa.Column("user_mobile", sa.String(15)),
+            sa.Column("user_email", sa.String(255)),
+        )
+    else:
+        op.execute("""
+            ALTER TABLE confirmations
+            ADD COLUMN IF NOT EXISTS user_name VARCHAR(255),
+            ADD COLUMN IF NOT EXISTS user_mobile VARCHAR(15),
+            ADD COLUMN IF NOT EXISTS user_email VARCHAR(255)
+        """)
+    op.create_index("ix_confirmations_id", "confirmations", ["id"], if_not_exists=True)
+    op.create_index("ix_confirmations_report_id", "confirmations", ["report_id"], if_not_exists=True)
+
+    if not _has_table("activity_logs"):
+        op.create_table(
+            "activity_logs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("activity_type", sa.String()),
+            sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id")),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("description", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    op.create_index("ix_activity_logs_id", "activity_logs", ["id"], if_not_exists=True)
+
+    if not _has_table("report_vectors"):
+        op.create_table(
+            "report_vectors",
+            sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("term_ids", sa.LargeBinary(), nullable=False),
+            sa.Column("weights", sa.LargeBinary(), nullable=False),
+            sa.Column("vocab_size", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+        )
+
+    if not _has_table("image_predictions"):
+        op.create_table(
+            "image_predictions",
+            sa.Column("content_hash", sa.String(64), primary_key=True),
+            sa.Column("perceptual_hash", sa.BigInteger(), nullable=False),
+            sa.Column("department", sa.String(50), nullable=False),
+            sa.Column("original_prediction", sa.String(50), nullable=False),
+            sa.Column("confidence", sa.Float(), nullable=False),
+            sa.Column("embedding", sa.LargeBinary(), nullable=False),
+            sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id", ondelete="SET NULL")),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    op.create_index("ix_image_predictions_perceptual_hash", "image_predictions", ["perceptual_hash"], if_not_exists=True)
+    op.create_index("ix_image_predictions_report_id", "image_predictions", ["report_id"], if_not_exists=True)
+
+    if not _has_table("departments"):
+        op.create_table(
+            "departments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("icon", sa.String(50)),
+            sa.Column("email", sa.String(255)),
+            sa.Column("phone", sa.String(20)),
+            sa.Column("head_name", sa.String(255)),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    op.create_index("ix_departments_id", "departments", ["id"], if_not_exists=True)
+    op.create_index("ix_departments_name", "departments", ["name"], unique=True, if_not_exists=True)
+
+    if not _has_table("department_stats"):
+        op.create_table(
+            "department_stats",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id")),
+            sa.Column("total_issues", sa.Integer()),
+            sa.Column("resolved_issues", sa.Integer()),
+            sa.Column("pending_issues", sa.Integer()),
+            sa.Column("in_progress_issues", sa.Integer()),
+            sa.Column("efficiency_score", sa.Float()),
+            sa.Column("period", sa.String(20)),
+            sa.Column("period_start", sa.DateTime()),
+            sa.Column("period_end", sa.DateTime()),
+            sa.Column("calculated_at", sa.DateTime()),
+        )
+    op.create_index("ix_department_stats_id", "department_stats", ["id"], if_not_exists=True)
+    op.create_index("ix_department_stats_department_id", "department_stats", ["department_id"], if_not_exists=True)
+
+    if not _has_table("department_feedback"):
+        op.create_table(
+            "department_feedback",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id")),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("feedback_text", sa.Text(), nullable=False),
+            sa.Column("rating", sa.Integer()),
+            sa.Column("user_name", sa.String(255)),
+            sa.Column("status", sa.String(20)),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("reviewed_at", sa.DateTime()),
+        )
+    op.create_index("ix_department_feedback_id", "department_feedback", ["id"], if_not_exists=True)
+    op.create_index("ix_department_feedback_department_id", "department_feedback", ["department_id"], if_not_exists=True)
+
+
+def downgrade():
+    for table in (
+        "department_feedback", "department_stats", "departments", "image_predictions",
+        "report_vectors", "activity_logs", "confirmations", "reports", "statuses",
+        "categories", "users",
+    ):
+        op.drop_table(table)
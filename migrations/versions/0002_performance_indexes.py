@@ -0,0 +1,49 @@
+"""indexes for the report access paths
+
+- (department, status): department dashboards and breakdowns
+- (user_email, created_at): a citizen's reports, newest first
+- (status_id, updated_at): admin queues and recent activity
+- created_at: date-range counts and "recent reports"
+- partial indexes on geolocated rows for the map endpoints
+
+Built CONCURRENTLY so an upgrade against a live database does not block
+report submission.
+
+Revision ID: 0002_performance_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19 00:00:01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_performance_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+GEOLOCATED = sa.text("location_lat IS NOT NULL AND location_long IS NOT NULL")
+
+INDEXES = [
+    ("ix_reports_department_status", ["department", "status"], {}),
+    ("ix_reports_user_email_created_at", ["user_email", "created_at"], {}),
+    ("ix_reports_status_id_updated_at", ["status_id", "updated_at"], {}),
+    ("ix_reports_created_at", ["created_at"], {}),
+    ("ix_reports_geo_lat_long", ["location_lat", "location_long"], {"postgresql_where": GEOLOCATED}),
+    ("ix_reports_geo_status", ["status"], {"postgresql_where": GEOLOCATED}),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, columns, kwargs in INDEXES:
+            op.create_index(
+                name, "reports", columns,
+                postgresql_concurrently=True, if_not_exists=True, **kwargs
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="reports", postgresql_concurrently=True, if_exists=True)
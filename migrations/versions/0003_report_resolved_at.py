@@ -0,0 +1,41 @@
+"""reports.resolved_at
+
+"Resolved today" used to be inferred from updated_at, which any later edit
+moves. Existing resolved reports are backfilled from updated_at - the best
+available approximation.
+
+Revision ID: 0003_report_resolved_at
+Revises: 0002_performance_indexes
+Create Date: 2026-10-19 00:00:02
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_report_resolved_at"
+down_revision = "0002_performance_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("reports", sa.Column("resolved_at", sa.DateTime(), nullable=True))
+    op.execute("""
+        UPDATE reports
+        SET resolved_at = COALESCE(updated_at, created_at)
+        WHERE resolved_at IS NULL
+          AND (status = 'Resolved'
+               OR status_id IN (SELECT id FROM statuses WHERE name = 'Resolved'))
+    """)
+    # The UPDATE above has to be committed before a concurrent index build can start
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_reports_resolved_at", "reports", ["resolved_at"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_reports_resolved_at", table_name="reports", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("reports", "resolved_at")
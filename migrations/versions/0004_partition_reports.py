@@ -0,0 +1,167 @@
+"""partition reports by month, add reports_archive
+
+reports becomes a table partitioned by RANGE (created_at) with one partition per
+month (plus a DEFAULT partition for rows outside every range), so scans filtered
+on created_at only touch the months they need and each partition's indexes stay
+small. Partitions for the coming months are created by the server at startup and
+by archive_reports.py.
+
+A partitioned table's primary key has to include the partition key, so it becomes
+(id, created_at); id stays unique through its sequence. Foreign keys can't point at
+reports.id alone any more, so the ones from confirmations, activity_logs,
+report_vectors and image_predictions are dropped - deletes clean those rows up in
+the application instead.
+
+reports_archive holds closed reports moved out of the hot table by
+archive_reports.py; it has the same columns plus archived_at and is keyed by id.
+
+The table is copied under an exclusive lock - run during a maintenance window.
+
+Revision ID: 0004_partition_reports
+Revises: 0003_report_resolved_at
+Create Date: 2026-10-19 00:00:03
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_partition_reports"
+down_revision = "0003_report_resolved_at"
+branch_labels = None
+depends_on = None
+
+# Months created ahead of now; the server and archive_reports.py keep extending this
+PARTITION_MONTHS_AHEAD = 3
+
+DEPENDENT_FOREIGN_KEYS = (
+    # table, constraint, ON DELETE action it had
+    ("confirmations", "confirmations_report_id_fkey", None),
+    ("activity_logs", "activity_logs_report_id_fkey", None),
+    ("report_vectors", "report_vectors_report_id_fkey", "CASCADE"),
+    ("image_predictions", "image_predictions_report_id_fkey", "SET NULL"),
+)
+
+REPORT_FOREIGN_KEYS = (
+    ("reports_category_id_fkey", "category_id", "categories"),
+    ("reports_status_id_fkey", "status_id", "statuses"),
+    ("reports_user_id_fkey", "user_id", "users"),
+)
+
+GEO_PREDICATE = "location_lat IS NOT NULL AND location_long IS NOT NULL"
+
+REPORT_INDEXES = (
+    ("ix_reports_id", "(id)"),
+    ("ix_reports_department_status", "(department, status)"),
+    ("ix_reports_user_email_created_at", "(user_email, created_at)"),
+    ("ix_reports_status_id_updated_at", "(status_id, updated_at)"),
+    ("ix_reports_created_at", "(created_at)"),
+    ("ix_reports_resolved_at", "(resolved_at)"),
+    ("ix_reports_geo_lat_long", f"(location_lat, location_long) WHERE {GEO_PREDICATE}"),
+    ("ix_reports_geo_status", f"(status) WHERE {GEO_PREDICATE}"),
+)
+
+REPORT_COLUMNS = (
+    "id, user_name, user_mobile, user_email, title, description, issue_type, category, "
+    "urgency_level, category_id, status_id, status, location_lat, location_long, "
+    "location_address, distance, assigned_department, resolution_notes, resolved_by, "
+    "images, voice_note, created_at, updated_at, user_id, department, auto_assigned, "
+    "prediction_confidence, text_simhash, confirmation_count, resolved_at"
+)
+
+
+def _id_sequence():
+    sequence = op.get_bind().execute(sa.text("SELECT pg_get_serial_sequence('reports', 'id')")).scalar()
+    if sequence is None:
+        raise RuntimeError("reports.id has no owned sequence - expected a SERIAL column")
+    return sequence
+
+
+def _create_report_constraints_and_indexes():
+    for name, column, table in REPORT_FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE reports ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {table} (id)")
+    for name, definition in REPORT_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON reports {definition}")
+
+
+def upgrade():
+    for table, constraint, _ in DEPENDENT_FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+
+    # The partition key can't be NULL
+    op.execute("UPDATE reports SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+
+    sequence = _id_sequence()
+    op.execute("ALTER TABLE reports RENAME TO reports_unpartitioned")
+    op.execute("ALTER TABLE reports_unpartitioned RENAME CONSTRAINT reports_pkey TO reports_unpartitioned_pkey")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE reports (LIKE reports_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER TABLE reports ADD CONSTRAINT reports_pkey PRIMARY KEY (id, created_at)")
+
+    # One partition per month from the oldest report until a few months ahead
+    op.execute(f"""
+        DO $$
+        DECLARE month_start date;
+        BEGIN
+            FOR month_start IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT min(created_at) FROM reports_unpartitioned), now())),
+                    date_trunc('month', now()) + interval '{PARTITION_MONTHS_AHEAD} months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF reports FOR VALUES FROM (%L) TO (%L)',
+                    'reports_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+                    month_start, (month_start + interval '1 month')::date
+                );
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE reports_default PARTITION OF reports DEFAULT")
+
+    op.execute("INSERT INTO reports SELECT * FROM reports_unpartitioned")
+    op.execute("DROP TABLE reports_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY reports.id")
+
+    # Declared on the parent, created on every partition (and on partitions added later)
+    _create_report_constraints_and_indexes()
+    op.execute("ANALYZE reports")
+
+    op.execute("CREATE TABLE reports_archive (LIKE reports)")
+    op.execute("""
+        ALTER TABLE reports_archive
+        ADD CONSTRAINT reports_archive_pkey PRIMARY KEY (id),
+        ADD COLUMN archived_at TIMESTAMP NOT NULL DEFAULT now()
+    """)
+
+
+def downgrade():
+    sequence = _id_sequence()
+
+    op.execute("CREATE TABLE reports_unpartitioned (LIKE reports INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO reports_unpartitioned SELECT * FROM reports")
+    op.execute(f"""
+        INSERT INTO reports_unpartitioned ({REPORT_COLUMNS})
+        SELECT {REPORT_COLUMNS} FROM reports_archive
+    """)
+    op.execute("DROP TABLE reports_archive")
+
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute("DROP TABLE reports")  # takes every partition with it
+    op.execute("ALTER TABLE reports_unpartitioned RENAME TO reports")
+    op.execute("ALTER TABLE reports ADD CONSTRAINT reports_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE reports ALTER COLUMN created_at DROP NOT NULL")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY reports.id")
+    _create_report_constraints_and_indexes()
+
+    # NOT VALID: rows left pointing at deleted reports don't block the downgrade
+    for table, constraint, on_delete in DEPENDENT_FOREIGN_KEYS:
+        action = f" ON DELETE {on_delete}" if on_delete else ""
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {constraint} "
+            f"FOREIGN KEY (report_id) REFERENCES reports (id){action} NOT VALID"
+        )
@@ -0,0 +1,72 @@
+"""activity_logs payload, timeline / feed indexes and backfill
+
+Nothing wrote activity_logs before. Report timelines and the public feed now
+read it, so existing reports get their "submitted" and "resolved" events
+backfilled from reports and reports_archive. Intermediate status changes were
+never recorded and can't be recovered.
+
+Revision ID: 0005_activity_log_pipeline
+Revises: 0004_partition_reports
+Create Date: 2026-10-19 00:00:04
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_activity_log_pipeline"
+down_revision = "0004_partition_reports"
+branch_labels = None
+depends_on = None
+
+SOURCE_COLUMNS = (
+    "id, user_id, title, issue_type, category, urgency_level, location_address, "
+    "department, created_at, resolved_at, resolved_by"
+)
+
+PAYLOAD = """
+    json_build_object(
+        'title', title, 'issue_type', issue_type, 'category', category,
+        'urgency', urgency_level, 'location', location_address, 'department', department
+    )
+"""
+
+
+def upgrade():
+    op.add_column("activity_logs", sa.Column("payload", sa.JSON(), nullable=True))
+
+    op.execute(f"""
+        INSERT INTO activity_logs (activity_type, report_id, user_id, description, payload, created_at)
+        SELECT 'report_created', id, user_id, 'Complaint submitted', {PAYLOAD}, created_at
+        FROM (
+            SELECT {SOURCE_COLUMNS} FROM reports
+            UNION ALL
+            SELECT {SOURCE_COLUMNS} FROM reports_archive
+        ) AS all_reports
+    """)
+    op.execute(f"""
+        INSERT INTO activity_logs (activity_type, report_id, user_id, description, payload, created_at)
+        SELECT 'issue_resolved', id, NULL, 'Resolved by ' || COALESCE(resolved_by, 'admin'), {PAYLOAD}, resolved_at
+        FROM (
+            SELECT {SOURCE_COLUMNS} FROM reports WHERE resolved_at IS NOT NULL
+            UNION ALL
+            SELECT {SOURCE_COLUMNS} FROM reports_archive WHERE resolved_at IS NOT NULL
+        ) AS resolved_reports
+    """)
+
+    # The backfill has to be committed before a concurrent index build can start
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_activity_logs_report_id_created_at", "activity_logs", ["report_id", "created_at"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_activity_logs_created_at", "activity_logs", ["created_at"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_activity_logs_created_at", table_name="activity_logs", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_activity_logs_report_id_created_at", table_name="activity_logs", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("activity_logs", "payload")
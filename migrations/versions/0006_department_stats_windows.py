@@ -0,0 +1,57 @@
+"""departments seed rows and one department_stats row per window
+
+department_stats was never written. The stats scheduler now keeps one row per
+(department, period) for the rolling week / month / year windows, upserted on
+a unique index, and the departments it reports on need their rows. Any stray
+duplicate windows are dropped, keeping the most recently calculated.
+
+Revision ID: 0006_department_stats_windows
+Revises: 0005_activity_log_pipeline
+Create Date: 2026-10-19 00:00:05
+
+"""
+from alembic import op
+
+revision = "0006_department_stats_windows"
+down_revision = "0005_activity_log_pipeline"
+branch_labels = None
+depends_on = None
+
+# (name, icon, description) - names match app.department_stats.DEPARTMENTS
+DEPARTMENTS = (
+    ("Water Dept", "water-drop", "Water supply, leakages and drainage"),
+    ("Road Dept", "road", "Potholes, road damage and traffic infrastructure"),
+    ("Sanitation Dept", "clean-hands", "Garbage collection and public cleanliness"),
+    ("Electricity Dept", "flash-on", "Streetlights and power supply"),
+    ("Other", "build", "Issues outside the other departments"),
+)
+
+
+def upgrade():
+    for name, icon, description in DEPARTMENTS:
+        op.execute(
+            "INSERT INTO departments (name, icon, description, created_at) "
+            f"VALUES ('{name}', '{icon}', '{description}', now()) "
+            "ON CONFLICT (name) DO NOTHING"
+        )
+
+    op.execute("""
+        DELETE FROM department_stats
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY department_id, period ORDER BY calculated_at DESC NULLS LAST, id DESC
+                ) AS rank
+                FROM department_stats
+            ) AS ranked
+            WHERE rank > 1
+        )
+    """)
+    op.create_index(
+        "ux_department_stats_department_id_period", "department_stats", ["department_id", "period"],
+        unique=True, if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index("ux_department_stats_department_id_period", table_name="department_stats", if_exists=True)
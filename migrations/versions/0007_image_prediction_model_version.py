@@ -0,0 +1,55 @@
+"""image_predictions keyed by (content_hash, model_version)
+
+Cached image predictions were keyed by content hash alone, so after a new
+image model was activated every previously seen photo kept the old model's
+department, confidence and embedding. Rows now carry the registry version that
+produced them and the cache only serves the active version's rows. Existing
+rows are attributed to the version ACTIVE in the model registry when the
+migration runs ("baseline" if none was ever activated).
+
+Revision ID: 0007_image_prediction_model_version
+Revises: 0006_department_stats_windows
+Create Date: 2026-10-19 00:00:06
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_image_prediction_model_version"
+down_revision = "0006_department_stats_windows"
+branch_labels = None
+depends_on = None
+
+
+def _active_image_version() -> str:
+    active_path = os.path.join(os.getenv("MODEL_REGISTRY_DIR", "model_registry"), "image", "ACTIVE")
+    if os.path.isfile(active_path):
+        with open(active_path) as f:
+            return f.read().strip() or "baseline"
+    return "baseline"
+
+
+def upgrade():
+    op.add_column(
+        "image_predictions",
+        sa.Column("model_version", sa.String(100), nullable=False, server_default=_active_image_version()),
+    )
+    op.alter_column("image_predictions", "model_version", server_default=None)
+    op.drop_constraint("image_predictions_pkey", "image_predictions", type_="primary")
+    op.create_primary_key("image_predictions_pkey", "image_predictions", ["content_hash", "model_version"])
+
+
+def downgrade():
+    # Only one prediction per photo fits the old key; keep the newest
+    op.execute("""
+        DELETE FROM image_predictions older
+        USING image_predictions newer
+        WHERE older.content_hash = newer.content_hash
+          AND (COALESCE(older.created_at, 'epoch'), older.model_version)
+              < (COALESCE(newer.created_at, 'epoch'), newer.model_version)
+    """)
+    op.drop_constraint("image_predictions_pkey", "image_predictions", type_="primary")
+    op.create_primary_key("image_predictions_pkey", "image_predictions", ["content_hash"])
+    op.drop_column("image_predictions", "model_version")
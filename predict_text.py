@@ -1,26 +1,72 @@
+import os
 import joblib
 import numpy as np
 
-clf = joblib.load("text_classifier.pkl")
-vectorizer = joblib.load("tfidf_vectorizer.pkl")
+from app.model_registry import model_registry
+
+CLASSIFIER_FILE = "text_classifier.pkl"
+VECTORIZER_FILE = "tfidf_vectorizer.pkl"
+
+class TextModel:
+    """TF-IDF vectorizer + classifier pair, versioned together in the model registry"""
+
+    def __init__(self, clf, vectorizer):
+        self.clf = clf
+        self.vectorizer = vectorizer
+        self.vocab_size = len(vectorizer.vocabulary_)
+
+    @classmethod
+    def load(cls, directory="."):
+        return cls(
+            joblib.load(os.path.join(directory, CLASSIFIER_FILE)),
+            joblib.load(os.path.join(directory, VECTORIZER_FILE))
+        )
+
+    def vectorize(self, texts):
+        return self.vectorizer.transform([preprocess_text(t) for t in texts])
+
+    def predict(self, texts):
+        proba = self.clf.predict_proba(self.vectorize(texts))
+        top_idx = np.argsort(proba, axis=1)[:, ::-1][:, :3]
+
+        results = []
+        for row, row_top in zip(proba, top_idx):
+            best = row_top[0]
+            top3 = [(self.clf.classes_[i], float(row[i])*100) for i in row_top]
+            results.append((self.clf.classes_[best], round(float(row[best]) * 100, 2), top3))
+        return results
+
+def preprocess_text(text):
+    return text.lower().strip()
+
+# Files in the repo root are the baseline, newer versions come from the registry
+model_registry.register("text", TextModel.load, TextModel.load())
+
+def _departments(results):
+    return [department for department, _, _ in results]
+
+def active_vocab_size():
+    return model_registry.active("text").vocab_size
+
+def vectorize_texts(texts):
+    """TF-IDF vectors (sparse CSR, L2-normalised) for a list of texts"""
+    return model_registry.active("text").vectorize(texts)
 
 def predict_department_from_text(text):
-    # Preprocess text
-    text_proc = text.lower().strip()
-    
-    # Vectorize and predict
-    vec = vectorizer.transform([text_proc])
-    pred = clf.predict(vec)[0]
-    proba = clf.predict_proba(vec)[0]
-    
-    # Get confidence and top 3 predictions
-    confidence = float(max(proba)) * 100
-    top_idx = np.argsort(proba)[::-1][:3]
-    top3 = [(clf.classes_[i], float(proba[i])*100) for i in top_idx]
+    pred, confidence, top3 = predict_departments_from_texts([text])[0]
     
     print(f"🤖 Text Prediction: {pred} (confidence: {confidence:.2f}%)")
     
-    return pred, round(confidence, 2), top3
+    return pred, confidence, top3
+
+def predict_departments_from_texts(texts):
+    """
+    Vectorized predict_department_from_text: one transform and one predict_proba
+    call for the whole list. Returns (department, confidence, top3) per text, in order.
+    """
+    if not texts:
+        return []
+    return model_registry.run("text", TextModel.predict, texts, labels=_departments)
 
 if __name__ == "__main__":
     s = input("Enter complaint text: ")
@@ -28,4 +74,4 @@ if __name__ == "__main__":
     print(f"\nPredicted Department: {dept}  |  Confidence: {conf}%")
     print("Top 3:")
     for c, p in top3:
-        print(f"  {c}: {p:.2f}%")
\ No newline at end of file
+        print(f"  {c}: {p:.2f}%")
@@ -0,0 +1,41 @@
+# publish_model.py
+# Adds a new immutable model version to the registry, with sha256 checksums.
+#
+#   python publish_model.py text 2026-10-19 text_classifier.pkl tfidf_vectorizer.pkl
+#   python publish_model.py image 2026-10-19 civic_eye_model.h5
+#
+# Then shadow-score it or make it active from the admin API:
+#   POST /api/admin/models/{kind}/shadow   {"version": "...", "sample_rate": 0.1}
+#   POST /api/admin/models/{kind}/activate {"version": "..."}
+import argparse
+import os
+import sys
+
+from app.model_registry import model_registry, ModelRegistryError
+
+REQUIRED_FILES = {
+    "text": {"text_classifier.pkl", "tfidf_vectorizer.pkl"},
+    "image": {"civic_eye_model.h5"},
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish a model version to the registry")
+    parser.add_argument("kind", choices=sorted(REQUIRED_FILES))
+    parser.add_argument("version")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args()
+
+    missing = REQUIRED_FILES[args.kind] - {os.path.basename(f) for f in args.files}
+    if missing:
+        print(f"❌ Missing artifacts for {args.kind} model: {', '.join(sorted(missing))}")
+        sys.exit(1)
+
+    try:
+        manifest = model_registry.publish(args.kind, args.version, args.files)
+    except ModelRegistryError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✅ Published {args.kind} model {args.version}")
+    for name, checksum in manifest["files"].items():
+        print(f"   - {name}: sha256 {checksum}")
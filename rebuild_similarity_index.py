@@ -0,0 +1,80 @@
+# rebuild_similarity_index.py
+# Recomputes the stored TF-IDF vector of every report, e.g. after retraining
+# tfidf_vectorizer.pkl. Running servers pick the new vectors up through
+# POST /api/admin/similarity/rebuild (or on their next restart).
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import AsyncSessionLocal
+from app.models import Report, ReportVector
+from app.similarity import report_text, encode_vector
+from app.model_registry import model_registry
+from predict_text import vectorize_texts, active_vocab_size
+
+
+async def rebuild_vectors(batch_size: int, only_missing: bool):
+    # Vectorize with the same model version the servers are serving
+    model_registry.sync_blocking()
+    vocab_size = active_vocab_size()
+    processed = 0
+    last_id = 0
+    start = time.perf_counter()
+
+    async with AsyncSessionLocal() as session:
+        while True:
+            stmt = (
+                select(Report.id, Report.title, Report.description)
+                .where(Report.id > last_id)
+                .order_by(Report.id)
+                .limit(batch_size)
+            )
+            if only_missing:
+                stmt = stmt.outerjoin(ReportVector, ReportVector.report_id == Report.id).where(
+                    (ReportVector.report_id.is_(None)) | (ReportVector.vocab_size != vocab_size)
+                )
+
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                break
+
+            vectors = vectorize_texts([report_text(r.title, r.description) for r in rows])
+            values = []
+            for i, row in enumerate(rows):
+                term_ids, weights = encode_vector(vectors[i])
+                values.append({
+                    "report_id": row.id,
+                    "term_ids": term_ids,
+                    "weights": weights,
+                    "vocab_size": vocab_size,
+                })
+
+            stmt = insert(ReportVector).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ReportVector.report_id],
+                set_={
+                    "term_ids": stmt.excluded.term_ids,
+                    "weights": stmt.excluded.weights,
+                    "vocab_size": stmt.excluded.vocab_size,
+                },
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+            processed += len(rows)
+            last_id = rows[-1].id
+            print(f"🔄 Vectorized {processed} reports...")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Rebuilt {processed} report vectors in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute stored report TF-IDF vectors")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--only-missing", action="store_true", help="Skip reports with an up-to-date vector")
+    args = parser.parse_args()
+    asyncio.run(rebuild_vectors(args.batch_size, args.only_missing))
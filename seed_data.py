@@ -1,17 +1,12 @@
-# init_tables.py
+# seed_data.py
+# Default categories, statuses and admin user. Tables come from migrations:
+#   alembic upgrade head && python seed_data.py
 import asyncio
 import os
 from dotenv import load_dotenv
-from app.database import engine, Base
 from app.models import User, Category, Status
 from app.auth_utils import get_password_hash
 
-async def init_tables():
-    # Create all tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print("✅ Database tables created successfully!")
-
 async def init_data():
     from app.database import AsyncSessionLocal
     
@@ -60,6 +55,7 @@ async def init_data():
                 email="admin@urbanissues.com",
                 hashed_password=get_password_hash("admin123"),
                 full_name="Administrator",
+                mobile_number="1234567890",
                 is_admin=True
             )
             session.add(admin_user)
@@ -71,7 +67,6 @@ async def init_data():
 
 async def main():
     load_dotenv()
-    await init_tables()
     await init_data()
 
 if __name__ == "__main__":
@@ -0,0 +1,279 @@
+# train_image_classifier.py
+# Reproducible CPU training for civic_eye_model.h5 (4 classes).
+#
+# Expects one folder per class:
+#   image_dataset/garbage/*.jpg
+#   image_dataset/pothole/*.jpg
+#   image_dataset/streetlight/*.jpg
+#   image_dataset/water_leakage/*.jpg
+#
+#   python train_image_classifier.py --data-dir image_dataset --epochs 15
+#
+# Writes civic_eye_model.h5 plus an int8-quantized civic_eye_model.tflite.
+import argparse
+import hashlib
+import os
+import random
+import time
+
+import numpy as np
+import tensorflow as tf
+
+# Must match original_class_labels in image_predict.py - the index is the model output
+CLASS_LABELS = ["garbage", "pothole", "streetlight", "water_leakage"]
+IMAGE_SIZE = (224, 224)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def set_seed(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+    tf.config.experimental.enable_op_determinism()
+
+
+def list_images(data_dir):
+    paths, labels = [], []
+    for label_idx, label in enumerate(CLASS_LABELS):
+        class_dir = os.path.join(data_dir, label)
+        if not os.path.isdir(class_dir):
+            raise SystemExit(f"❌ Missing class folder: {class_dir}")
+        for name in sorted(os.listdir(class_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(class_dir, name))
+                labels.append(label_idx)
+    return paths, labels
+
+
+def split_dataset(paths, labels, val_split, seed):
+    """Stratified split so every class shows up in validation"""
+    rng = np.random.default_rng(seed)
+    train, val = [], []
+    for label_idx in range(len(CLASS_LABELS)):
+        items = [(p, l) for p, l in zip(paths, labels) if l == label_idx]
+        rng.shuffle(items)
+        n_val = max(1, int(len(items) * val_split))
+        val.extend(items[:n_val])
+        train.extend(items[n_val:])
+    rng.shuffle(train)
+    return train, val
+
+
+def decode_and_resize(path, label):
+    data = tf.io.read_file(path)
+    img = tf.io.decode_image(data, channels=3, expand_animations=False)
+    img = tf.image.resize(img, IMAGE_SIZE)
+    # Same scaling as preprocess_image() in image_predict.py
+    return tf.cast(img, tf.float32) / 255.0, label
+
+
+def augment(img, label):
+    img = tf.image.random_flip_left_right(img)
+    img = tf.image.random_brightness(img, 0.15)
+    img = tf.image.random_contrast(img, 0.85, 1.15)
+    img = tf.image.random_saturation(img, 0.85, 1.15)
+    # Random crop + resize back simulates different framing and zoom
+    crop = tf.random.uniform([], 0.8, 1.0)
+    crop_size = tf.cast(crop * IMAGE_SIZE[0], tf.int32)
+    img = tf.image.random_crop(img, [crop_size, crop_size, 3])
+    img = tf.image.resize(img, IMAGE_SIZE)
+    return tf.clip_by_value(img, 0.0, 1.0), label
+
+
+def mixup(images, labels, alpha=0.2):
+    """Blend pairs of images in a batch - regularises the small civic dataset"""
+    batch_size = tf.shape(images)[0]
+    one_hot = tf.one_hot(labels, len(CLASS_LABELS))
+    gamma_a = tf.random.gamma([batch_size], alpha)
+    gamma_b = tf.random.gamma([batch_size], alpha)
+    lam = gamma_a / (gamma_a + gamma_b)
+    index = tf.random.shuffle(tf.range(batch_size))
+    img_lam = tf.reshape(lam, [-1, 1, 1, 1])
+    label_lam = tf.reshape(lam, [-1, 1])
+    mixed_images = img_lam * images + (1 - img_lam) * tf.gather(images, index)
+    mixed_labels = label_lam * one_hot + (1 - label_lam) * tf.gather(one_hot, index)
+    return mixed_images, mixed_labels
+
+
+def to_one_hot(images, labels):
+    return images, tf.one_hot(labels, len(CLASS_LABELS))
+
+
+def cache_path(cache_dir, name, items):
+    """
+    Cache file prefix for one split, keyed by its files, their order and the image size.
+    A changed dataset or split gets a fresh cache instead of silently reusing the old
+    tensors; stale caches of the same split are removed.
+    """
+    digest = hashlib.sha256(repr(IMAGE_SIZE).encode())
+    for path, label in items:
+        stat = os.stat(path)
+        digest.update(f"{path}\0{label}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    prefix = f"{name}-{digest.hexdigest()[:16]}"
+    for entry in os.listdir(cache_dir):
+        if entry.startswith(f"{name}-") and not entry.startswith(prefix):
+            os.remove(os.path.join(cache_dir, entry))
+    return os.path.join(cache_dir, prefix)
+
+
+def build_dataset(items, batch_size, cache_path, training, use_mixup, shuffle_buffer=1024, seed=None):
+    paths = [p for p, _ in items]
+    labels = [l for _, l in items]
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    # Decoding and resizing happen once; later epochs read resized tensors from the cache file
+    ds = ds.map(decode_and_resize, num_parallel_calls=AUTOTUNE)
+    ds = ds.cache(cache_path)
+    if training:
+        # Shuffle after the cache so every epoch sees a new order (a shuffle before it is
+        # frozen into the cache file). split_dataset already shuffled the file order, so a
+        # bounded buffer of decoded images is enough and keeps memory in check.
+        ds = ds.shuffle(min(len(paths), shuffle_buffer), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.map(augment, num_parallel_calls=AUTOTUNE)
+    ds = ds.batch(batch_size, drop_remainder=training)
+    if training and use_mixup:
+        ds = ds.map(mixup, num_parallel_calls=AUTOTUNE)
+    else:
+        ds = ds.map(to_one_hot, num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def build_model(dropout):
+    base = tf.keras.applications.MobileNetV2(
+        input_shape=(*IMAGE_SIZE, 3), include_top=False, weights="imagenet"
+    )
+    base.trainable = False
+
+    inputs = tf.keras.Input(shape=(*IMAGE_SIZE, 3))
+    # MobileNetV2 expects [-1, 1]; the API feeds [0, 1]
+    x = tf.keras.layers.Rescaling(2.0, offset=-1.0)(inputs)
+    x = base(x, training=False)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    x = tf.keras.layers.Dropout(dropout)(x)
+    # Penultimate layer - image_predict.py uses its output as the image embedding
+    x = tf.keras.layers.Dense(128, activation="relu", name="embedding")(x)
+    outputs = tf.keras.layers.Dense(len(CLASS_LABELS), activation="softmax", name="predictions")(x)
+    return tf.keras.Model(inputs, outputs), base
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    def __init__(self, n_images):
+        super().__init__()
+        self.n_images = n_images
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        print(f"⚡ Epoch {epoch + 1}: {self.n_images / elapsed:.1f} images/s on CPU")
+
+
+def measure_throughput(ds, n_batches=20):
+    """Input pipeline alone, to tell whether training is bound by decoding or by the model"""
+    start = time.perf_counter()
+    count = 0
+    for images, _ in ds.take(n_batches):
+        count += int(images.shape[0])
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed > 0 else 0.0
+
+
+def export_quantized(model, path, sample_ds):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    def representative_data():
+        for images, _ in sample_ds.unbatch().batch(1).take(100):
+            yield [images]
+
+    converter.representative_dataset = representative_data
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the civic eye image classifier on CPU")
+    parser.add_argument("--data-dir", default="image_dataset")
+    parser.add_argument("--output", default="civic_eye_model.h5")
+    parser.add_argument("--cache-dir", default=".tfdata_cache")
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--fine-tune-epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--val-split", type=float, default=0.2)
+    parser.add_argument("--dropout", type=float, default=0.3)
+    parser.add_argument("--no-mixup", action="store_true")
+    parser.add_argument("--shuffle-buffer", type=int, default=1024, help="Decoded images held for shuffling")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    set_seed(args.seed)
+    os.makedirs(args.cache_dir, exist_ok=True)
+
+    # 1. Load file list
+    paths, labels = list_images(args.data_dir)
+    print("Dataset Info:")
+    print(f"Total images: {len(paths)}")
+    for label_idx, label in enumerate(CLASS_LABELS):
+        print(f"  {label}: {labels.count(label_idx)}")
+
+    # 2. Split and build pipelines
+    train_items, val_items = split_dataset(paths, labels, args.val_split, args.seed)
+    train_ds = build_dataset(
+        train_items, args.batch_size, cache_path(args.cache_dir, "train", train_items), True, not args.no_mixup,
+        shuffle_buffer=args.shuffle_buffer, seed=args.seed,
+    )
+    val_ds = build_dataset(
+        val_items, args.batch_size, cache_path(args.cache_dir, "val", val_items), False, False
+    )
+
+    # Fill the on-disk cache once so epoch timings measure training, not JPEG decoding
+    print("\n🔄 Warming decode cache...")
+    start = time.perf_counter()
+    for _ in train_ds:
+        pass
+    for _ in val_ds:
+        pass
+    print(f"✅ Cached {len(paths)} resized images in {time.perf_counter() - start:.1f}s")
+    print(f"⚡ Input pipeline: {measure_throughput(train_ds):.1f} images/s from cache")
+
+    # 3. Train the head, then fine-tune the top of the backbone
+    model, base = build_model(args.dropout)
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(1e-3),
+        loss="categorical_crossentropy",
+        metrics=["accuracy"],
+    )
+    callbacks = [
+        ThroughputLogger(len(train_items)),
+        tf.keras.callbacks.EarlyStopping(monitor="val_accuracy", patience=4, restore_best_weights=True),
+    ]
+    model.fit(train_ds, validation_data=val_ds, epochs=args.epochs, callbacks=callbacks)
+
+    if args.fine_tune_epochs > 0:
+        base.trainable = True
+        for layer in base.layers[:-30]:
+            layer.trainable = False
+        model.compile(
+            optimizer=tf.keras.optimizers.Adam(1e-5),
+            loss="categorical_crossentropy",
+            metrics=["accuracy"],
+        )
+        model.fit(train_ds, validation_data=val_ds, epochs=args.fine_tune_epochs, callbacks=callbacks)
+
+    # 4. Evaluate
+    loss, accuracy = model.evaluate(val_ds, verbose=0)
+    print(f"\n✅ Validation accuracy: {accuracy:.4f} (loss {loss:.4f})")
+
+    # 5. Save .h5 and a quantized variant
+    model.save(args.output)
+    quantized_path = os.path.splitext(args.output)[0] + ".tflite"
+    export_quantized(model, quantized_path, val_ds)
+
+    print(f"✅ Model saved to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+    print(f"✅ Quantized model saved to {quantized_path} ({os.path.getsize(quantized_path) / 1e6:.1f} MB)")
+    print(f"🚀 Publish it with: python publish_model.py image <version> {args.output}")
+
+
+if __name__ == "__main__":
+    main()